@@ -2,8 +2,10 @@
 Dependencias comunes para los endpoints de la API
 """
 from typing import Generator
+from fastapi import Response
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.crud.paginacion import Pagina
 
 def get_db_session() -> Generator:
     """
@@ -14,3 +16,14 @@ def get_db_session() -> Generator:
         yield db
     finally:
         pass
+
+# Encabezados de paginación por cursor (expuestos vía CORS en main.py)
+ENCABEZADOS_PAGINACION = ["X-Next-Cursor", "X-Has-More"]
+
+def agregar_encabezados_paginacion(response: Response, pagina: Pagina) -> None:
+    """
+    Agregar a la respuesta el cursor de la página siguiente y si hay más resultados
+    """
+    if pagina.next_cursor:
+        response.headers["X-Next-Cursor"] = pagina.next_cursor
+    response.headers["X-Has-More"] = "true" if pagina.has_more else "false"
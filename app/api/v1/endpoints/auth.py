@@ -1,22 +1,60 @@
+import math
 from datetime import timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
 from app.core.config import settings
+from app.core.limitador import limitador_ip, limitador_usuario
+from app.core.pool_hash import ColaHashLlena, pool_hash
 from app.core.security import (
-    verify_password,
+    verify_and_update_password,
     create_access_token,
     get_current_active_user
 )
-from app.crud import user as crud_user
-from app.schemas import UserCreate, UserResponse, Token
-from app.models.user import User
+from app.crud.asincrono import refresh_token as crud_refresh
+from app.crud.asincrono import user as crud_user
+from app.crud.asincrono.refresh_token import RefreshTokenInvalido
+from app.crud.user import UsuarioDuplicado
+from app.schemas import UserCreate, UserResponse, Token, RefreshTokenRequest
+from app.core.cache_principales import Principal
 
 router = APIRouter()
 
+def _servidor_ocupado() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="El servidor está ocupado, intente de nuevo en unos segundos",
+        headers={"Retry-After": str(pool_hash.espera_estimada())}
+    )
+
+def _demasiados_intentos(espera: float) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Demasiados intentos, intente de nuevo más tarde",
+        headers={"Retry-After": str(math.ceil(espera))}
+    )
+
+def _limitar_ip(request: Request) -> None:
+    """Contar el intento de la IP antes de cualquier trabajo de bcrypt"""
+    espera = limitador_ip.permitir(request.client.host if request.client else "")
+    if espera:
+        raise _demasiados_intentos(espera)
+
+def _crear_access_token(user) -> str:
+    # uid, permiso y ver permiten autorizar sin consultar la base de datos
+    return create_access_token(
+        data={
+            "sub": user.username,
+            "uid": user.id,
+            "permiso": user.permiso.value,
+            "ver": user.token_version
+        },
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Registrar un nuevo usuario
     
@@ -25,31 +63,25 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     - **password**: Contraseña (mínimo 6 caracteres)
     - **full_name**: Nombre completo (opcional)
     """
+    _limitar_ip(request)
     
-    # Verificar si el email ya existe
-    db_user = crud_user.get_user_by_email(db, email=user.email)
-    if db_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El email ya está registrado"
-        )
-    
-    # Verificar si el username ya existe
-    db_user = crud_user.get_user_by_username(db, username=user.username)
-    if db_user:
+    # Un solo INSERT: los índices únicos de users detectan email o username repetidos
+    try:
+        new_user = await crud_user.create_user(db=db, user=user)
+    except ColaHashLlena:
+        raise _servidor_ocupado()
+    except UsuarioDuplicado as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="El nombre de usuario ya está en uso"
+            detail="El email ya está registrado" if e.campo == "email" else "El nombre de usuario ya está en uso"
         )
-    
-    # Crear nuevo usuario
-    new_user = crud_user.create_user(db=db, user=user)
     return new_user
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Iniciar sesión y obtener token de acceso
@@ -57,13 +89,27 @@ async def login(
     - **username**: Nombre de usuario
     - **password**: Contraseña
     
-    Retorna un token JWT válido por 30 minutos (configurable)
+    Retorna un token JWT válido por 30 minutos (configurable) y un refresh token
+    para renovarlo en /auth/refresh
     """
     
+    _limitar_ip(request)
+    espera = limitador_usuario.espera(form_data.username)
+    if espera:
+        raise _demasiados_intentos(espera)
+    
     # Buscar usuario por username
-    user = crud_user.get_user_by_username(db, username=form_data.username)
+    user = await crud_user.get_user_by_username(db, username=form_data.username)
+    
+    valido, nuevo_hash = False, None
+    if user:
+        try:
+            valido, nuevo_hash = await verify_and_update_password(form_data.password, user.hashed_password)
+        except ColaHashLlena:
+            raise _servidor_ocupado()
     
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not valido:
+        limitador_usuario.registrar(form_data.username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Usuario o contraseña incorrectos",
@@ -76,20 +122,63 @@ async def login(
             detail="Usuario inactivo"
         )
     
-    # Crear token de acceso
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.username},
-        expires_delta=access_token_expires
-    )
+    # El hash tiene un costo de bcrypt distinto del configurado: reemplazarlo
+    if nuevo_hash:
+        await crud_user.update_password_hash(db, user, nuevo_hash)
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": _crear_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": await crud_refresh.emitir(db, user)
+    }
+
+@router.post("/refresh", response_model=Token)
+async def refresh(datos: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Obtener un nuevo token de acceso sin volver a enviar la contraseña
+    
+    - **refresh_token**: Refresh token recibido al iniciar sesión o en el último refresh
+    
+    El refresh token usado deja de ser válido: la respuesta incluye el siguiente.
+    """
+    try:
+        user, nuevo_refresh = await crud_refresh.rotar(db, datos.refresh_token)
+    except RefreshTokenInvalido:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token inválido o vencido",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    
+    return {
+        "access_token": _crear_access_token(user),
+        "token_type": "bearer",
+        "refresh_token": nuevo_refresh
+    }
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(datos: RefreshTokenRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cerrar sesión: revocar el refresh token y los obtenidos a partir del mismo inicio de sesión
+    """
+    await crud_refresh.revocar(db, datos.refresh_token)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: User = Depends(get_current_active_user)):
+async def get_current_user_info(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
+):
     """
     Obtener información del usuario actual
     
     Requiere token de autenticación válido
     """
-    return current_user
+    # El principal solo guarda los datos de autorización: leer el perfil completo
+    user = await crud_user.get_user_by_id(db, user_id=current_user.id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    return user
@@ -1,27 +1,29 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.security import get_current_active_user, get_current_admin_user
-from app.crud import evento as crud_evento
+from app.crud.asincrono import evento as crud_evento
+from app.crud.paginacion import CursorInvalido
+from app.api.deps import agregar_encabezados_paginacion
 from app.schemas import EventoCreate, EventoResponse, EventoUpdate
-from app.models.user import User
+from app.core.cache_principales import Principal
 
 router = APIRouter()
 
 @router.post("/", response_model=EventoResponse, status_code=status.HTTP_201_CREATED)
 async def crear_evento(
     evento: EventoCreate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """
     Crear un nuevo evento (solo administradores)
     
     Requiere permisos de administrador
     """
-    nuevo_evento = crud_evento.create_evento(
+    nuevo_evento = await crud_evento.create_evento(
         db=db, 
         evento=evento, 
         creado_por_id=current_admin.id
@@ -30,40 +32,51 @@ async def crear_evento(
 
 @router.get("/", response_model=List[EventoResponse])
 async def listar_eventos(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
     tipo: Optional[str] = Query(None, description="Filtrar por tipo: Limpieza o Voluntariado"),
     fecha_desde: Optional[date] = Query(None, description="Filtrar eventos desde esta fecha"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener lista de eventos
     
-    - **skip**: Número de registros a omitir
+    - **skip**: Número de registros a omitir (preferir cursor)
     - **limit**: Número máximo de registros
+    - **cursor**: Cursor de la página siguiente, tomado del encabezado `X-Next-Cursor`
     - **tipo**: Filtrar por tipo de evento
     - **fecha_desde**: Mostrar eventos desde esta fecha
     """
-    eventos = crud_evento.get_eventos(
-        db, 
-        skip=skip, 
-        limit=limit,
-        tipo=tipo,
-        fecha_desde=fecha_desde
-    )
-    return eventos
+    try:
+        pagina = await crud_evento.get_eventos(
+            db, 
+            skip=skip, 
+            limit=limit,
+            tipo=tipo,
+            fecha_desde=fecha_desde,
+            cursor=cursor
+        )
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    agregar_encabezados_paginacion(response, pagina)
+    return pagina.items
 
 @router.get("/{evento_id}", response_model=EventoResponse)
 async def obtener_evento(
     evento_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener información de un evento específico
     """
-    evento = crud_evento.get_evento_by_id(db, evento_id=evento_id)
+    evento = await crud_evento.get_evento_by_id(db, evento_id=evento_id)
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -75,13 +88,13 @@ async def obtener_evento(
 async def actualizar_evento(
     evento_id: int,
     evento_data: EventoUpdate,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """
     Actualizar un evento (solo administradores)
     """
-    evento = crud_evento.update_evento(db, evento_id=evento_id, evento_data=evento_data)
+    evento = await crud_evento.update_evento(db, evento_id=evento_id, evento_data=evento_data)
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -92,13 +105,13 @@ async def actualizar_evento(
 @router.delete("/{evento_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def eliminar_evento(
     evento_id: int,
-    db: Session = Depends(get_db),
-    current_admin: User = Depends(get_current_admin_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_admin: Principal = Depends(get_current_admin_user)
 ):
     """
     Eliminar un evento (solo administradores)
     """
-    evento = crud_evento.delete_evento(db, evento_id=evento_id)
+    evento = await crud_evento.delete_evento(db, evento_id=evento_id)
     if not evento:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -109,15 +122,15 @@ async def eliminar_evento(
 @router.post("/{evento_id}/inscribir", response_model=EventoResponse)
 async def inscribirse_a_evento(
     evento_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Inscribirse a un evento
     
     Cualquier usuario autenticado puede inscribirse
     """
-    evento = crud_evento.inscribir_usuario(
+    evento = await crud_evento.inscribir_usuario(
         db, 
         evento_id=evento_id, 
         user_id=current_user.id
@@ -132,13 +145,13 @@ async def inscribirse_a_evento(
 @router.delete("/{evento_id}/desinscribir", response_model=EventoResponse)
 async def desinscribirse_de_evento(
     evento_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Desinscribirse de un evento
     """
-    evento = crud_evento.desinscribir_usuario(
+    evento = await crud_evento.desinscribir_usuario(
         db, 
         evento_id=evento_id, 
         user_id=current_user.id
@@ -152,11 +165,11 @@ async def desinscribirse_de_evento(
 
 @router.get("/mis-eventos/inscritos", response_model=List[EventoResponse])
 async def mis_eventos_inscritos(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener eventos en los que el usuario está inscrito
     """
-    eventos = crud_evento.get_eventos_usuario(db, user_id=current_user.id)
+    eventos = await crud_evento.get_eventos_usuario(db, user_id=current_user.id)
     return eventos
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, Response, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
-from app.core.database import get_db
+from app.core import exportacion_arrow
+from app.core.database import SessionLocal, get_db
 from app.core.security import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.core.cache_principales import Principal
 from app.schemas.observacion import (
     ObservacionCreate,
     ObservacionUpdate,
@@ -13,6 +15,8 @@ from app.schemas.observacion import (
     ObservacionResponse
 )
 from app.crud import observacion as crud_observacion
+from app.crud.paginacion import CursorInvalido
+from app.api.deps import agregar_encabezados_paginacion
 import shutil
 import os
 from pathlib import Path
@@ -28,7 +32,7 @@ def crear_observacion(
     *,
     db: Session = Depends(get_db),
     observacion_in: ObservacionCreate,
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Crear una nueva observación de cangrejo azul.
@@ -43,37 +47,50 @@ def crear_observacion(
 
 @router.get("/", response_model=List[ObservacionResponse])
 def listar_observaciones(
+    response: Response,
     db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    skip: int = Query(0, ge=0, description="Número de registros a omitir (preferir cursor)"),
     limit: int = Query(100, ge=1, le=100, description="Límite de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
     user_id: Optional[int] = Query(None, description="Filtrar por ID de usuario"),
     fecha_inicio: Optional[date] = Query(None, description="Filtrar desde esta fecha"),
     fecha_fin: Optional[date] = Query(None, description="Filtrar hasta esta fecha"),
     comunidad: Optional[str] = Query(None, description="Filtrar por comunidad"),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Listar observaciones con filtros opcionales.
     Usuarios normales solo ven sus propias observaciones.
     Administradores pueden ver todas las observaciones.
+    
+    Ordenadas de la más reciente a la más antigua. La respuesta incluye los
+    encabezados `X-Next-Cursor` y `X-Has-More` para pedir la página siguiente.
     """
     # Si el usuario no es admin, solo puede ver sus propias observaciones
     if current_user.permiso.value != "admin":
         user_id = current_user.id
     
-    observaciones = crud_observacion.obtener_observaciones(
-        db=db,
-        skip=skip,
-        limit=limit,
-        user_id=user_id,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        comunidad=comunidad
-    )
+    try:
+        pagina = crud_observacion.obtener_observaciones(
+            db=db,
+            skip=skip,
+            limit=limit,
+            user_id=user_id,
+            fecha_inicio=fecha_inicio,
+            fecha_fin=fecha_fin,
+            comunidad=comunidad,
+            cursor=cursor
+        )
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    agregar_encabezados_paginacion(response, pagina)
     
     # Agregar información del usuario a la respuesta
     observaciones_response = []
-    for obs in observaciones:
+    for obs in pagina.items:
         obs_dict = ObservacionResponse.model_validate(obs)
         obs_dict.usuario_email = obs.usuario.email if obs.usuario else None
         obs_dict.usuario_nombre = obs.usuario.full_name if obs.usuario else None
@@ -83,26 +100,37 @@ def listar_observaciones(
 
 @router.get("/mis-observaciones", response_model=List[ObservacionInDB])
 def obtener_mis_observaciones(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener todas las observaciones del usuario autenticado.
+    Paginación por cursor con los encabezados `X-Next-Cursor` y `X-Has-More`.
     """
-    observaciones = crud_observacion.obtener_observaciones_usuario(
-        db=db,
-        user_id=current_user.id,
-        skip=skip,
-        limit=limit
-    )
-    return observaciones
+    try:
+        pagina = crud_observacion.obtener_observaciones_usuario(
+            db=db,
+            user_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor
+        )
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    agregar_encabezados_paginacion(response, pagina)
+    return pagina.items
 
 @router.get("/estadisticas")
 def obtener_estadisticas(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener estadísticas de observaciones del usuario.
@@ -120,7 +148,7 @@ def obtener_estadisticas(
 @router.get("/estadisticas/global")
 def obtener_estadisticas_globales(
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener estadísticas globales (solo administradores).
@@ -137,11 +165,61 @@ def obtener_estadisticas_globales(
         "total_observaciones": total_observaciones
     }
 
+@router.get("/export")
+def exportar_observaciones(
+    formato: str = Query("parquet", pattern="^(arrow|parquet)$", description="arrow (IPC stream) o parquet"),
+    user_id: Optional[int] = Query(None, description="Filtrar por ID de usuario"),
+    fecha_inicio: Optional[date] = Query(None, description="Filtrar desde esta fecha"),
+    fecha_fin: Optional[date] = Query(None, description="Filtrar hasta esta fecha"),
+    comunidad: Optional[str] = Query(None, description="Filtrar por comunidad"),
+    current_user: Principal = Depends(get_current_active_user)
+):
+    """
+    Exportar observaciones en formato columnar (Arrow IPC o Parquet).
+    Usuarios normales solo exportan sus propias observaciones.
+    
+    El archivo se genera y envía por lotes de filas; requiere pyarrow.
+    """
+    if not exportacion_arrow.disponible():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="La exportación Arrow/Parquet requiere el paquete pyarrow"
+        )
+    
+    if current_user.permiso.value != "admin":
+        user_id = current_user.id
+    
+    def generar():
+        # Sesión propia: el flujo continúa después de que el endpoint retorna
+        db = SessionLocal()
+        try:
+            filas = crud_observacion.iterar_exportacion(
+                db=db,
+                user_id=user_id,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                comunidad=comunidad
+            )
+            yield from exportacion_arrow.serializar(
+                formato,
+                filas,
+                crud_observacion.COLUMNAS_EXPORTACION,
+                crud_observacion.COLUMNAS_DICCIONARIO
+            )
+        finally:
+            db.close()
+    
+    return StreamingResponse(
+        generar(),
+        media_type=exportacion_arrow.MEDIA_TYPES[formato],
+        headers={"Content-Disposition": f'attachment; filename="observaciones.{formato}"'}
+    )
+
 @router.get("/{observacion_id}", response_model=ObservacionResponse)
 def obtener_observacion(
     observacion_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener una observación específica por ID.
@@ -172,7 +250,7 @@ def actualizar_observacion(
     observacion_id: int,
     observacion_update: ObservacionUpdate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Actualizar una observación existente.
@@ -194,11 +272,11 @@ def actualizar_observacion(
     return observacion
 
 @router.post("/{observacion_id}/foto", response_model=ObservacionInDB)
-async def subir_foto_observacion(
+def subir_foto_observacion(
     observacion_id: int,
     foto: UploadFile = File(...),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Subir una foto o video para una observación existente.
@@ -258,7 +336,7 @@ async def subir_foto_observacion(
 def eliminar_observacion(
     observacion_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Eliminar una observación.
@@ -1,36 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Request, Response, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import date
-import json
+import os
+import shutil
+import tempfile
 
-from app.core.database import get_db
+from app.core import exportacion, exportacion_arrow, formato_mapa
+from app.core.autocompletado import indice_autocompletado
+from app.core.cache_respuestas import responder_con_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, get_db
+from app.core.import_jobs import gestor_importaciones, ColaImportacionLlena
+from app.core.json_stream import iterar_array_json
 from app.core.security import get_current_active_user, get_current_admin_user
-from app.models.user import User
+from app.core.cache_principales import Principal
 from app.schemas.observacion_naturalista import (
-    ObservacionNaturalistaCreate,
-    ObservacionNaturalistaInDB,
     ObservacionNaturalistaResponse,
-    ObservacionNaturalistaImport,
-    ImportResult,
+    TrabajoImportacionResponse,
     EstadisticasNaturalista
 )
 from app.crud import observacion_naturalista as crud_obs_nat
+from app.crud.paginacion import CursorInvalido
+from app.api.deps import agregar_encabezados_paginacion
 
 router = APIRouter()
 
 
-@router.post("/importar", response_model=ImportResult, status_code=status.HTTP_201_CREATED)
-async def importar_observaciones(
+@router.post("/importar", response_model=TrabajoImportacionResponse, status_code=status.HTTP_202_ACCEPTED)
+def importar_observaciones(
     archivo: UploadFile = File(..., description="Archivo JSON con observaciones de CONABIO"),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Importar observaciones desde un archivo JSON de CONABIO/iNaturalist.
     Solo administradores pueden importar datos.
     
     El archivo debe ser un JSON con el formato del SNIB de CONABIO.
+    La importación se ejecuta en segundo plano: se retorna de inmediato el
+    trabajo creado, cuyo avance se consulta en `/importar/jobs/{trabajo_id}`.
     """
     if not archivo.filename.endswith('.json'):
         raise HTTPException(
@@ -39,156 +48,440 @@ async def importar_observaciones(
         )
     
     try:
-        contenido = await archivo.read()
-        datos = json.loads(contenido.decode('utf-8'))
-    except json.JSONDecodeError as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Error al parsear JSON: {str(e)}"
-        )
-    except Exception as e:
+        archivo.file.seek(0)
+        iterar_array_json(archivo.file)
+    except UnicodeDecodeError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Error al leer archivo: {str(e)}"
         )
-    
-    if not isinstance(datos, list):
+    except ValueError:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="El JSON debe contener una lista de observaciones"
         )
     
-    # Convertir y validar cada observación
-    observaciones_crear = []
-    errores_validacion = []
+    # El archivo subido se cierra al terminar la petición: copiarlo para el worker
+    archivo.file.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="importacion_", suffix=".json", delete=False) as copia:
+        shutil.copyfileobj(archivo.file, copia)
+    
+    def leer_copia():
+        with open(copia.name, "rb") as f:
+            yield from iterar_array_json(f)
     
-    for i, item in enumerate(datos):
+    def borrar_copia():
         try:
-            obs_import = ObservacionNaturalistaImport(**item)
-            obs_create = obs_import.to_create_schema()
-            observaciones_crear.append(obs_create)
-        except Exception as e:
-            errores_validacion.append(f"Registro {i}: {str(e)}")
-    
-    # Insertar en la base de datos
-    resultado = crud_obs_nat.crear_observaciones_bulk(db, observaciones_crear)
-    
-    return ImportResult(
-        total_procesados=len(datos),
-        insertados=resultado["insertados"],
-        duplicados=resultado["duplicados"],
-        errores=resultado["errores"] + len(errores_validacion),
-        mensajes_error=errores_validacion + resultado["mensajes_error"]
-    )
+            os.remove(copia.name)
+        except OSError:
+            pass
+    
+    try:
+        return gestor_importaciones.enviar(leer_copia, al_terminar=borrar_copia)
+    except ColaImportacionLlena:
+        borrar_copia()
+        raise _cola_llena()
 
 
-@router.post("/importar-json", response_model=ImportResult, status_code=status.HTTP_201_CREATED)
+@router.post("/importar-json", response_model=TrabajoImportacionResponse, status_code=status.HTTP_202_ACCEPTED)
 def importar_observaciones_json(
-    observaciones: List[ObservacionNaturalistaImport],
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    observaciones: List[Dict[str, Any]] = Body(..., description="Lista de observaciones con el formato del SNIB de CONABIO"),
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Importar observaciones enviando directamente el JSON en el body.
     Solo administradores pueden importar datos.
+    
+    La importación se ejecuta en segundo plano, igual que `/importar`.
+    Cada registro se valida una sola vez dentro del trabajo, por lotes;
+    los registros inválidos se reportan en `mensajes_error` del trabajo.
+    """
+    try:
+        return gestor_importaciones.enviar(lambda: observaciones)
+    except ColaImportacionLlena:
+        raise _cola_llena()
+
+
+@router.get("/importar/jobs", response_model=List[TrabajoImportacionResponse])
+def listar_trabajos_importacion(
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Listar los trabajos de importación recientes.
+    Solo administradores.
+    """
+    return gestor_importaciones.listar()
+
+
+@router.get("/importar/jobs/{trabajo_id}", response_model=TrabajoImportacionResponse)
+def obtener_trabajo_importacion(
+    trabajo_id: str,
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Consultar el avance de un trabajo de importación: registros procesados,
+    insertados, duplicados, errores y registros por segundo.
+    Solo administradores.
+    """
+    trabajo = gestor_importaciones.obtener(trabajo_id)
+    
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo de importación no encontrado"
+        )
+    
+    return trabajo
+
+
+@router.delete("/importar/jobs/{trabajo_id}", response_model=TrabajoImportacionResponse)
+def cancelar_trabajo_importacion(
+    trabajo_id: str,
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Cancelar un trabajo de importación.
+    El trabajo se detiene después del lote en curso; lo ya insertado se conserva.
+    Solo administradores.
     """
-    observaciones_crear = []
-    errores_validacion = []
+    trabajo = gestor_importaciones.cancelar(trabajo_id)
     
-    for i, obs in enumerate(observaciones):
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo de importación no encontrado"
+        )
+    
+    return trabajo
+
+
+def _cola_llena() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Hay demasiadas importaciones en curso, intente más tarde",
+        headers={"Retry-After": "30"}
+    )
+
+
+def area_visible(
+    bbox: Optional[str] = Query(None, description="Área: min_lon,min_lat,max_lon,max_lat"),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitud mínima"),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitud máxima"),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitud mínima"),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitud máxima")
+) -> Optional[Tuple[float, float, float, float]]:
+    """
+    Rectángulo de búsqueda `(min_lon, min_lat, max_lon, max_lat)`, o None.
+    
+    Se indica con `bbox` o con los límites por separado; los límites omitidos
+    no restringen esa dirección.
+    """
+    if bbox:
         try:
-            obs_create = obs.to_create_schema()
-            observaciones_crear.append(obs_create)
-        except Exception as e:
-            errores_validacion.append(f"Registro {i}: {str(e)}")
-    
-    resultado = crud_obs_nat.crear_observaciones_bulk(db, observaciones_crear)
-    
-    return ImportResult(
-        total_procesados=len(observaciones),
-        insertados=resultado["insertados"],
-        duplicados=resultado["duplicados"],
-        errores=resultado["errores"] + len(errores_validacion),
-        mensajes_error=errores_validacion + resultado["mensajes_error"]
+            min_lon, min_lat, max_lon, max_lat = (float(valor) for valor in bbox.split(","))
+        except ValueError:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="bbox debe tener el formato min_lon,min_lat,max_lon,max_lat"
+            )
+    elif min_lat is None and max_lat is None and min_lon is None and max_lon is None:
+        return None
+    
+    limites = (
+        -180.0 if min_lon is None else min_lon,
+        -90.0 if min_lat is None else min_lat,
+        180.0 if max_lon is None else max_lon,
+        90.0 if max_lat is None else max_lat
     )
+    if not (-180 <= limites[0] <= limites[2] <= 180 and -90 <= limites[1] <= limites[3] <= 90):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Área fuera de rango o con mínimos mayores que los máximos"
+        )
+    return limites
 
 
 @router.get("/", response_model=List[ObservacionNaturalistaResponse])
 def listar_observaciones(
+    request: Request,
     db: Session = Depends(get_db),
-    skip: int = Query(0, ge=0, description="Número de registros a omitir"),
+    skip: int = Query(0, ge=0, description="Número de registros a omitir (preferir cursor)"),
     limit: int = Query(100, ge=1, le=500, description="Límite de registros a retornar"),
+    cursor: Optional[str] = Query(None, description="Cursor de la página siguiente (encabezado X-Next-Cursor)"),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     municipio: Optional[str] = Query(None, description="Filtrar por municipio"),
     fecha_inicio: Optional[date] = Query(None, description="Filtrar desde esta fecha"),
     fecha_fin: Optional[date] = Query(None, description="Filtrar hasta esta fecha"),
-    especie: Optional[str] = Query(None, description="Filtrar por especie")
+    especie: Optional[str] = Query(None, description="Filtrar por especie"),
+    area: Optional[Tuple[float, float, float, float]] = Depends(area_visible)
 ):
     """
     Listar observaciones de Naturalista con filtros opcionales.
     Este endpoint es público (no requiere autenticación).
+    
+    La respuesta incluye los encabezados `X-Next-Cursor` y `X-Has-More`.
+    Para la página siguiente se envía `cursor` con los mismos filtros;
+    a diferencia de `skip`, su costo no crece con la profundidad de la página.
+    
+    `min_lat`/`max_lat`/`min_lon`/`max_lon` (o `bbox`) limitan el resultado
+    al área visible de un mapa.
+    
+    La respuesta se guarda en caché hasta la siguiente importación o
+    eliminación e incluye `ETag`; con `If-None-Match` se responde 304.
     """
-    observaciones = crud_obs_nat.obtener_observaciones(
-        db=db,
-        skip=skip,
-        limit=limit,
-        estado=estado,
-        municipio=municipio,
-        fecha_inicio=fecha_inicio,
-        fecha_fin=fecha_fin,
-        especie=especie
-    )
-    return observaciones
+    def generar(response: Response):
+        try:
+            pagina = crud_obs_nat.obtener_observaciones(
+                db=db,
+                skip=skip,
+                limit=limit,
+                estado=estado,
+                municipio=municipio,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                especie=especie,
+                cursor=cursor,
+                bbox=area
+            )
+        except CursorInvalido as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        agregar_encabezados_paginacion(response, pagina)
+        return [ObservacionNaturalistaResponse.model_validate(obs) for obs in pagina.items]
+    
+    return responder_con_cache(request, generar)
 
 
 @router.get("/estadisticas", response_model=EstadisticasNaturalista)
 def obtener_estadisticas(
+    request: Request,
     db: Session = Depends(get_db)
 ):
     """
     Obtener estadísticas agregadas de las observaciones de Naturalista.
-    Este endpoint es público.
+    Este endpoint es público y su respuesta se guarda en caché (ETag).
     """
-    estadisticas = crud_obs_nat.obtener_estadisticas(db=db)
-    return EstadisticasNaturalista(**estadisticas)
+    return responder_con_cache(
+        request,
+        lambda response: EstadisticasNaturalista(**crud_obs_nat.obtener_estadisticas(db=db))
+    )
 
 
 @router.get("/mapa")
 def obtener_datos_mapa(
+    request: Request,
     db: Session = Depends(get_db),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     municipio: Optional[str] = Query(None, description="Filtrar por municipio"),
-    limit: int = Query(1000, ge=1, le=5000, description="Límite de puntos")
+    limit: int = Query(1000, ge=1, le=5000, description="Límite de puntos o clusters"),
+    zoom: Optional[int] = Query(None, ge=0, le=22, description="Zoom del mapa; activa la agrupación en clusters"),
+    formato: Optional[str] = Query(None, pattern="^(json|binario|polyline)$", description="json, binario o polyline"),
+    area: Optional[Tuple[float, float, float, float]] = Depends(area_visible)
 ):
     """
     Obtener coordenadas para visualización en mapa.
     Retorna latitud, longitud y datos básicos de cada observación.
+    Este endpoint es público y su respuesta se guarda en caché (ETag).
+    
+    Si se indica `zoom`, las observaciones se agrupan en celdas de una
+    cuadrícula acorde al zoom y se retorna un cluster por celda (`total` y
+    centroide); a partir del zoom MAPA_ZOOM_PUNTOS se retornan los puntos
+    individuales. `min_lat`/`max_lat`/`min_lon`/`max_lon` (o `bbox`) limitan
+    el resultado al área visible.
+    
+    Los puntos se pueden pedir en un formato compacto con `formato=binario`
+    (o `Accept: application/octet-stream`) o `formato=polyline`; ver
+    app/core/formato_mapa.py. Los clusters siempre se retornan en JSON.
+    """
+    puntos = zoom is None or zoom >= settings.MAPA_ZOOM_PUNTOS
+    if formato is None:
+        formato = formato_mapa.formato_por_accept(request.headers.get("accept")) if puntos else formato_mapa.FORMATO_JSON
+    
+    if formato != formato_mapa.FORMATO_JSON and not puntos:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El formato {formato} solo aplica a puntos (sin zoom o con zoom >= {settings.MAPA_ZOOM_PUNTOS})"
+        )
+    
+    if formato == formato_mapa.FORMATO_JSON:
+        def generar(response: Response):
+            response.headers["Vary"] = "Accept"
+            if zoom is None:
+                return crud_obs_nat.obtener_coordenadas_mapa(
+                    db=db,
+                    estado=estado,
+                    municipio=municipio,
+                    limit=limit,
+                    bbox=area
+                )
+            return crud_obs_nat.obtener_clusters_mapa(
+                db=db,
+                zoom=zoom,
+                bbox=area,
+                estado=estado,
+                municipio=municipio,
+                limit=limit
+            )
+        
+        return responder_con_cache(request, generar, variante=formato)
+    
+    def generar_compacto(response: Response):
+        response.headers["Vary"] = "Accept"
+        compactos = crud_obs_nat.obtener_puntos_compactos(
+            db=db,
+            estado=estado,
+            municipio=municipio,
+            limit=limit,
+            bbox=area
+        )
+        if formato == formato_mapa.FORMATO_BINARIO:
+            return formato_mapa.empaquetar_binario(compactos)
+        return formato_mapa.codificar_polyline(compactos)
+    
+    return responder_con_cache(
+        request,
+        generar_compacto,
+        variante=formato,
+        media_type=formato_mapa.MEDIA_TYPE_BINARIO
+    )
+
+
+@router.get("/export")
+def exportar_observaciones(
+    formato: str = Query(
+        "ndjson",
+        pattern="^(geojson|ndjson|csv|arrow|parquet)$",
+        description="geojson, ndjson, csv, arrow (IPC stream) o parquet"
+    ),
+    estado: Optional[str] = Query(None, description="Filtrar por estado"),
+    municipio: Optional[str] = Query(None, description="Filtrar por municipio"),
+    fecha_inicio: Optional[date] = Query(None, description="Filtrar desde esta fecha"),
+    fecha_fin: Optional[date] = Query(None, description="Filtrar hasta esta fecha"),
+    especie: Optional[str] = Query(None, description="Filtrar por especie"),
+    area: Optional[Tuple[float, float, float, float]] = Depends(area_visible)
+):
+    """
+    Exportar todas las observaciones que cumplan los filtros del listado.
     Este endpoint es público.
+    
+    Las filas se leen con un cursor del lado del servidor y se envían
+    conforme se serializan, por lo que la memoria usada no depende del
+    tamaño de la tabla. `arrow` y `parquet` requieren pyarrow en el servidor;
+    las columnas de baja cardinalidad se escriben con codificación de
+    diccionario.
     """
-    return crud_obs_nat.obtener_coordenadas_mapa(
+    columnar = formato in exportacion_arrow.MEDIA_TYPES
+    if columnar and not exportacion_arrow.disponible():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="La exportación Arrow/Parquet requiere el paquete pyarrow"
+        )
+    
+    def generar():
+        # Sesión propia: el flujo continúa después de que el endpoint retorna
+        db = SessionLocal()
+        try:
+            filas = crud_obs_nat.iterar_exportacion(
+                db=db,
+                estado=estado,
+                municipio=municipio,
+                fecha_inicio=fecha_inicio,
+                fecha_fin=fecha_fin,
+                especie=especie,
+                bbox=area
+            )
+            if columnar:
+                yield from exportacion_arrow.serializar(
+                    formato,
+                    filas,
+                    crud_obs_nat.COLUMNAS_EXPORTACION,
+                    crud_obs_nat.COLUMNAS_DICCIONARIO
+                )
+            else:
+                yield from exportacion.serializar(
+                    formato,
+                    filas,
+                    [columna.key for columna in crud_obs_nat.COLUMNAS_EXPORTACION]
+                )
+        finally:
+            db.close()
+    
+    media_types = exportacion_arrow.MEDIA_TYPES if columnar else exportacion.MEDIA_TYPES
+    return StreamingResponse(
+        generar(),
+        media_type=media_types[formato],
+        headers={"Content-Disposition": f'attachment; filename="observaciones_naturalista.{formato}"'}
+    )
+
+
+@router.get("/cercanas")
+def obtener_cercanas(
+    db: Session = Depends(get_db),
+    lat: float = Query(..., ge=-90, le=90, description="Latitud del punto"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitud del punto"),
+    radio_km: Optional[float] = Query(None, gt=0, le=500, description="Radio máximo de búsqueda en km"),
+    k: int = Query(10, ge=1, le=100, description="Número máximo de observaciones")
+):
+    """
+    Obtener las observaciones más cercanas a un punto, ordenadas por distancia.
+    Retorna los datos del mapa de cada observación más `distancia_km`.
+    Este endpoint es público.
+    """
+    return crud_obs_nat.obtener_cercanas(
         db=db,
-        estado=estado,
-        municipio=municipio,
-        limit=limit
+        latitud=lat,
+        longitud=lon,
+        k=k,
+        radio_km=radio_km
     )
 
 
+@router.get("/autocompletar")
+def autocompletar(
+    db: Session = Depends(get_db),
+    campo: str = Query(..., pattern="^(municipio|localidad|especie)$", description="municipio, localidad o especie"),
+    q: str = Query(..., min_length=1, max_length=100, description="Texto escrito por el usuario"),
+    limit: int = Query(10, ge=1, le=50, description="Número máximo de sugerencias")
+):
+    """
+    Sugerencias para cajas de búsqueda: valores del campo con alguna palabra
+    que empieza con `q` (sin distinguir acentos ni mayúsculas), con su número
+    de observaciones. Este endpoint es público.
+    
+    Se responde desde un índice en memoria; la base de datos solo se consulta
+    para reconstruirlo cuando cambian las observaciones.
+    """
+    return {
+        "campo": campo,
+        "q": q,
+        "resultados": indice_autocompletado.buscar(db, campo, q, limite=limit)
+    }
+
+
 @router.get("/total")
 def obtener_total(
+    request: Request,
     db: Session = Depends(get_db),
     estado: Optional[str] = Query(None, description="Filtrar por estado"),
     municipio: Optional[str] = Query(None, description="Filtrar por municipio")
 ):
     """
     Obtener el total de observaciones con filtros opcionales.
-    Este endpoint es público.
+    Este endpoint es público y su respuesta se guarda en caché (ETag).
     """
-    total = crud_obs_nat.contar_observaciones(
-        db=db,
-        estado=estado,
-        municipio=municipio
+    return responder_con_cache(
+        request,
+        lambda response: {
+            "total": crud_obs_nat.contar_observaciones(
+                db=db,
+                estado=estado,
+                municipio=municipio
+            )
+        }
     )
-    return {"total": total}
 
 
 @router.get("/{observacion_id}", response_model=ObservacionNaturalistaResponse)
@@ -235,7 +528,7 @@ def obtener_por_id_ejemplar(
 def eliminar_observacion(
     observacion_id: int,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Eliminar una observación por ID.
@@ -256,7 +549,7 @@ def eliminar_observacion(
 def eliminar_todas_observaciones(
     confirmar: bool = Query(..., description="Debe ser True para confirmar eliminación"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_admin_user)
+    current_user: Principal = Depends(get_current_admin_user)
 ):
     """
     Eliminar TODAS las observaciones de Naturalista.
@@ -1,43 +1,146 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.core.database import get_db
-from app.core.security import get_current_active_user
-from app.crud import user as crud_user
-from app.schemas import UserResponse
-from app.models.user import User
+import csv
+import io
+from typing import List, Optional
+from fastapi import APIRouter, Depends, File, HTTPException, Response, UploadFile, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.pool_hash import ColaHashLlena, pool_hash
+from app.core.security import get_current_active_user, get_current_admin_user
+from app.crud.asincrono import user as crud_user
+from app.crud.paginacion import CursorInvalido
+from app.crud.user import UsuarioDuplicado
+from app.api.deps import agregar_encabezados_paginacion
+from app.schemas import AltaMasivaResponse, UserCreate, UserResponse
+from app.core.cache_principales import Principal
 
 router = APIRouter()
 
 @router.get("/", response_model=List[UserResponse])
 async def get_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener lista de usuarios (requiere autenticación)
     
     - **skip**: Número de registros a omitir (paginación)
     - **limit**: Número máximo de registros a devolver
+    - **cursor**: Cursor de la página siguiente, tomado del encabezado `X-Next-Cursor`
     """
-    users = crud_user.get_users(db, skip=skip, limit=limit)
-    return users
+    try:
+        pagina = await crud_user.get_users(db, skip=skip, limit=limit, cursor=cursor)
+    except CursorInvalido as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    agregar_encabezados_paginacion(response, pagina)
+    return pagina.items
+
+@router.post("/bulk", response_model=AltaMasivaResponse, status_code=status.HTTP_201_CREATED)
+async def crear_usuarios_csv(
+    archivo: UploadFile = File(..., description="CSV con columnas email, username, password y opcionalmente full_name y permiso"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Alta masiva de usuarios desde un CSV (requiere permisos de administrador)
+    
+    Las filas inválidas se reportan en `errores`; los usuarios cuyo email o
+    username ya existen se omiten y se listan en `duplicados`. Los demás se
+    insertan juntos, con las contraseñas hasheadas en paralelo.
+    """
+    if not archivo.filename.endswith('.csv'):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El archivo debe ser formato CSV"
+        )
+    
+    try:
+        texto = (await archivo.read()).decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Error al leer archivo: {str(e)}"
+        )
+    
+    lector = csv.DictReader(io.StringIO(texto))
+    if not {"email", "username", "password"} <= set(lector.fieldnames or []):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="El CSV debe tener las columnas email, username y password"
+        )
+    
+    usuarios, errores = [], []
+    for linea, fila in enumerate(lector, start=2):
+        if len(usuarios) + len(errores) >= settings.USER_BULK_MAX_ROWS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"El CSV no puede tener más de {settings.USER_BULK_MAX_ROWS} usuarios"
+            )
+        datos = {campo: valor.strip() for campo, valor in fila.items() if campo and valor and valor.strip()}
+        if not datos:
+            continue
+        try:
+            usuarios.append(UserCreate(**datos))
+        except ValidationError as e:
+            mensajes = [f"{'.'.join(str(p) for p in error['loc'])}: {error['msg']}" for error in e.errors()]
+            errores.append(f"Línea {linea}: {'; '.join(mensajes)}")
+    
+    try:
+        resultado = await crud_user.create_users_bulk(db, usuarios)
+    except ColaHashLlena:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Hay otra alta masiva en curso, intente de nuevo en unos segundos",
+            headers={"Retry-After": str(pool_hash.espera_estimada())}
+        )
+    except UsuarioDuplicado:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Otro registro creó alguno de estos usuarios al mismo tiempo, intente de nuevo"
+        )
+    return {**resultado, "errores": errores}
 
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_active_user)
 ):
     """
     Obtener información de un usuario específico por ID
     """
-    user = crud_user.get_user_by_id(db, user_id=user_id)
+    user = await crud_user.get_user_by_id(db, user_id=user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Usuario no encontrado"
         )
     return user
+
+@router.post("/{user_id}/revocar-tokens", status_code=status.HTTP_204_NO_CONTENT)
+async def revocar_tokens(
+    user_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_admin_user)
+):
+    """
+    Invalidar todos los tokens emitidos al usuario (requiere permisos de administrador)
+    
+    El usuario debe iniciar sesión de nuevo. En otros workers del servidor la
+    revocación aplica al vencer PRINCIPAL_CACHE_TTL.
+    """
+    user = await crud_user.revocar_tokens(db, user_id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
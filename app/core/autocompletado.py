@@ -0,0 +1,179 @@
+"""
+Índice en memoria para autocompletar municipio, localidad y especie.
+
+Por cada campo se guardan los valores distintos de observaciones_naturalista
+con su número de observaciones. Los valores que solo difieren en acentos o
+mayúsculas ("BOCA DEL RIO" y "Boca del Río") se agrupan en una entrada, que
+se muestra con la variante más frecuente. De cada campo se indexan solo los
+AUTOCOMPLETAR_MAX_VALORES valores con más observaciones: `localidad` es texto
+libre casi único por registro y no cabría completo.
+
+La búsqueda es por prefijo de palabra sin acentos: "rio" encuentra "BOCA DEL
+RÍO". Se guarda una entrada por palabra de cada valor en un arreglo ordenado
+y las coincidencias se ubican con `bisect`; un texto de varias palabras
+("boca del r") se busca por su primera palabra y se confirma contra el valor.
+
+Cuando cambia la versión de los datos (ver app.core.cache_respuestas) o vence
+AUTOCOMPLETAR_TTL, el índice se reconstruye en un hilo aparte con su propia
+sesión y se reemplaza de una vez; mientras tanto las búsquedas usan el
+anterior. Solo la primera búsqueda del proceso espera la construcción.
+"""
+import heapq
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, List, NamedTuple, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.cache_respuestas import version_datos
+from app.core.catalogos import normalizar
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+logger = logging.getLogger(__name__)
+
+CAMPOS = {
+    "municipio": ObservacionNaturalista.municipio,
+    "localidad": ObservacionNaturalista.localidad,
+    "especie": ObservacionNaturalista.especie_valida_busqueda,
+}
+
+# Coincidencias que se revisan por cada sugerencia pedida antes de ordenar
+FACTOR_CANDIDATOS = 20
+
+
+class _Valor(NamedTuple):
+    valor: str
+    total: int
+    normalizado: str
+
+
+class _Campo:
+    """Palabras de los valores de un campo, ordenadas, con la posición del valor"""
+    __slots__ = ("valores", "palabras", "posiciones")
+
+    def __init__(self, valores: List[_Valor]):
+        self.valores = valores
+        # A igual palabra, primero los valores con más observaciones
+        entradas = sorted(
+            (palabra, -valor.total, posicion)
+            for posicion, valor in enumerate(valores)
+            for palabra in set(valor.normalizado.split(" "))
+        )
+        self.palabras = [palabra for palabra, _, _ in entradas]
+        self.posiciones = [posicion for _, _, posicion in entradas]
+
+
+class _Indice(NamedTuple):
+    campos: Dict[str, _Campo]
+    version: int
+    cargado: float
+
+
+class IndiceAutocompletado:
+    """Índice de prefijos de palabra por campo, reconstruido al cambiar los datos"""
+
+    def __init__(self, ttl: int, max_valores: int):
+        self.ttl = ttl
+        self.max_valores = max_valores
+        self._indice: Optional[_Indice] = None
+        self._lock = threading.Lock()
+        self._reconstruyendo = False
+
+    def _vigente(self, indice: Optional[_Indice]) -> bool:
+        return (
+            indice is not None
+            and indice.version == version_datos.actual
+            and time.monotonic() - indice.cargado <= self.ttl
+        )
+
+    def cargar(self, db: Session) -> None:
+        """Construir el índice con los valores distintos de cada campo y reemplazar el actual"""
+        version = version_datos.actual
+        campos = {}
+        for nombre, columna in CAMPOS.items():
+            totales: Dict[str, int] = Counter()
+            variantes: Dict[str, Counter] = {}
+            for valor, total in db.query(columna, func.count()).filter(columna.isnot(None)).group_by(columna):
+                normalizado = normalizar(valor)
+                if not normalizado:
+                    continue
+                totales[normalizado] += total
+                variantes.setdefault(normalizado, Counter())[valor] += total
+            mas_frecuentes = heapq.nlargest(self.max_valores, totales.items(), key=lambda par: par[1])
+            campos[nombre] = _Campo([
+                _Valor(variantes[normalizado].most_common(1)[0][0], total, normalizado)
+                for normalizado, total in mas_frecuentes
+            ])
+
+        self._indice = _Indice(campos, version, time.monotonic())
+
+    def _reconstruir(self) -> None:
+        db = SessionLocal()
+        try:
+            self.cargar(db)
+        except Exception:
+            logger.exception("No se pudo reconstruir el índice de autocompletado")
+        finally:
+            db.close()
+            with self._lock:
+                self._reconstruyendo = False
+
+    def _indice_vigente(self, db: Session) -> _Indice:
+        indice = self._indice
+        if indice is None:
+            with self._lock:
+                # Primera búsqueda: una sola construcción aunque lleguen varias a la vez
+                if self._indice is None:
+                    self.cargar(db)
+            return self._indice
+        if not self._vigente(indice):
+            with self._lock:
+                if self._reconstruyendo:
+                    return indice
+                self._reconstruyendo = True
+            threading.Thread(target=self._reconstruir, name="autocompletado", daemon=True).start()
+        return indice
+
+    def buscar(self, db: Session, campo: str, texto: str, limite: int = 10) -> List[dict]:
+        """
+        Valores de `campo` con alguna palabra que empieza con `texto`, los que
+        empiezan con `texto` primero y después por número de observaciones.
+        """
+        indice = self._indice_vigente(db).campos[campo]
+
+        prefijo = normalizar(texto)
+        if not prefijo:
+            return []
+        primera = prefijo.split(" ", 1)[0]
+        varias_palabras = primera != prefijo
+        maximo = limite * FACTOR_CANDIDATOS
+
+        coincidencias = set()
+        inicio = bisect_left(indice.palabras, primera)
+        for posicion in range(inicio, len(indice.palabras)):
+            if not indice.palabras[posicion].startswith(primera) or len(coincidencias) >= maximo:
+                break
+            valor = indice.posiciones[posicion]
+            # Con varias palabras, el texto completo debe empezar en una palabra del valor
+            if varias_palabras and f" {prefijo}" not in f" {indice.valores[valor].normalizado}":
+                continue
+            coincidencias.add(valor)
+
+        mejores = heapq.nsmallest(
+            limite,
+            (indice.valores[posicion] for posicion in coincidencias),
+            key=lambda v: (not v.normalizado.startswith(prefijo), -v.total, v.normalizado)
+        )
+        return [{"valor": v.valor, "total": v.total} for v in mejores]
+
+
+indice_autocompletado = IndiceAutocompletado(
+    ttl=settings.AUTOCOMPLETAR_TTL,
+    max_valores=settings.AUTOCOMPLETAR_MAX_VALORES
+)
@@ -0,0 +1,138 @@
+"""
+Caché de tokens verificados y del estado de autorización de los usuarios.
+
+Los tokens de acceso llevan los claims `uid`, `permiso` y `ver` (versión de
+token del usuario), así que el principal se arma desde el propio token. Cada
+token ya verificado (firma HMAC y vencimiento) se guarda en un LRU hasta su
+`exp`: las peticiones siguientes con el mismo token no vuelven a verificar la
+firma.
+
+Para revocar, cada usuario tiene `token_version` en la tabla users y un
+token solo es válido si su `ver` coincide. La versión vigente y si el
+usuario está activo se guardan en memoria y se releen de la base de datos al
+vencer PRINCIPAL_CACHE_TTL, de modo que autorizar una petición normalmente
+no consulta MySQL. Al incrementar la versión (revocar tokens, cambiar el
+permiso o desactivar al usuario) este proceso actualiza su copia de
+inmediato; los demás workers lo ven al vencer el TTL.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Set
+
+from app.core.config import settings
+
+
+class Principal(NamedTuple):
+    """Datos del usuario autenticado que necesitan los endpoints"""
+    id: int
+    username: str
+    permiso: Any
+    is_active: bool
+
+
+class TokenVerificado(NamedTuple):
+    principal: Principal
+    version: int
+    # Claim exp (segundos desde la época)
+    vence: float
+
+
+class EstadoUsuario(NamedTuple):
+    version: int
+    activo: bool
+    leido: float
+
+
+class CacheTokens:
+    """LRU de tokens ya verificados, indexado también por usuario"""
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._entradas: "OrderedDict[str, TokenVerificado]" = OrderedDict()
+        self._por_usuario: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, token: str) -> Optional[TokenVerificado]:
+        with self._lock:
+            entrada = self._entradas.get(token)
+            if entrada is None:
+                return None
+            if time.time() >= entrada.vence:
+                self._quitar(token)
+                return None
+            self._entradas.move_to_end(token)
+            return entrada
+
+    def guardar(self, token: str, entrada: TokenVerificado) -> None:
+        with self._lock:
+            if token in self._entradas:
+                self._quitar(token)
+            self._entradas[token] = entrada
+            self._por_usuario.setdefault(entrada.principal.id, set()).add(token)
+            while len(self._entradas) > self.max_entradas:
+                self._quitar(next(iter(self._entradas)))
+
+    def invalidar(self, user_id: int) -> None:
+        """Quitar todos los tokens de un usuario"""
+        with self._lock:
+            for token in list(self._por_usuario.get(user_id, ())):
+                self._quitar(token)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._por_usuario.clear()
+
+    def _quitar(self, token: str) -> None:
+        entrada = self._entradas.pop(token)
+        tokens = self._por_usuario.get(entrada.principal.id)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._por_usuario[entrada.principal.id]
+
+
+class EstadoUsuarios:
+    """Versión de token y estado activo de cada usuario, con vencimiento"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._estados: Dict[int, EstadoUsuario] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, user_id: int) -> Optional[EstadoUsuario]:
+        estado = self._estados.get(user_id)
+        if estado is None or time.monotonic() - estado.leido > self.ttl:
+            return None
+        return estado
+
+    def guardar(self, user_id: int, version: int, activo: bool) -> EstadoUsuario:
+        estado = EstadoUsuario(version, activo, time.monotonic())
+        with self._lock:
+            self._estados[user_id] = estado
+        return estado
+
+    def quitar(self, user_id: int) -> None:
+        with self._lock:
+            self._estados.pop(user_id, None)
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._estados.clear()
+
+
+cache_tokens = CacheTokens(max_entradas=settings.PRINCIPAL_CACHE_MAX_ENTRIES)
+estado_usuarios = EstadoUsuarios(ttl=settings.PRINCIPAL_CACHE_TTL)
+
+
+def actualizar_usuario(user_id: int, version: int, activo: bool) -> None:
+    """Reflejar de inmediato un cambio de versión o de estado de un usuario"""
+    estado_usuarios.guardar(user_id, version, activo)
+    cache_tokens.invalidar(user_id)
+
+
+def olvidar_usuario(user_id: int) -> None:
+    """Un usuario eliminado: sus tokens dejan de ser válidos"""
+    estado_usuarios.quitar(user_id)
+    cache_tokens.invalidar(user_id)
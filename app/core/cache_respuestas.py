@@ -0,0 +1,167 @@
+"""
+Caché de respuestas de los endpoints públicos de Naturalista.
+
+Las respuestas se guardan ya serializadas, con la clave formada por la ruta y
+los parámetros de consulta. Cada entrada recuerda la versión del conjunto de
+datos con la que se generó; el CRUD incrementa esa versión al importar o
+eliminar observaciones, lo que invalida todas las entradas de una vez.
+
+La versión vive en memoria del proceso. Los cambios hechos fuera de él
+(el importador de línea de comandos, otro worker de uvicorn) se reflejan al
+vencer el TTL de las entradas.
+"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, NamedTuple, Optional
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.config import settings
+
+
+class VersionDatos:
+    """Contador de versión del conjunto de observaciones de Naturalista"""
+
+    def __init__(self):
+        self._valor = 0
+        self._lock = threading.Lock()
+
+    @property
+    def actual(self) -> int:
+        return self._valor
+
+    def incrementar(self) -> int:
+        with self._lock:
+            self._valor += 1
+            return self._valor
+
+
+class EntradaCache(NamedTuple):
+    version: int
+    creado: float
+    etag: str
+    cuerpo: bytes
+    media_type: str
+    encabezados: dict
+
+
+class CacheRespuestas:
+    """LRU de respuestas serializadas acotado por el total de bytes"""
+
+    def __init__(self, max_bytes: int, ttl: int):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entradas: "OrderedDict[Hashable, EntradaCache]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def bytes_usados(self) -> int:
+        return self._bytes
+
+    def obtener(self, clave: Hashable, version: int) -> Optional[EntradaCache]:
+        """Obtener una entrada vigente para `version`, o None"""
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                return None
+            if entrada.version != version or time.monotonic() - entrada.creado > self.ttl:
+                self._quitar(clave)
+                return None
+            self._entradas.move_to_end(clave)
+            return entrada
+
+    def guardar(self, clave: Hashable, entrada: EntradaCache) -> None:
+        """Guardar una entrada, desalojando las menos usadas si se excede el límite"""
+        tamano = len(entrada.cuerpo)
+        if tamano > self.max_bytes:
+            return
+        with self._lock:
+            if clave in self._entradas:
+                self._quitar(clave)
+            self._entradas[clave] = entrada
+            self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                self._quitar(next(iter(self._entradas)))
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+            self._bytes = 0
+
+    def _quitar(self, clave: Hashable) -> None:
+        entrada = self._entradas.pop(clave)
+        self._bytes -= len(entrada.cuerpo)
+
+
+version_datos = VersionDatos()
+cache_respuestas = CacheRespuestas(
+    max_bytes=settings.RESPONSE_CACHE_MAX_BYTES,
+    ttl=settings.RESPONSE_CACHE_TTL
+)
+
+
+def _coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (RFC 9110): se ignora el prefijo W/"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidato.strip().removeprefix("W/") == etag
+        for candidato in if_none_match.split(",")
+    )
+
+
+def responder_con_cache(
+    request: Request,
+    generar: Callable[[Response], Any],
+    variante: str = "",
+    media_type: str = "application/json"
+) -> Response:
+    """
+    Responder desde la caché o generar, serializar y guardar la respuesta.
+
+    `generar` recibe una respuesta temporal en la que puede fijar encabezados
+    (por ejemplo, los de paginación) y retorna el contenido a serializar como
+    JSON, o bytes que se envían tal cual con `media_type`. `variante` distingue
+    respuestas de la misma URL que dependen de encabezados (como Accept). Si
+    `If-None-Match` coincide con el ETag vigente se responde 304 sin llamar a
+    `generar`, es decir, sin consultar la base de datos.
+    """
+    clave = (request.url.path, tuple(sorted(request.query_params.multi_items())), variante)
+    version = version_datos.actual
+    entrada = cache_respuestas.obtener(clave, version)
+
+    if entrada is None:
+        temporal = Response()
+        contenido = generar(temporal)
+        if isinstance(contenido, bytes):
+            cuerpo = contenido
+        else:
+            cuerpo, media_type = JSONResponse(jsonable_encoder(contenido)).body, "application/json"
+        encabezados = {
+            nombre: valor for nombre, valor in temporal.headers.items()
+            if nombre not in ("content-length", "content-type")
+        }
+        entrada = EntradaCache(
+            version=version,
+            creado=time.monotonic(),
+            etag='"%s"' % hashlib.sha256(cuerpo).hexdigest()[:32],
+            cuerpo=cuerpo,
+            media_type=media_type,
+            encabezados=encabezados
+        )
+        cache_respuestas.guardar(clave, entrada)
+
+    encabezados = dict(entrada.encabezados, ETag=entrada.etag)
+    encabezados["Cache-Control"] = "public, no-cache"
+
+    if _coincide_etag(request.headers.get("if-none-match"), entrada.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=encabezados)
+
+    return Response(content=entrada.cuerpo, media_type=entrada.media_type, headers=encabezados)
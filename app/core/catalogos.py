@@ -0,0 +1,103 @@
+"""
+Catálogos de estados, municipios y especies de Naturalista en memoria.
+
+Los filtros de texto `estado`, `municipio` y `especie` conservan su
+semántica de coincidencia parcial sin distinguir mayúsculas, pero ya no se
+evalúan con `ILIKE '%x%'` sobre cada fila: el texto se normaliza (minúsculas,
+sin acentos) y se busca en los nombres de los catálogos, que caben en memoria
+(32 estados, unos 2,500 municipios). El resultado es la lista de claves con
+la que las consultas filtran por igualdad sobre columnas indexadas.
+
+La copia en memoria se recarga cuando cambia la versión de los datos (ver
+app.core.cache_respuestas) o vence CATALOGO_CACHE_TTL, que cubre los cambios
+hechos fuera del proceso.
+"""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.core.cache_respuestas import version_datos
+from app.core.config import settings
+from app.models.catalogo_naturalista import EspecieCatalogo, EstadoCatalogo, MunicipioCatalogo
+
+CATALOGO_ESTADOS = "estados"
+CATALOGO_MUNICIPIOS = "municipios"
+CATALOGO_ESPECIES = "especies"
+
+# Textos de filtro resueltos que se recuerdan
+MAX_RESUELTOS = 1024
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sin acentos y con los espacios colapsados"""
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    sin_acentos = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_acentos.lower().split())
+
+
+class CatalogosEnMemoria:
+    """Nombres normalizados de los catálogos y caché de filtros resueltos"""
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._version: Optional[int] = None
+        self._cargado = 0.0
+        self._nombres: Dict[str, List[Tuple[str, Any]]] = {}
+        self._resueltos: "OrderedDict[Tuple[str, str], List[Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _vigente(self) -> bool:
+        return (
+            self._version == version_datos.actual
+            and time.monotonic() - self._cargado <= self.ttl
+        )
+
+    def cargar(self, db: Session) -> None:
+        """Leer los tres catálogos de la base de datos"""
+        version = version_datos.actual
+        nombres = {
+            CATALOGO_ESTADOS: db.query(EstadoCatalogo.nombre_normalizado, EstadoCatalogo.entid).all(),
+            CATALOGO_MUNICIPIOS: db.query(MunicipioCatalogo.nombre_normalizado, MunicipioCatalogo.munid).all(),
+            CATALOGO_ESPECIES: db.query(
+                EspecieCatalogo.nombre_normalizado,
+                EspecieCatalogo.id_nombre_cat_valido
+            ).all(),
+        }
+        with self._lock:
+            self._nombres = {catalogo: [tuple(fila) for fila in filas] for catalogo, filas in nombres.items()}
+            self._resueltos.clear()
+            self._version = version
+            self._cargado = time.monotonic()
+
+    def invalidar(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def resolver(self, db: Session, catalogo: str, texto: str) -> List[Any]:
+        """
+        Claves del `catalogo` cuyo nombre contiene `texto` (sin acentos ni
+        mayúsculas). Una lista vacía significa que ningún registro coincide.
+        """
+        clave = (catalogo, normalizar(texto))
+        with self._lock:
+            vigente = self._vigente()
+            if vigente and clave in self._resueltos:
+                self._resueltos.move_to_end(clave)
+                return self._resueltos[clave]
+
+        if not vigente:
+            self.cargar(db)
+
+        with self._lock:
+            claves = [valor for nombre, valor in self._nombres[catalogo] if clave[1] in nombre]
+            self._resueltos[clave] = claves
+            if len(self._resueltos) > MAX_RESUELTOS:
+                self._resueltos.popitem(last=False)
+        return claves
+
+
+catalogos = CatalogosEnMemoria(ttl=settings.CATALOGO_CACHE_TTL)
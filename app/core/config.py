@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -8,11 +10,66 @@ class Settings(BaseSettings):
     
     # Base de datos
     DATABASE_URL: str
+    # URL para el motor asíncrono; por defecto, DATABASE_URL con el driver
+    # asíncrono equivalente (aiomysql, aiosqlite)
+    ASYNC_DATABASE_URL: Optional[str] = None
     
     # Seguridad
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Costo de bcrypt (2^rounds iteraciones); elegir con scripts/calibrar_bcrypt.py.
+    # Los hashes con otro costo se recalculan al iniciar sesión
+    BCRYPT_ROUNDS: int = 12
+    # Hilos para bcrypt (None = uno por CPU) y operaciones pendientes antes de responder 503
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    PASSWORD_HASH_QUEUE_SIZE: int = 32
+    # Procesos para los hashes de POST /users/bulk (None = uno por CPU) y filas por CSV,
+    # que también son los hashes que pueden esperar en ese pool
+    PASSWORD_HASH_PROCESSES: Optional[int] = None
+    USER_BULK_MAX_ROWS: int = 1000
+    # Intentos por IP (login y registro) y logins fallidos por username en la
+    # ventana, en segundos, antes de responder 429 (ver app.core.limitador)
+    AUTH_RATE_WINDOW: int = 60
+    AUTH_RATE_LIMIT_IP: int = 20
+    AUTH_RATE_LIMIT_USERNAME: int = 5
+    AUTH_RATE_MAX_KEYS: int = 100000
+    # Tokens ya verificados en memoria y segundos que se confía en la versión de
+    # token leída de cada usuario (ver app.core.cache_principales)
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10000
+    PRINCIPAL_CACHE_TTL: int = 60
+    # Vigencia de los refresh tokens y tamaño del filtro de revocaciones
+    # (ver app.core.revocacion)
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    REFRESH_REVOCATION_CAPACITY: int = 100000
+    REFRESH_REVOCATION_FP_RATE: float = 0.01
+    
+    # Importación de observaciones de Naturalista
+    NATURALISTA_IMPORT_CHUNK_SIZE: int = 1000
+    NATURALISTA_IMPORT_WORKERS: int = 2
+    NATURALISTA_IMPORT_QUEUE_SIZE: int = 4
+    # Procesos para validar lotes en paralelo (0 = validar en el mismo proceso)
+    NATURALISTA_IMPORT_PROCESSES: int = 0
+    
+    # Zoom del mapa a partir del cual /mapa devuelve puntos en lugar de clusters
+    MAPA_ZOOM_PUNTOS: int = 14
+    
+    # Caché de respuestas de los endpoints públicos de Naturalista
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+    # Segundos de vigencia; cubre cambios hechos fuera del proceso de la API
+    RESPONSE_CACHE_TTL: int = 300
+    # Segundos de vigencia de los catálogos en memoria (ver app.core.catalogos)
+    CATALOGO_CACHE_TTL: int = 300
+    # Segundos de vigencia del índice de /autocompletar (ver app.core.autocompletado)
+    AUTOCOMPLETAR_TTL: int = 300
+    # Valores con más observaciones que se indexan por campo
+    AUTOCOMPLETAR_MAX_VALORES: int = 20000
+    
+    # Monitor del event loop (ver app.core.monitor_loop), en segundos
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL: float = 0.1
+    # Bloqueo a partir del cual se registra la pila del loop en el log
+    LOOP_MONITOR_THRESHOLD: float = 0.2
     
     # CORS
     BACKEND_CORS_ORIGINS: list = ["*"]
@@ -1,4 +1,6 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
@@ -13,6 +15,30 @@ engine = create_engine(
 # Crear la sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Drivers asíncronos que corresponden a cada base de datos de DATABASE_URL
+DRIVERS_ASYNC = {
+    "mysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+def url_async(url: str) -> str:
+    """Misma URL de conexión con el driver asíncrono (mysql+pymysql -> mysql+aiomysql)"""
+    url = make_url(url)
+    drivername = DRIVERS_ASYNC.get(url.get_backend_name(), url.drivername)
+    return url.set(drivername=drivername).render_as_string(hide_password=False)
+
+# Motor y sesión asíncronos para los endpoints `async def`: las consultas se
+# esperan con await en lugar de bloquear el event loop
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL or url_async(settings.DATABASE_URL),
+    pool_pre_ping=True,
+    pool_recycle=3600
+)
+
+# expire_on_commit=False: después del commit los atributos siguen cargados y
+# se pueden serializar sin otra consulta (no hay carga perezosa en async)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False, autoflush=False)
+
 # Base para los modelos
 Base = declarative_base()
 
@@ -23,3 +49,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+# Dependencia para obtener una sesión asíncrona (endpoints `async def`)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
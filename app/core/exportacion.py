@@ -0,0 +1,107 @@
+"""
+Serialización en flujo de observaciones para la exportación completa.
+
+Cada función recibe un iterador de filas (mapeos columna -> valor) y produce
+bloques de bytes para un StreamingResponse. Las filas se agrupan en bloques
+de ~64 KB para no enviar un fragmento HTTP por fila.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, List, Mapping
+
+FORMATO_GEOJSON = "geojson"
+FORMATO_NDJSON = "ndjson"
+FORMATO_CSV = "csv"
+
+MEDIA_TYPES = {
+    FORMATO_GEOJSON: "application/geo+json",
+    FORMATO_NDJSON: "application/x-ndjson",
+    FORMATO_CSV: "text/csv; charset=utf-8",
+}
+
+TAMANO_BLOQUE = 64 * 1024
+
+
+def _valor_json(valor: Any) -> Any:
+    if isinstance(valor, Decimal):
+        return float(valor)
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def _en_bloques(partes: Iterable[str]) -> Iterator[bytes]:
+    """Juntar cadenas pequeñas en bloques de ~TAMANO_BLOQUE bytes"""
+    bloque: List[str] = []
+    tamano = 0
+    for parte in partes:
+        bloque.append(parte)
+        tamano += len(parte)
+        if tamano >= TAMANO_BLOQUE:
+            yield "".join(bloque).encode("utf-8")
+            bloque, tamano = [], 0
+    if bloque:
+        yield "".join(bloque).encode("utf-8")
+
+
+def serializar_ndjson(filas: Iterable[Mapping]) -> Iterator[bytes]:
+    """Un objeto JSON por línea"""
+    return _en_bloques(
+        json.dumps({k: _valor_json(v) for k, v in fila.items()}, ensure_ascii=False) + "\n"
+        for fila in filas
+    )
+
+
+def serializar_geojson(filas: Iterable[Mapping]) -> Iterator[bytes]:
+    """FeatureCollection con un Point por observación"""
+    def partes():
+        yield '{"type":"FeatureCollection","features":['
+        separador = ""
+        for fila in filas:
+            propiedades = {
+                k: _valor_json(v) for k, v in fila.items()
+                if k not in ("id", "latitud", "longitud")
+            }
+            feature = {
+                "type": "Feature",
+                "id": fila["id"],
+                "geometry": {
+                    "type": "Point",
+                    "coordinates": [float(fila["longitud"]), float(fila["latitud"])]
+                },
+                "properties": propiedades
+            }
+            yield separador + json.dumps(feature, ensure_ascii=False)
+            separador = ","
+        yield "]}\n"
+
+    return _en_bloques(partes())
+
+
+def serializar_csv(filas: Iterable[Mapping], columnas: List[str]) -> Iterator[bytes]:
+    """CSV con encabezado; las fechas en ISO 8601"""
+    def partes():
+        buffer = io.StringIO()
+        escritor = csv.writer(buffer)
+        escritor.writerow(columnas)
+        for fila in filas:
+            escritor.writerow([_valor_json(fila[columna]) for columna in columnas])
+            if buffer.tell() >= TAMANO_BLOQUE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+
+    return _en_bloques(partes())
+
+
+def serializar(formato: str, filas: Iterable[Mapping], columnas: List[str]) -> Iterator[bytes]:
+    """Serializar `filas` en el formato de exportación indicado"""
+    if formato == FORMATO_GEOJSON:
+        return serializar_geojson(filas)
+    if formato == FORMATO_NDJSON:
+        return serializar_ndjson(filas)
+    return serializar_csv(filas, columnas)
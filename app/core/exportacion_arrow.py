@@ -0,0 +1,204 @@
+"""
+Exportación columnar en Arrow IPC (stream) o Parquet.
+
+Las filas se leen de un cursor del lado del servidor y se convierten en
+RecordBatch de Arrow por lotes, sin pasar por modelos del ORM ni JSON. Las
+columnas de baja cardinalidad (estado, municipio, institución, enums) se
+escriben con codificación de diccionario, que pandas lee como `category`.
+
+pyarrow es una dependencia opcional: si no está instalado, las funciones
+lanzan ArrowNoDisponible.
+"""
+import enum
+import io
+import itertools
+import json
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, List, Mapping, Optional, Sequence
+
+from sqlalchemy import JSON, BigInteger, Boolean, Date, DateTime, Enum, Float, Integer, Numeric, Time
+from sqlalchemy.sql.schema import Column
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+FORMATO_ARROW = "arrow"
+FORMATO_PARQUET = "parquet"
+
+MEDIA_TYPES = {
+    FORMATO_ARROW: "application/vnd.apache.arrow.stream",
+    FORMATO_PARQUET: "application/vnd.apache.parquet",
+}
+
+TAMANO_LOTE = 10000
+
+
+class ArrowNoDisponible(RuntimeError):
+    """pyarrow no está instalado"""
+
+
+def disponible() -> bool:
+    return pa is not None
+
+
+def _requerir_pyarrow():
+    if pa is None:
+        raise ArrowNoDisponible("La exportación Arrow/Parquet requiere el paquete pyarrow")
+
+
+def _tipo_arrow(columna: Column, diccionario: bool):
+    tipo = columna.type
+    if diccionario or isinstance(tipo, Enum):
+        return pa.dictionary(pa.int32(), pa.string())
+    if isinstance(tipo, BigInteger):
+        return pa.int64()
+    if isinstance(tipo, Integer):
+        return pa.int32()
+    if isinstance(tipo, (Numeric, Float)):
+        return pa.float64()
+    if isinstance(tipo, Boolean):
+        return pa.bool_()
+    if isinstance(tipo, DateTime):
+        return pa.timestamp("us", tz="UTC" if tipo.timezone else None)
+    if isinstance(tipo, Date):
+        return pa.date32()
+    if isinstance(tipo, Time):
+        return pa.time64("us")
+    if isinstance(tipo, JSON):
+        # Los campos JSON del proyecto son arreglos de opciones seleccionadas
+        return pa.list_(pa.string())
+    return pa.string()
+
+
+def _convertidor(columna: Column) -> Optional[Callable[[Any], Any]]:
+    """Conversión de valores de Python a lo que espera pa.array, o None si no hace falta"""
+    tipo = columna.type
+    if isinstance(tipo, Enum):
+        return lambda v: v.value if isinstance(v, enum.Enum) else v
+    if isinstance(tipo, (Numeric, Float)):
+        return lambda v: float(v) if isinstance(v, Decimal) else v
+    if isinstance(tipo, JSON):
+        return lambda v: [str(x) for x in v] if isinstance(v, list) else (None if v is None else [json.dumps(v)])
+    return None
+
+
+def esquema(columnas: Sequence[Column], columnas_diccionario: Iterable[str] = ()):
+    """Esquema de Arrow para las columnas de una tabla"""
+    _requerir_pyarrow()
+    diccionario = set(columnas_diccionario)
+    return pa.schema([
+        pa.field(columna.key, _tipo_arrow(columna, columna.key in diccionario), nullable=columna.nullable)
+        for columna in columnas
+    ])
+
+
+def lotes(
+    filas: Iterable[Mapping],
+    columnas: Sequence[Column],
+    esquema_arrow,
+    tamano_lote: int = TAMANO_LOTE
+) -> Iterator:
+    """Agrupar las filas en RecordBatch de `tamano_lote` filas"""
+    _requerir_pyarrow()
+    convertidores = [_convertidor(columna) for columna in columnas]
+    filas = iter(filas)
+    while True:
+        bloque = list(itertools.islice(filas, tamano_lote))
+        if not bloque:
+            return
+        arreglos = []
+        for columna, convertir, campo in zip(columnas, convertidores, esquema_arrow):
+            valores = [fila[columna.key] for fila in bloque]
+            if convertir:
+                valores = [convertir(v) for v in valores]
+            if pa.types.is_dictionary(campo.type):
+                arreglos.append(pa.array(valores, type=pa.string()).dictionary_encode())
+            else:
+                arreglos.append(pa.array(valores, type=campo.type))
+        yield pa.RecordBatch.from_arrays(arreglos, schema=esquema_arrow)
+
+
+class _Salida(io.RawIOBase):
+    """Destino de escritura que se vacía por partes para enviarlo en flujo"""
+
+    def __init__(self):
+        self._partes: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, datos) -> int:
+        self._partes.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self) -> bytes:
+        datos = b"".join(self._partes)
+        self._partes = []
+        return datos
+
+
+def _abrir_escritor(formato: str, destino, esquema_arrow, columnas_diccionario: Iterable[str]):
+    if formato == FORMATO_PARQUET:
+        return pq.ParquetWriter(
+            destino,
+            esquema_arrow,
+            use_dictionary=list(columnas_diccionario) or True,
+            compression="zstd"
+        )
+    return pa.ipc.new_stream(destino, esquema_arrow)
+
+
+def serializar(
+    formato: str,
+    filas: Iterable[Mapping],
+    columnas: Sequence[Column],
+    columnas_diccionario: Iterable[str] = ()
+) -> Iterator[bytes]:
+    """
+    Producir el archivo Arrow IPC o Parquet por partes: cada RecordBatch (un
+    grupo de filas en Parquet) se envía en cuanto se escribe.
+    """
+    _requerir_pyarrow()
+    columnas_diccionario = list(columnas_diccionario)
+    esquema_arrow = esquema(columnas, columnas_diccionario)
+    salida = _Salida()
+    escritor = _abrir_escritor(formato, salida, esquema_arrow, columnas_diccionario)
+    try:
+        for lote in lotes(filas, columnas, esquema_arrow):
+            escritor.write_batch(lote)
+            datos = salida.vaciar()
+            if datos:
+                yield datos
+    finally:
+        escritor.close()
+    datos = salida.vaciar()
+    if datos:
+        yield datos
+
+
+def escribir_archivo(
+    formato: str,
+    ruta: str,
+    filas: Iterable[Mapping],
+    columnas: Sequence[Column],
+    columnas_diccionario: Iterable[str] = ()
+) -> int:
+    """Escribir el archivo completo en `ruta`; retorna el número de filas"""
+    _requerir_pyarrow()
+    columnas_diccionario = list(columnas_diccionario)
+    esquema_arrow = esquema(columnas, columnas_diccionario)
+    total = 0
+    with pa.OSFile(ruta, "wb") as destino:
+        escritor = _abrir_escritor(formato, destino, esquema_arrow, columnas_diccionario)
+        try:
+            for lote in lotes(filas, columnas, esquema_arrow):
+                escritor.write_batch(lote)
+                total += lote.num_rows
+        finally:
+            escritor.close()
+    return total
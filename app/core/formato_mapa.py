@@ -0,0 +1,103 @@
+"""
+Formatos compactos para los puntos de /observaciones-naturalista/mapa.
+
+Ambos formatos transportan solo el ID, las coordenadas y la fecha de cada
+punto; los demás datos se consultan por ID al seleccionar un punto.
+
+binario (`application/octet-stream`), little-endian:
+
+    encabezado  4 bytes  b"MAP1"
+                uint32   n, número de puntos
+    ids         int32[n]
+    latitudes   int32[n] en diezmillonésimas de grado (latitud * 1e7)
+    longitudes  int32[n] en diezmillonésimas de grado
+    fechas      int32[n] días desde 1970-01-01; -2147483648 si no hay fecha
+
+polyline (JSON): coordenadas con el algoritmo "encoded polyline" de Google con
+precisión de 6 decimales; `ids` y `fechas` (días desde 1970-01-01 más uno, 0
+si no hay fecha) usan la misma codificación de enteros, como diferencias
+respecto al valor anterior.
+"""
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+FORMATO_JSON = "json"
+FORMATO_BINARIO = "binario"
+FORMATO_POLYLINE = "polyline"
+FORMATOS = (FORMATO_JSON, FORMATO_BINARIO, FORMATO_POLYLINE)
+
+MEDIA_TYPE_BINARIO = "application/octet-stream"
+
+ESCALA_COORDENADAS = 10_000_000
+SIN_FECHA = -2147483648
+_EPOCA = date(1970, 1, 1).toordinal()
+
+# (id, latitud * 1e7, longitud * 1e7, fecha)
+PuntoCompacto = Tuple[int, int, int, Optional[date]]
+
+
+def formato_por_accept(accept: Optional[str]) -> str:
+    """Formato pedido en el encabezado Accept (JSON si no se pide binario)"""
+    if accept and MEDIA_TYPE_BINARIO in accept:
+        return FORMATO_BINARIO
+    return FORMATO_JSON
+
+
+def _dia(fecha: Optional[date]) -> int:
+    return fecha.toordinal() - _EPOCA if fecha else SIN_FECHA
+
+
+def empaquetar_binario(puntos: Sequence[PuntoCompacto]) -> bytes:
+    """Empaquetar los puntos en arreglos int32 little-endian"""
+    ids = array("i", [p[0] for p in puntos])
+    latitudes = array("i", [p[1] for p in puntos])
+    longitudes = array("i", [p[2] for p in puntos])
+    fechas = array("i", [_dia(p[3]) for p in puntos])
+
+    partes = [struct.pack("<4sI", b"MAP1", len(puntos))]
+    for arreglo in (ids, latitudes, longitudes, fechas):
+        if sys.byteorder != "little":
+            arreglo.byteswap()
+        partes.append(arreglo.tobytes())
+    return b"".join(partes)
+
+
+def _codificar_deltas(valores: Sequence[int], ejes: int = 1) -> str:
+    """
+    Codificar enteros como en encoded polyline: cada valor se transmite como
+    la diferencia con el anterior del mismo eje (latitud y longitud se
+    intercalan con `ejes=2`).
+    """
+    salida: List[str] = []
+    anterior = [0] * ejes
+    for indice, valor in enumerate(valores):
+        eje = indice % ejes
+        v = valor - anterior[eje]
+        anterior[eje] = valor
+        v = ~(v << 1) if v < 0 else v << 1
+        while v >= 0x20:
+            salida.append(chr((0x20 | (v & 0x1F)) + 63))
+            v >>= 5
+        salida.append(chr(v + 63))
+    return "".join(salida)
+
+
+def codificar_polyline(puntos: Sequence[PuntoCompacto]) -> dict:
+    """Codificar los puntos como cadenas delta (encoded polyline)"""
+    # Precisión 6: de diezmillonésimas a millonésimas de grado
+    factor = ESCALA_COORDENADAS // 1_000_000
+    coordenadas: List[int] = []
+    for p in puntos:
+        coordenadas.append(round(p[1] / factor))
+        coordenadas.append(round(p[2] / factor))
+
+    return {
+        "total": len(puntos),
+        "precision": 6,
+        "coordenadas": _codificar_deltas(coordenadas, ejes=2),
+        "ids": _codificar_deltas([p[0] for p in puntos]),
+        "fechas": _codificar_deltas([0 if p[3] is None else _dia(p[3]) + 1 for p in puntos])
+    }
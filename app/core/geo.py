@@ -0,0 +1,104 @@
+"""
+Celdas de una cuadrícula jerárquica para agrupar observaciones en el mapa.
+
+El mundo se divide en 2^N x 2^N celdas de longitud/latitud y cada celda se
+identifica con el código Morton (orden Z) de sus coordenadas enteras, que
+intercala los bits de x y de y. Así, la celda de un nivel más grueso se obtiene
+quitando bits del final: `celda >> 2 * (NIVEL_MAXIMO - nivel)`, y todas las
+celdas finas de una celda gruesa quedan contiguas en el índice. Eso permite
+usar el índice de celda_mapa como índice espacial: un rectángulo se traduce a
+unos cuantos rangos de celdas (ver `rangos_celdas`).
+"""
+from typing import List, Tuple
+
+# Nivel de la celda que se guarda en observaciones_naturalista.celda_mapa
+# (2^20 divisiones: ~38 m de longitud en el ecuador)
+NIVEL_MAXIMO = 20
+
+
+def _intercalar(v: int) -> int:
+    """Separar los bits de `v` con un cero entre cada uno (0b1011 -> 0b1000101)"""
+    v &= 0xFFFFFFFF
+    v = (v | (v << 16)) & 0x0000FFFF0000FFFF
+    v = (v | (v << 8)) & 0x00FF00FF00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v << 2)) & 0x3333333333333333
+    v = (v | (v << 1)) & 0x5555555555555555
+    return v
+
+
+def _compactar(v: int) -> int:
+    """Inverso de `_intercalar`"""
+    v &= 0x5555555555555555
+    v = (v | (v >> 1)) & 0x3333333333333333
+    v = (v | (v >> 2)) & 0x0F0F0F0F0F0F0F0F
+    v = (v | (v >> 4)) & 0x00FF00FF00FF00FF
+    v = (v | (v >> 8)) & 0x0000FFFF0000FFFF
+    v = (v | (v >> 16)) & 0x00000000FFFFFFFF
+    return v
+
+
+def _coordenadas(latitud: float, longitud: float, divisiones: int) -> Tuple[int, int]:
+    """Coordenadas enteras `(x, y)` de la celda que contiene el punto"""
+    x = int((float(longitud) + 180.0) / 360.0 * divisiones)
+    y = int((float(latitud) + 90.0) / 180.0 * divisiones)
+    return min(max(x, 0), divisiones - 1), min(max(y, 0), divisiones - 1)
+
+
+def celda_mapa(latitud: float, longitud: float, nivel: int = NIVEL_MAXIMO) -> int:
+    """Código Morton de la celda de `nivel` que contiene el punto"""
+    x, y = _coordenadas(latitud, longitud, 1 << nivel)
+    return _intercalar(x) | (_intercalar(y) << 1)
+
+
+def limites_celda(celda: int, nivel: int) -> Tuple[float, float, float, float]:
+    """Límites `(min_lon, min_lat, max_lon, max_lat)` de una celda de `nivel`"""
+    divisiones = 1 << nivel
+    x, y = _compactar(celda), _compactar(celda >> 1)
+    ancho, alto = 360.0 / divisiones, 180.0 / divisiones
+    return (x * ancho - 180.0, y * alto - 90.0, (x + 1) * ancho - 180.0, (y + 1) * alto - 90.0)
+
+
+def nivel_para_zoom(zoom: int) -> int:
+    """
+    Nivel de cuadrícula para un zoom de mapa web (teselas de 256 px).
+
+    Con dos niveles más que el zoom cada celda mide ~64 px en pantalla.
+    """
+    return min(max(zoom + 2, 0), NIVEL_MAXIMO)
+
+
+def rangos_celdas(
+    min_lon: float, min_lat: float, max_lon: float, max_lat: float, max_celdas: int = 16
+) -> List[Tuple[int, int]]:
+    """
+    Cubrir un rectángulo con rangos `[inicio, fin]` de celdas de NIVEL_MAXIMO.
+
+    Se elige el nivel más fino en el que el rectángulo toca a lo más
+    `max_celdas` celdas; cada una equivale a un rango contiguo de celdas
+    finas (orden Z) y los rangos adyacentes se unen. El resultado cubre el
+    rectángulo con algo de margen, por lo que la consulta debe filtrar además
+    por latitud y longitud exactas.
+    """
+    for nivel in range(NIVEL_MAXIMO, -1, -1):
+        divisiones = 1 << nivel
+        x0, y0 = _coordenadas(min_lat, min_lon, divisiones)
+        x1, y1 = _coordenadas(max_lat, max_lon, divisiones)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= max_celdas:
+            break
+
+    desplazamiento = 2 * (NIVEL_MAXIMO - nivel)
+    celdas = sorted(
+        _intercalar(x) | (_intercalar(y) << 1)
+        for x in range(x0, x1 + 1)
+        for y in range(y0, y1 + 1)
+    )
+
+    rangos: List[Tuple[int, int]] = []
+    for celda in celdas:
+        inicio, fin = celda << desplazamiento, ((celda + 1) << desplazamiento) - 1
+        if rangos and rangos[-1][1] + 1 == inicio:
+            rangos[-1] = (rangos[-1][0], fin)
+        else:
+            rangos.append((inicio, fin))
+    return rangos
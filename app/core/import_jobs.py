@@ -0,0 +1,274 @@
+"""
+Trabajos de importación de observaciones de Naturalista en segundo plano.
+
+Las importaciones se ejecutan en un pool de hilos propio con una cola acotada,
+fuera del ciclo de la petición, para que no excedan los timeouts del proxy ni
+ocupen los workers de la API mientras se insertan los datos.
+"""
+import multiprocessing
+import threading
+import uuid
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud import observacion_naturalista as crud_obs_nat
+from app.crud.observacion_naturalista import MAX_MENSAJES_ERROR
+from app.schemas.observacion_naturalista import validar_lote_conabio
+
+# Límite para no acumular memoria con trabajos antiguos
+MAX_TRABAJOS_TERMINADOS = 50
+
+
+class ColaImportacionLlena(Exception):
+    """No hay lugar en la cola de importaciones"""
+
+
+class TrabajoImportacion:
+    """Estado y contadores de una importación en segundo plano"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.estado = "en_cola"
+        self.total_procesados = 0
+        self.errores_validacion = 0
+        self.resultado_bd = {"insertados": 0, "duplicados": 0, "errores": 0, "mensajes_error": []}
+        self.mensajes_validacion: List[str] = []
+        self.creado = datetime.utcnow()
+        self.iniciado: Optional[datetime] = None
+        self.finalizado: Optional[datetime] = None
+        self._cancelar = threading.Event()
+
+    @property
+    def insertados(self) -> int:
+        return self.resultado_bd["insertados"]
+
+    @property
+    def duplicados(self) -> int:
+        return self.resultado_bd["duplicados"]
+
+    @property
+    def errores(self) -> int:
+        return self.errores_validacion + self.resultado_bd["errores"]
+
+    @property
+    def mensajes_error(self) -> List[str]:
+        return (self.mensajes_validacion + self.resultado_bd["mensajes_error"])[:MAX_MENSAJES_ERROR]
+
+    @property
+    def registros_por_segundo(self) -> float:
+        if not self.iniciado:
+            return 0.0
+        segundos = ((self.finalizado or datetime.utcnow()) - self.iniciado).total_seconds()
+        return round(self.total_procesados / segundos, 1) if segundos > 0 else 0.0
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in ("completado", "cancelado", "fallido")
+
+    @property
+    def cancelacion_solicitada(self) -> bool:
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        """Solicitar la cancelación; el trabajo se detiene al terminar el lote en curso"""
+        self._cancelar.set()
+
+    def agregar_error(self, mensaje: str):
+        self.errores_validacion += 1
+        if len(self.mensajes_validacion) < MAX_MENSAJES_ERROR:
+            self.mensajes_validacion.append(mensaje)
+
+
+def _leer_lotes(registros: Iterable, trabajo: TrabajoImportacion, tamano_lote: int) -> Iterator[Tuple[int, list]]:
+    """
+    Agrupar los registros crudos en lotes `(inicio, registros)`.
+
+    Se detiene si se cancela el trabajo. Un error de sintaxis a mitad del
+    archivo también detiene la lectura; los lotes anteriores se importan y el
+    error se reporta junto con los demás.
+    """
+    lote, inicio = [], 0
+    try:
+        for item in registros:
+            lote.append(item)
+            if len(lote) >= tamano_lote:
+                yield inicio, lote
+                inicio += len(lote)
+                lote = []
+                if trabajo.cancelacion_solicitada:
+                    return
+    except ValueError as e:
+        trabajo.agregar_error(f"Error al parsear JSON: {str(e)}")
+
+    if lote:
+        yield inicio, lote
+
+
+def validar_lotes(
+    lotes: Iterator[Tuple[int, list]],
+    pool: Optional[Executor],
+    max_pendientes: int
+) -> Iterator[Tuple[int, Tuple[List[dict], List[str]]]]:
+    """Validar los lotes en orden, en el pool de procesos si existe, con un máximo de lotes en vuelo"""
+    if pool is None:
+        for inicio, lote in lotes:
+            yield len(lote), validar_lote_conabio(lote, inicio)
+        return
+
+    pendientes = deque()
+    for inicio, lote in lotes:
+        pendientes.append((len(lote), pool.submit(validar_lote_conabio, lote, inicio)))
+        if len(pendientes) >= max_pendientes:
+            procesados, futuro = pendientes.popleft()
+            yield procesados, futuro.result()
+    while pendientes:
+        procesados, futuro = pendientes.popleft()
+        yield procesados, futuro.result()
+
+
+def validar_registros(
+    registros: Iterable,
+    trabajo: TrabajoImportacion,
+    pool: Optional[Executor] = None
+) -> Iterator[dict]:
+    """
+    Validar los registros de CONABIO por lotes y producir filas listas para insertar.
+
+    Cada lote se valida con una sola llamada a pydantic-core
+    (`validar_lote_conabio`); con `pool` los lotes se reparten entre procesos.
+    """
+    lotes = _leer_lotes(registros, trabajo, settings.NATURALISTA_IMPORT_CHUNK_SIZE)
+    max_pendientes = 2 * max(settings.NATURALISTA_IMPORT_PROCESSES, 1)
+    for procesados, (filas, errores) in validar_lotes(lotes, pool, max_pendientes):
+        trabajo.total_procesados += procesados
+        for mensaje in errores:
+            trabajo.agregar_error(mensaje)
+        yield from filas
+
+
+class GestorImportaciones:
+    """Pool de workers con cola acotada para los trabajos de importación"""
+
+    def __init__(self, max_workers: int, max_en_cola: int, max_procesos: int = 0):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="importacion")
+        self._cupos = threading.BoundedSemaphore(max_workers + max_en_cola)
+        self._max_procesos = max_procesos
+        self._pool_validacion: Optional[ProcessPoolExecutor] = None
+        self._trabajos: Dict[str, TrabajoImportacion] = {}
+        self._lock = threading.Lock()
+
+    def enviar(
+        self,
+        abrir_registros: Callable[[], Iterable],
+        al_terminar: Optional[Callable[[], None]] = None
+    ) -> TrabajoImportacion:
+        """
+        Encolar una importación. `abrir_registros` se llama ya dentro del worker
+        y debe retornar los registros a importar.
+
+        Lanza ColaImportacionLlena si ya hay demasiados trabajos pendientes.
+        """
+        if not self._cupos.acquire(blocking=False):
+            raise ColaImportacionLlena()
+
+        trabajo = TrabajoImportacion()
+        with self._lock:
+            self._purgar_terminados()
+            self._trabajos[trabajo.id] = trabajo
+
+        try:
+            self._executor.submit(self._ejecutar, trabajo, abrir_registros, al_terminar)
+        except Exception:
+            self._cupos.release()
+            raise
+        return trabajo
+
+    def obtener(self, trabajo_id: str) -> Optional[TrabajoImportacion]:
+        """Obtener un trabajo por ID"""
+        with self._lock:
+            return self._trabajos.get(trabajo_id)
+
+    def listar(self) -> List[TrabajoImportacion]:
+        """Listar los trabajos conocidos, del más reciente al más antiguo"""
+        with self._lock:
+            return sorted(self._trabajos.values(), key=lambda t: t.creado, reverse=True)
+
+    def cancelar(self, trabajo_id: str) -> Optional[TrabajoImportacion]:
+        """Solicitar la cancelación de un trabajo"""
+        trabajo = self.obtener(trabajo_id)
+        if trabajo and not trabajo.terminado:
+            trabajo.cancelar()
+        return trabajo
+
+    def cerrar(self):
+        """Detener el pool sin esperar a los trabajos en curso"""
+        for trabajo in self.listar():
+            trabajo.cancelar()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._pool_validacion:
+            self._pool_validacion.shutdown(wait=False, cancel_futures=True)
+
+    def _obtener_pool_validacion(self) -> Optional[ProcessPoolExecutor]:
+        """Crear el pool de procesos de validación la primera vez que se necesita"""
+        if self._max_procesos <= 0:
+            return None
+        with self._lock:
+            if self._pool_validacion is None:
+                # spawn: hacer fork de un servidor con hilos activos no es seguro
+                self._pool_validacion = ProcessPoolExecutor(
+                    max_workers=self._max_procesos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool_validacion
+
+    def _ejecutar(
+        self,
+        trabajo: TrabajoImportacion,
+        abrir_registros: Callable[[], Iterable],
+        al_terminar: Optional[Callable[[], None]]
+    ):
+        try:
+            if trabajo.cancelacion_solicitada:
+                trabajo.estado = "cancelado"
+                return
+
+            trabajo.estado = "en_proceso"
+            trabajo.iniciado = datetime.utcnow()
+            db = SessionLocal()
+            try:
+                crud_obs_nat.crear_observaciones_bulk(
+                    db,
+                    validar_registros(abrir_registros(), trabajo, self._obtener_pool_validacion()),
+                    progreso=lambda resultado: setattr(trabajo, "resultado_bd", dict(resultado))
+                )
+            finally:
+                db.close()
+
+            trabajo.estado = "cancelado" if trabajo.cancelacion_solicitada else "completado"
+        except Exception as e:
+            trabajo.estado = "fallido"
+            trabajo.agregar_error(f"Error en la importación: {str(e)}")
+        finally:
+            trabajo.finalizado = datetime.utcnow()
+            self._cupos.release()
+            if al_terminar:
+                al_terminar()
+
+    def _purgar_terminados(self):
+        terminados = sorted(
+            (t for t in self._trabajos.values() if t.terminado),
+            key=lambda t: t.creado
+        )
+        for trabajo in terminados[:max(0, len(terminados) - MAX_TRABAJOS_TERMINADOS)]:
+            del self._trabajos[trabajo.id]
+
+
+gestor_importaciones = GestorImportaciones(
+    max_workers=settings.NATURALISTA_IMPORT_WORKERS,
+    max_en_cola=settings.NATURALISTA_IMPORT_QUEUE_SIZE,
+    max_procesos=settings.NATURALISTA_IMPORT_PROCESSES
+)
@@ -0,0 +1,190 @@
+"""
+Índice espacial en memoria de las observaciones de Naturalista.
+
+Las coordenadas se reparten en una cuadrícula uniforme de celdas de
+TAMANO_CELDA grados. Cada celda guarda sus IDs, latitudes y longitudes en
+arreglos compactos (`array`): 24 bytes por punto más medio KB por celda
+ocupada, en cada worker. Un millón de observaciones repartidas en unas 240 mil
+celdas ocupa unos 140 MB; con datos concentrados en menos celdas, bastante
+menos. No hay un mapa de ID a celda; para quitar un punto se usan sus
+coordenadas. Las búsquedas por radio y de los k más cercanos recorren las
+celdas en anillos alrededor del punto y se detienen en cuanto ningún anillo
+restante puede contener un punto más cercano.
+
+El índice se carga al iniciar la API y el CRUD lo actualiza después de
+insertar, importar o eliminar. Los cambios hechos fuera del proceso (el
+importador de línea de comandos, otro worker) se reflejan al recargarlo.
+"""
+import heapq
+import math
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+# ~5.5 km de latitud por celda
+TAMANO_CELDA = 0.05
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = math.pi * RADIO_TIERRA_KM / 180.0
+
+
+class _Celda:
+    __slots__ = ("ids", "latitudes", "longitudes")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.latitudes = array("d")
+        self.longitudes = array("d")
+
+
+class IndiceEspacial:
+    """Cuadrícula uniforme de coordenadas con búsqueda por radio y k vecinos"""
+
+    def __init__(self, tamano_celda: float = TAMANO_CELDA):
+        self.tamano_celda = tamano_celda
+        self.cargado = False
+        self._celdas: Dict[Tuple[int, int], _Celda] = {}
+        self._total = 0
+        # Filas y columnas extremas ocupadas: acotan los anillos a recorrer
+        self._limites: Optional[List[int]] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._total
+
+    def _clave(self, latitud: float, longitud: float) -> Tuple[int, int]:
+        return (math.floor(latitud / self.tamano_celda), math.floor(longitud / self.tamano_celda))
+
+    def cargar(self, db: Session, tamano_lote: int = 10000) -> int:
+        """Reconstruir el índice desde la tabla, leyéndola por lotes"""
+        filas = db.query(
+            ObservacionNaturalista.id,
+            ObservacionNaturalista.latitud,
+            ObservacionNaturalista.longitud
+        ).execution_options(yield_per=tamano_lote)
+
+        nuevo = IndiceEspacial(self.tamano_celda)
+        nuevo._agregar_sin_lock(filas)
+
+        with self._lock:
+            self._celdas, self._total, self._limites = nuevo._celdas, nuevo._total, nuevo._limites
+            self.cargado = True
+        return len(self)
+
+    def agregar(self, filas: Iterable[Tuple[int, float, float]]) -> None:
+        """Agregar puntos `(id, latitud, longitud)`; los que ya están en su celda se ignoran"""
+        with self._lock:
+            self._agregar_sin_lock(filas)
+
+    def _agregar_sin_lock(self, filas: Iterable[Tuple[int, float, float]]) -> None:
+        for id_, latitud, longitud in filas:
+            latitud, longitud = float(latitud), float(longitud)
+            clave = self._clave(latitud, longitud)
+            celda = self._celdas.get(clave)
+            if celda is None:
+                celda = self._celdas[clave] = _Celda()
+            elif id_ in celda.ids:
+                continue
+            celda.ids.append(id_)
+            celda.latitudes.append(latitud)
+            celda.longitudes.append(longitud)
+            self._total += 1
+            if self._limites is None:
+                self._limites = [clave[0], clave[0], clave[1], clave[1]]
+            else:
+                limites = self._limites
+                limites[0], limites[1] = min(limites[0], clave[0]), max(limites[1], clave[0])
+                limites[2], limites[3] = min(limites[2], clave[1]), max(limites[3], clave[1])
+
+    def quitar(self, filas: Iterable[Tuple[int, float, float]]) -> None:
+        """Quitar puntos `(id, latitud, longitud)` (los que no estén se ignoran)"""
+        with self._lock:
+            for id_, latitud, longitud in filas:
+                clave = self._clave(float(latitud), float(longitud))
+                celda = self._celdas.get(clave)
+                if celda is None or id_ not in celda.ids:
+                    continue
+                posicion = celda.ids.index(id_)
+                del celda.ids[posicion]
+                del celda.latitudes[posicion]
+                del celda.longitudes[posicion]
+                self._total -= 1
+                if not celda.ids:
+                    del self._celdas[clave]
+
+    def vaciar(self) -> None:
+        with self._lock:
+            self._celdas, self._total, self._limites = {}, 0, None
+
+    def buscar(
+        self,
+        latitud: float,
+        longitud: float,
+        k: int = 10,
+        radio_km: Optional[float] = None
+    ) -> List[Tuple[float, int]]:
+        """
+        Los `k` puntos más cercanos, opcionalmente dentro de `radio_km`.
+
+        Retorna `(distancia_km, id)` ordenados por distancia (haversine).
+        """
+        fila_centro, columna_centro = self._clave(latitud, longitud)
+        mejores: List[Tuple[float, int]] = []  # max-heap por distancia (negativa)
+        lat1, lon1 = math.radians(latitud), math.radians(longitud)
+        cos_lat1 = math.cos(lat1)
+
+        with self._lock:
+            if not self._celdas:
+                return []
+            min_fila, max_fila, min_columna, max_columna = self._limites
+            max_anillo = max(
+                fila_centro - min_fila, max_fila - fila_centro,
+                columna_centro - min_columna, max_columna - columna_centro, 0
+            )
+
+            for anillo in range(max_anillo + 1):
+                for clave in self._claves_anillo(fila_centro, columna_centro, anillo):
+                    celda = self._celdas.get(clave)
+                    if celda is None:
+                        continue
+                    for id_, lat2, lon2 in zip(celda.ids, celda.latitudes, celda.longitudes):
+                        lat2, lon2 = math.radians(lat2), math.radians(lon2)
+                        a = (math.sin((lat2 - lat1) / 2) ** 2
+                             + cos_lat1 * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2)
+                        distancia = 2 * RADIO_TIERRA_KM * math.asin(min(1.0, math.sqrt(a)))
+                        if radio_km is not None and distancia > radio_km:
+                            continue
+                        if len(mejores) < k:
+                            heapq.heappush(mejores, (-distancia, id_))
+                        elif distancia < -mejores[0][0]:
+                            heapq.heapreplace(mejores, (-distancia, id_))
+
+                # Distancia mínima a cualquier punto fuera de los anillos ya
+                # recorridos; las celdas se angostan hacia los polos
+                grados = anillo * self.tamano_celda
+                coseno = math.cos(math.radians(min(abs(latitud) + grados + self.tamano_celda, 90.0)))
+                limite = grados * KM_POR_GRADO * coseno
+                if radio_km is not None and limite > radio_km:
+                    break
+                if len(mejores) == k and -mejores[0][0] <= limite:
+                    break
+
+        return sorted((-distancia, id_) for distancia, id_ in mejores)
+
+    @staticmethod
+    def _claves_anillo(fila: int, columna: int, anillo: int):
+        if anillo == 0:
+            yield fila, columna
+            return
+        for dc in range(-anillo, anillo + 1):
+            yield fila - anillo, columna + dc
+            yield fila + anillo, columna + dc
+        for df in range(-anillo + 1, anillo):
+            yield fila + df, columna - anillo
+            yield fila + df, columna + anillo
+
+
+indice_observaciones = IndiceEspacial()
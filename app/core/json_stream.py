@@ -0,0 +1,105 @@
+"""
+Lectura incremental de arreglos JSON.
+
+Permite recorrer un archivo que contiene un arreglo JSON de nivel superior
+elemento por elemento, sin cargar el archivo completo en memoria.
+"""
+import codecs
+import json
+from typing import Any, BinaryIO, Iterator
+
+_decoder = json.JSONDecoder()
+_ESPACIOS = " \t\n\r"
+_CARACTERES_NUMERO = "0123456789.eE+-"
+
+
+class _Lector:
+    """Buffer de texto sobre un archivo binario UTF-8 que se lee por bloques"""
+
+    def __init__(self, archivo: BinaryIO, tamano_bloque: int):
+        self.archivo = archivo
+        self.tamano_bloque = tamano_bloque
+        self.decodificador = codecs.getincrementaldecoder("utf-8-sig")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def leer_mas(self) -> bool:
+        """Leer el siguiente bloque del archivo. Retorna False si ya no hay datos"""
+        if self.eof:
+            return False
+
+        datos = self.archivo.read(self.tamano_bloque)
+        if datos:
+            texto = self.decodificador.decode(datos)
+        else:
+            self.eof = True
+            texto = self.decodificador.decode(b"", final=True)
+
+        # Descartar lo ya consumido para que la memoria no crezca con el archivo
+        self.buffer = self.buffer[self.pos:] + texto
+        self.pos = 0
+        return True
+
+    def siguiente_caracter(self) -> str:
+        """Saltar espacios y retornar el siguiente caracter sin consumirlo ('' al final)"""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _ESPACIOS:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self.leer_mas():
+                return ""
+
+    def decodificar_valor(self) -> Any:
+        """Decodificar el valor JSON que inicia en la posición actual"""
+        while True:
+            try:
+                valor, fin = _decoder.raw_decode(self.buffer, self.pos)
+                if self.eof or not self._numero_truncado(valor, fin):
+                    self.pos = fin
+                    return valor
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.leer_mas()
+
+    def _numero_truncado(self, valor: Any, fin: int) -> bool:
+        """Un número que llega al final del buffer puede continuar en el siguiente bloque ("2." + "5")"""
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+            return False
+        while fin < len(self.buffer) and self.buffer[fin] in _CARACTERES_NUMERO:
+            fin += 1
+        return fin == len(self.buffer)
+
+
+def iterar_array_json(archivo: BinaryIO, tamano_bloque: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Iterar los elementos de un arreglo JSON leyendo el archivo por bloques.
+
+    La apertura del arreglo se valida de inmediato: si el documento no inicia
+    con '[' se lanza ValueError antes de retornar el iterador. Los errores de
+    sintaxis posteriores se lanzan como json.JSONDecodeError durante la iteración.
+    """
+    lector = _Lector(archivo, tamano_bloque)
+    if lector.siguiente_caracter() != "[":
+        raise ValueError("Se esperaba un arreglo JSON")
+    lector.pos += 1
+    return _iterar_elementos(lector)
+
+
+def _iterar_elementos(lector: _Lector) -> Iterator[Any]:
+    if lector.siguiente_caracter() == "]":
+        return
+
+    while True:
+        yield lector.decodificar_valor()
+
+        caracter = lector.siguiente_caracter()
+        if caracter == ",":
+            lector.pos += 1
+            lector.siguiente_caracter()
+        elif caracter == "]":
+            return
+        else:
+            raise json.JSONDecodeError("Se esperaba ',' o ']'", lector.buffer, lector.pos)
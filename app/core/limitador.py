@@ -0,0 +1,96 @@
+"""
+Limitador de intentos por ventana deslizante, en memoria.
+
+Cada clave (una IP o un username) guarda los instantes de sus intentos
+dentro de la ventana, y se rechaza cuando ya hay `limite`. La espera que se
+informa en Retry-After es lo que falta para que el intento más antiguo salga
+de la ventana. El estado es por proceso: con varios workers el límite
+efectivo se multiplica por el número de workers.
+
+La IP es la de `request.client`; detrás de un proxy hay que iniciar uvicorn
+con --proxy-headers para que sea la del cliente y no la del proxy.
+"""
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict
+
+from app.core.config import settings
+
+
+class LimitadorVentana:
+    """Máximo `limite` intentos por clave en los últimos `ventana` segundos"""
+
+    def __init__(self, limite: int, ventana: float, max_claves: int):
+        self.limite = limite
+        self.ventana = ventana
+        self.max_claves = max_claves
+        self.rechazos = 0
+        self._intentos: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def _espera(self, clave: str, ahora: float) -> float:
+        intentos = self._intentos.get(clave)
+        if intentos is None:
+            return 0.0
+        while intentos and intentos[0] <= ahora - self.ventana:
+            intentos.popleft()
+        if len(intentos) < self.limite:
+            return 0.0
+        self.rechazos += 1
+        return intentos[0] + self.ventana - ahora
+
+    def _registrar(self, clave: str, ahora: float) -> None:
+        intentos = self._intentos.get(clave)
+        if intentos is None:
+            if len(self._intentos) >= self.max_claves:
+                self._purgar(ahora)
+            intentos = self._intentos[clave] = deque()
+        intentos.append(ahora)
+
+    def _purgar(self, ahora: float) -> None:
+        """Quitar las claves sin intentos en la ventana; si no alcanza, las más antiguas"""
+        for clave in [c for c, intentos in self._intentos.items() if not intentos or intentos[-1] <= ahora - self.ventana]:
+            del self._intentos[clave]
+        while len(self._intentos) >= self.max_claves:
+            del self._intentos[next(iter(self._intentos))]
+
+    def espera(self, clave: str) -> float:
+        """Segundos que faltan para que `clave` pueda intentar de nuevo (0 si puede ya)"""
+        with self._lock:
+            return self._espera(clave, time.monotonic())
+
+    def registrar(self, clave: str) -> None:
+        with self._lock:
+            self._registrar(clave, time.monotonic())
+
+    def permitir(self, clave: str) -> float:
+        """Registrar el intento si cabe en la ventana; si no, retornar la espera"""
+        with self._lock:
+            ahora = time.monotonic()
+            espera = self._espera(clave, ahora)
+            if not espera:
+                self._registrar(clave, ahora)
+            return espera
+
+    def resumen(self) -> dict:
+        return {
+            "limite": self.limite,
+            "ventana_s": self.ventana,
+            "claves": len(self._intentos),
+            "rechazos": self.rechazos
+        }
+
+
+# Todos los intentos de inicio de sesión y registro de una IP
+limitador_ip = LimitadorVentana(
+    limite=settings.AUTH_RATE_LIMIT_IP,
+    ventana=settings.AUTH_RATE_WINDOW,
+    max_claves=settings.AUTH_RATE_MAX_KEYS
+)
+# Inicios de sesión fallidos por username: un login correcto no consume el límite
+limitador_usuario = LimitadorVentana(
+    limite=settings.AUTH_RATE_LIMIT_USERNAME,
+    ventana=settings.AUTH_RATE_WINDOW,
+    max_claves=settings.AUTH_RATE_MAX_KEYS
+)
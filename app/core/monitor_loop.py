@@ -0,0 +1,132 @@
+"""
+Monitor del retraso (lag) del event loop.
+
+Una tarea del loop duerme INTERVALO segundos y mide cuánto tarda de más en
+despertar: ese retraso es el tiempo que el loop estuvo ocupado con código
+que no cede el control (una consulta síncrona o bcrypt dentro de un
+`async def`). Con las muestras se calculan los percentiles p50/p99.
+
+Un hilo vigía revisa el último latido de la tarea. Si el loop lleva más de
+UMBRAL segundos sin responder, toma en ese momento la pila del hilo del loop
+y la registra en el log junto con la ruta de la petición que se está
+ejecutando, identificada por el marco de `MiddlewareMonitorLoop` en la pila.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_MUESTRAS = 3000
+
+
+class MiddlewareMonitorLoop:
+    """
+    Middleware ASGI sin lógica propia: su marco en la pila del loop indica
+    qué petición estaba en ejecución durante un bloqueo.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        await self.app(scope, receive, send)
+
+
+def _ruta_en_pila(marco) -> Optional[str]:
+    """Método y ruta de la petición cuyo middleware aparece en la pila"""
+    codigo = MiddlewareMonitorLoop.__call__.__code__
+    while marco is not None:
+        if marco.f_code is codigo:
+            scope = marco.f_locals.get("scope") or {}
+            return f"{scope.get('method', '')} {scope.get('path', '')}".strip()
+        marco = marco.f_back
+    return None
+
+
+class MonitorLoop:
+    """Muestreo del retraso del event loop y detección de bloqueos"""
+
+    def __init__(self, intervalo: float, umbral: float):
+        self.intervalo = intervalo
+        self.umbral = umbral
+        self.bloqueos = 0
+        self._muestras = deque(maxlen=MAX_MUESTRAS)
+        self._latido = time.monotonic()
+        self._hilo_loop: Optional[int] = None
+        self._tarea: Optional[asyncio.Task] = None
+        self._detener = threading.Event()
+
+    def iniciar(self) -> None:
+        """Iniciar el muestreo; se llama desde el event loop (evento startup)"""
+        if self._tarea is not None:
+            return
+        self._hilo_loop = threading.get_ident()
+        self._latido = time.monotonic()
+        self._detener.clear()
+        self._tarea = asyncio.get_running_loop().create_task(self._muestrear())
+        threading.Thread(target=self._vigilar, name="monitor-loop", daemon=True).start()
+
+    def detener(self) -> None:
+        self._detener.set()
+        if self._tarea is not None:
+            self._tarea.cancel()
+            self._tarea = None
+
+    async def _muestrear(self) -> None:
+        while True:
+            inicio = time.monotonic()
+            await asyncio.sleep(self.intervalo)
+            ahora = time.monotonic()
+            self._muestras.append(max(0.0, ahora - inicio - self.intervalo))
+            self._latido = ahora
+
+    def _vigilar(self) -> None:
+        reportado = None
+        while not self._detener.wait(self.intervalo):
+            latido = self._latido
+            bloqueado = time.monotonic() - latido - self.intervalo
+            # Un solo reporte por bloqueo: el latido no cambia mientras dure
+            if bloqueado < self.umbral or reportado == latido:
+                continue
+            reportado = latido
+            self.bloqueos += 1
+            marco = sys._current_frames().get(self._hilo_loop)
+            if marco is None:
+                continue
+            logger.warning(
+                "Event loop bloqueado por más de %.0f ms en %s\n%s",
+                bloqueado * 1000,
+                _ruta_en_pila(marco) or "(fuera de una petición)",
+                "".join(traceback.format_stack(marco))
+            )
+
+    def resumen(self) -> dict:
+        """Percentiles del retraso en milisegundos sobre las últimas muestras"""
+        muestras = sorted(self._muestras)
+        if not muestras:
+            return {"muestras": 0, "p50_ms": None, "p99_ms": None, "max_ms": None, "bloqueos": self.bloqueos}
+
+        def percentil(p: float) -> float:
+            return round(muestras[min(len(muestras) - 1, int(p * len(muestras)))] * 1000, 2)
+
+        return {
+            "muestras": len(muestras),
+            "p50_ms": percentil(0.50),
+            "p99_ms": percentil(0.99),
+            "max_ms": round(muestras[-1] * 1000, 2),
+            "bloqueos": self.bloqueos
+        }
+
+
+monitor_loop = MonitorLoop(
+    intervalo=settings.LOOP_MONITOR_INTERVAL,
+    umbral=settings.LOOP_MONITOR_THRESHOLD
+)
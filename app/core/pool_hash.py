@@ -0,0 +1,180 @@
+"""
+Pool acotado de hilos para bcrypt.
+
+Cada hash o verificación de contraseña consume cientos de milisegundos de
+CPU. Los endpoints `async def` los envían a este pool en lugar de
+ejecutarlos en el event loop; bcrypt libera el GIL, así que los hilos
+trabajan en paralelo. Si ya hay PASSWORD_HASH_QUEUE_SIZE operaciones
+pendientes se lanza ColaHashLlena, que la API traduce a 503: una ráfaga de
+inicios de sesión recibe rechazos rápidos en lugar de encolar segundos de
+trabajo y frenar a las demás peticiones.
+
+Las altas masivas de usuarios (POST /users/bulk) reparten sus hashes en un
+pool de procesos aparte, creado la primera vez que se usa, en un bloque por
+proceso. Tienen su propio límite de hashes pendientes (USER_BULK_MAX_ROWS,
+un CSV a la vez) y también responden 503 cuando no caben.
+
+El pool mide la duración de cada operación (promedio móvil) para estimar en
+cuánto se desocupa: es el Retry-After del 503. Sin PASSWORD_HASH_WORKERS se
+usa un hilo por CPU.
+"""
+import asyncio
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+class ColaHashLlena(Exception):
+    """Hay demasiadas operaciones de contraseña pendientes"""
+
+
+def _aplicar(funcion: Callable[[Any], Any], valores: List[Any]) -> Tuple[List[Any], float]:
+    """Aplicar `funcion` a un bloque de valores dentro de un proceso del pool; retorna también la duración"""
+    inicio = time.perf_counter()
+    resultados = [funcion(valor) for valor in valores]
+    return resultados, time.perf_counter() - inicio
+
+
+class PoolHash:
+    """ThreadPoolExecutor con un límite de operaciones pendientes"""
+
+    def __init__(self, workers: int, max_pendientes: int, procesos: int, max_pendientes_procesos: int):
+        self.workers = workers
+        self.max_pendientes = max_pendientes
+        self.procesos = procesos
+        self.max_pendientes_procesos = max_pendientes_procesos
+        self._pool_procesos: Optional[ProcessPoolExecutor] = None
+        self._pendientes_procesos = 0
+        self.rechazadas = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pendientes = 0
+        self._duracion = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    async def ejecutar(self, funcion: Callable[..., Any], *args) -> Any:
+        """Ejecutar `funcion(*args)` en el pool; lanza ColaHashLlena si está saturado"""
+        with self._lock:
+            if self._pendientes >= self.max_pendientes:
+                self.rechazadas += 1
+                raise ColaHashLlena()
+            self._pendientes += 1
+        try:
+            futuro = self._executor.submit(self._medir, funcion, args)
+        except BaseException:
+            self._liberar(None)
+            raise
+        # La operación sigue en el hilo aunque se cancele la petición que la
+        # espera: se descuenta cuando el futuro termina, no al dejar de esperarlo
+        futuro.add_done_callback(self._liberar)
+        return await asyncio.wrap_future(futuro)
+
+    def _liberar(self, futuro) -> None:
+        with self._lock:
+            self._pendientes -= 1
+
+    def _medir(self, funcion: Callable[..., Any], args: tuple) -> Any:
+        inicio = time.perf_counter()
+        try:
+            return funcion(*args)
+        finally:
+            duracion = time.perf_counter() - inicio
+            with self._lock:
+                self._registrar_duracion(duracion)
+
+    def _registrar_duracion(self, duracion: float) -> None:
+        """Promedio móvil de la duración de un hash; se llama con el lock tomado"""
+        self._duracion = duracion if not self._duracion else 0.8 * self._duracion + 0.2 * duracion
+
+    async def ejecutar_en_procesos(self, funcion: Callable[[Any], Any], valores: List[Any]) -> List[Any]:
+        """
+        Aplicar `funcion` (de nivel de módulo) a cada valor en el pool de
+        procesos, en un bloque por proceso; lanza ColaHashLlena si los valores
+        no caben en `max_pendientes_procesos`.
+        """
+        if not valores:
+            return []
+        with self._lock:
+            if self._pendientes_procesos + len(valores) > self.max_pendientes_procesos:
+                self.rechazadas += 1
+                raise ColaHashLlena()
+            self._pendientes_procesos += len(valores)
+        
+        tamano = math.ceil(len(valores) / self.procesos)
+        futuros, enviados = [], 0
+        try:
+            pool = self._obtener_pool_procesos()
+            for inicio in range(0, len(valores), tamano):
+                bloque = valores[inicio:inicio + tamano]
+                futuro = pool.submit(_aplicar, funcion, bloque)
+                enviados += len(bloque)
+                futuro.add_done_callback(partial(self._liberar_procesos, len(bloque)))
+                futuros.append(futuro)
+        except BaseException:
+            # Los valores no enviados no tienen callback que los descuente
+            with self._lock:
+                self._pendientes_procesos -= len(valores) - enviados
+            raise
+        
+        resultados = []
+        for parcial, _ in await asyncio.gather(*(asyncio.wrap_future(futuro) for futuro in futuros)):
+            resultados.extend(parcial)
+        return resultados
+
+    def _liberar_procesos(self, cantidad: int, futuro) -> None:
+        with self._lock:
+            self._pendientes_procesos -= cantidad
+            if not futuro.cancelled() and futuro.exception() is None:
+                _, duracion = futuro.result()
+                self._registrar_duracion(duracion / cantidad)
+
+    def _obtener_pool_procesos(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool_procesos is None:
+                # spawn: hacer fork de un servidor con hilos activos no es seguro
+                self._pool_procesos = ProcessPoolExecutor(
+                    max_workers=self.procesos,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._pool_procesos
+
+    def espera_estimada(self) -> int:
+        """Segundos estimados para atender las operaciones pendientes (mínimo 1)"""
+        cola = max(self._pendientes / self.workers, self._pendientes_procesos / self.procesos)
+        return max(1, math.ceil(cola * self._duracion))
+
+    def resumen(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pendientes": self._pendientes,
+            "max_pendientes": self.max_pendientes,
+            "procesos": self.procesos,
+            "pendientes_procesos": self._pendientes_procesos,
+            "max_pendientes_procesos": self.max_pendientes_procesos,
+            "rechazadas": self.rechazadas,
+            "duracion_ms": round(self._duracion * 1000, 1)
+        }
+
+    def cerrar(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._pool_procesos:
+            self._pool_procesos.shutdown(wait=False, cancel_futures=True)
+
+
+pool_hash = PoolHash(
+    workers=settings.PASSWORD_HASH_WORKERS or os.cpu_count() or 1,
+    max_pendientes=settings.PASSWORD_HASH_QUEUE_SIZE,
+    procesos=settings.PASSWORD_HASH_PROCESSES or os.cpu_count() or 1,
+    # Un CSV completo de POST /users/bulk a la vez
+    max_pendientes_procesos=settings.USER_BULK_MAX_ROWS
+)
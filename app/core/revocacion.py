@@ -0,0 +1,80 @@
+"""
+Filtro en memoria de refresh tokens revocados.
+
+Al rotar un refresh token o cerrar sesión, su SHA-256 se agrega a un filtro
+de Bloom y a un conjunto exacto acotado (hash -> familia). /auth/refresh lo
+revisa antes de leer la tabla: si el filtro responde "no está", el caso
+común, se sigue a la base de datos; si responde "tal vez", el conjunto exacto
+confirma la revocación sin consultar la fila, y como se trata de un token ya
+usado se revoca toda su familia.
+
+El filtro usa como funciones hash fragmentos del propio SHA-256 (doble
+hashing), así que no calcula hashes adicionales. Cuando el conjunto pasa de
+REFRESH_REVOCATION_CAPACITY entradas se descarta la mitad más antigua y el
+filtro se reconstruye con el resto. La tabla refresh_tokens sigue siendo la
+fuente de verdad: un token que ya salió del conjunto, o que fue revocado en
+otro worker, se rechaza al leer su fila.
+"""
+import math
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from app.core.config import settings
+
+
+class FiltroBloom:
+    """Filtro de Bloom sobre digests SHA-256"""
+
+    def __init__(self, capacidad: int, tasa_falsos_positivos: float):
+        self.bits = max(8, math.ceil(-capacidad * math.log(tasa_falsos_positivos) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / capacidad * math.log(2)))
+        self._arreglo = bytearray((self.bits + 7) // 8)
+
+    def _posiciones(self, digest: bytes):
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:16], "big") | 1
+        return ((h1 + i * h2) % self.bits for i in range(self.hashes))
+
+    def agregar(self, digest: bytes) -> None:
+        for posicion in self._posiciones(digest):
+            self._arreglo[posicion >> 3] |= 1 << (posicion & 7)
+
+    def __contains__(self, digest: bytes) -> bool:
+        return all(self._arreglo[posicion >> 3] & (1 << (posicion & 7)) for posicion in self._posiciones(digest))
+
+    def limpiar(self) -> None:
+        self._arreglo = bytearray(len(self._arreglo))
+
+
+class RevocacionesRefresh:
+    """Refresh tokens revocados en este proceso: filtro de Bloom más conjunto exacto"""
+
+    def __init__(self, capacidad: int, tasa_falsos_positivos: float):
+        self.capacidad = capacidad
+        self._filtro = FiltroBloom(capacidad, tasa_falsos_positivos)
+        self._revocados: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def agregar(self, token_hash: str, familia: str) -> None:
+        with self._lock:
+            self._revocados[token_hash] = familia
+            self._filtro.agregar(bytes.fromhex(token_hash))
+            if len(self._revocados) > self.capacidad:
+                for _ in range(len(self._revocados) // 2):
+                    self._revocados.popitem(last=False)
+                self._filtro.limpiar()
+                for conservado in self._revocados:
+                    self._filtro.agregar(bytes.fromhex(conservado))
+
+    def familia_revocada(self, token_hash: str) -> Optional[str]:
+        """Familia del token si se sabe revocado; None si hay que consultar la base de datos"""
+        if bytes.fromhex(token_hash) not in self._filtro:
+            return None
+        return self._revocados.get(token_hash)
+
+
+revocaciones_refresh = RevocacionesRefresh(
+    capacidad=settings.REFRESH_REVOCATION_CAPACITY,
+    tasa_falsos_positivos=settings.REFRESH_REVOCATION_FP_RATE
+)
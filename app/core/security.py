@@ -1,17 +1,20 @@
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import List, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.cache_principales import EstadoUsuario, Principal, TokenVerificado, cache_tokens, estado_usuarios
 from app.core.config import settings
-from app.core.database import get_db
-from app.models.user import User
+from app.core.database import get_async_db
+from app.core.pool_hash import pool_hash
+from app.models.user import PermisoEnum, User
 from app.schemas.token import TokenData
 
 # Configuración de encriptación
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
@@ -24,6 +27,22 @@ def get_password_hash(password: str) -> str:
     """Generar hash de la contraseña"""
     return pwd_context.hash(password)
 
+async def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verificar la contraseña en el pool de bcrypt (fuera del event loop).
+    Si coincide y el hash usa un costo distinto de BCRYPT_ROUNDS, retorna
+    también el hash recalculado para guardarlo. Lanza ColaHashLlena.
+    """
+    return await pool_hash.ejecutar(pwd_context.verify_and_update, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """Generar el hash en el pool de bcrypt (fuera del event loop). Lanza ColaHashLlena"""
+    return await pool_hash.ejecutar(pwd_context.hash, password)
+
+async def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Generar los hashes de varias contraseñas en paralelo, en el pool de procesos"""
+    return await pool_hash.ejecutar_en_procesos(get_password_hash, passwords)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Crear un token JWT"""
     to_encode = data.copy()
@@ -32,41 +51,75 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
-    to_encode.update({"exp": expire})
+    to_encode.update({"exp": expire, "iat": datetime.utcnow()})
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Obtener el usuario actual desde el token"""
+async def _estado_usuario(db: AsyncSession, user_id: int) -> Optional[EstadoUsuario]:
+    """Versión de token y estado activo del usuario, desde memoria o la base de datos"""
+    estado = estado_usuarios.obtener(user_id)
+    if estado is not None:
+        return estado
+    result = await db.execute(select(User.token_version, User.is_active).where(User.id == user_id))
+    fila = result.first()
+    if fila is None:
+        return None
+    return estado_usuarios.guardar(user_id, fila.token_version, bool(fila.is_active))
+
+def _verificar_token(token: str) -> Optional[TokenVerificado]:
+    """Verificar firma y vencimiento y armar el principal desde los claims"""
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        token_data = TokenData(username=payload.get("sub"))
+        principal = Principal(
+            id=int(payload["uid"]),
+            username=token_data.username,
+            permiso=PermisoEnum(payload["permiso"]),
+            is_active=True
+        )
+        return TokenVerificado(principal, int(payload["ver"]), float(payload["exp"]))
+    except (JWTError, KeyError, TypeError, ValueError):
+        # Incluye tokens emitidos antes de los claims uid/permiso/ver
+        return None
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
+    """
+    Obtener el usuario actual desde el token.
+    
+    El id y el permiso vienen en los claims del token; un token ya verificado
+    se toma de la caché sin volver a comprobar la firma. Solo se consulta la
+    base de datos para releer la versión de token del usuario cuando venció
+    su entrada en memoria (ver app.core.cache_principales). Un token cuya
+    versión no coincide con la del usuario fue revocado.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="No se pudo validar las credenciales",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+    verificado = cache_tokens.obtener(token)
+    if verificado is None:
+        verificado = _verificar_token(token)
+        if verificado is None:
             raise credentials_exception
-        token_data = TokenData(username=username)
-    except JWTError:
-        raise credentials_exception
+        cache_tokens.guardar(token, verificado)
     
-    user = db.query(User).filter(User.username == token_data.username).first()
-    if user is None:
+    estado = await _estado_usuario(db, verificado.principal.id)
+    if estado is None or estado.version != verificado.version:
         raise credentials_exception
-    return user
+    if estado.activo:
+        return verificado.principal
+    return verificado.principal._replace(is_active=False)
 
-def get_current_active_user(current_user: User = Depends(get_current_user)):
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Verificar que el usuario esté activo"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuario inactivo")
     return current_user
 
-def get_current_admin_user(current_user: User = Depends(get_current_active_user)):
+async def get_current_admin_user(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     """Verificar que el usuario sea admin"""
-    from app.models.user import PermisoEnum
     if current_user.permiso != PermisoEnum.admin:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
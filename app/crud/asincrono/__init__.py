@@ -0,0 +1,8 @@
+"""
+Variantes asíncronas de los módulos CRUD, para los endpoints `async def`.
+
+Reciben una AsyncSession (ver `get_async_db`) y esperan cada consulta con
+await, de modo que el event loop sigue atendiendo otras peticiones mientras
+la base de datos responde. Las relaciones que se serializan en la respuesta
+se cargan explícitamente (selectinload): en async no hay carga perezosa.
+"""
@@ -0,0 +1,115 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from app.crud.evento import ORDEN_EVENTOS
+from app.crud.paginacion import Pagina, paginar_async
+from app.models.evento import Evento, evento_usuarios
+from app.models.user import User
+from app.schemas.evento import EventoCreate, EventoUpdate
+from typing import List, Optional
+from datetime import date
+
+# EventoResponse incluye a las personas inscritas
+CON_INSCRITOS = selectinload(Evento.personas_inscritas)
+
+async def get_evento_by_id(db: AsyncSession, evento_id: int):
+    """Obtener evento por ID (con sus personas inscritas)"""
+    result = await db.execute(
+        select(Evento)
+        .where(Evento.id == evento_id)
+        .options(CON_INSCRITOS)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+async def get_eventos(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 100,
+    tipo: Optional[str] = None,
+    fecha_desde: Optional[date] = None,
+    cursor: Optional[str] = None
+) -> Pagina:
+    """Obtener una página de eventos con filtros opcionales (paginación por cursor)"""
+    stmt = select(Evento).options(CON_INSCRITOS)
+    
+    if tipo:
+        stmt = stmt.where(Evento.tipo == tipo)
+    
+    if fecha_desde:
+        stmt = stmt.where(Evento.fecha >= fecha_desde)
+    
+    return await paginar_async(db, stmt, ORDEN_EVENTOS, limit=limit, cursor=cursor, skip=skip)
+
+async def create_evento(db: AsyncSession, evento: EventoCreate, creado_por_id: int):
+    """Crear un nuevo evento (solo admins)"""
+    db_evento = Evento(
+        titulo=evento.titulo,
+        descripcion=evento.descripcion,
+        fecha=evento.fecha,
+        hora=evento.hora,
+        lugar=evento.lugar,
+        duracion=evento.duracion,
+        requisitos=evento.requisitos,
+        tipo=evento.tipo,
+        creado_por_id=creado_por_id
+    )
+    db.add(db_evento)
+    await db.commit()
+    # Recargar con los valores generados por la base de datos y las inscripciones
+    return await get_evento_by_id(db, db_evento.id)
+
+async def update_evento(db: AsyncSession, evento_id: int, evento_data: EventoUpdate):
+    """Actualizar datos de evento"""
+    evento = await get_evento_by_id(db, evento_id)
+    if evento:
+        update_data = evento_data.model_dump(exclude_unset=True)
+        for key, value in update_data.items():
+            if value is not None:
+                setattr(evento, key, value)
+        await db.commit()
+        evento = await get_evento_by_id(db, evento_id)
+    return evento
+
+async def delete_evento(db: AsyncSession, evento_id: int):
+    """Eliminar evento"""
+    evento = await get_evento_by_id(db, evento_id)
+    if evento:
+        await db.delete(evento)
+        await db.commit()
+    return evento
+
+async def inscribir_usuario(db: AsyncSession, evento_id: int, user_id: int):
+    """Inscribir un usuario a un evento"""
+    evento = await get_evento_by_id(db, evento_id)
+    user = await db.get(User, user_id)
+    
+    if evento and user:
+        # Verificar si ya está inscrito
+        if user not in evento.personas_inscritas:
+            evento.personas_inscritas.append(user)
+            await db.commit()
+            evento = await get_evento_by_id(db, evento_id)
+    return evento
+
+async def desinscribir_usuario(db: AsyncSession, evento_id: int, user_id: int):
+    """Desinscribir un usuario de un evento"""
+    evento = await get_evento_by_id(db, evento_id)
+    user = await db.get(User, user_id)
+    
+    if evento and user:
+        if user in evento.personas_inscritas:
+            evento.personas_inscritas.remove(user)
+            await db.commit()
+            evento = await get_evento_by_id(db, evento_id)
+    return evento
+
+async def get_eventos_usuario(db: AsyncSession, user_id: int) -> List[Evento]:
+    """Obtener eventos en los que está inscrito un usuario"""
+    result = await db.execute(
+        select(Evento)
+        .join(evento_usuarios, evento_usuarios.c.evento_id == Evento.id)
+        .where(evento_usuarios.c.user_id == user_id)
+        .options(CON_INSCRITOS)
+    )
+    return list(result.scalars().all())
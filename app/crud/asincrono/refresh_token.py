@@ -0,0 +1,125 @@
+"""
+Refresh tokens con rotación.
+
+El token es un valor aleatorio de 256 bits; en la tabla solo se guarda su
+SHA-256 (al tener tanta entropía no necesita bcrypt, y verificarlo es una
+búsqueda por índice). Cada canje revoca el token presentado y emite otro de
+la misma familia. Presentar un token ya canjeado significa que alguien más
+lo usó: se revoca la familia completa y ambos deben iniciar sesión de nuevo.
+"""
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from typing import Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.revocacion import revocaciones_refresh
+from app.models.refresh_token import RefreshToken
+from app.models.user import User
+
+
+class RefreshTokenInvalido(Exception):
+    """El refresh token no existe, venció o fue revocado"""
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _nuevo(user: User, familia: str) -> Tuple[str, RefreshToken]:
+    token = secrets.token_urlsafe(32)
+    registro = RefreshToken(
+        user_id=user.id,
+        token_hash=hash_token(token),
+        familia=familia,
+        token_version=user.token_version,
+        expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+    return token, registro
+
+
+async def _revocar_familia(db: AsyncSession, familia: str) -> None:
+    await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.familia == familia, RefreshToken.revocado.is_(False))
+        .values(revocado=True)
+    )
+    await db.commit()
+
+
+async def emitir(db: AsyncSession, user: User) -> str:
+    """Emitir el refresh token de un nuevo inicio de sesión (familia nueva)"""
+    # Los refresh tokens vencidos del usuario ya no sirven: se eliminan aquí
+    await db.execute(
+        delete(RefreshToken).where(RefreshToken.user_id == user.id, RefreshToken.expires_at < datetime.utcnow())
+    )
+    token, registro = _nuevo(user, secrets.token_hex(16))
+    db.add(registro)
+    await db.commit()
+    return token
+
+
+async def rotar(db: AsyncSession, token: str) -> Tuple[User, str]:
+    """
+    Canjear un refresh token por otro de la misma familia.
+    Retorna el usuario y el nuevo token; lanza RefreshTokenInvalido.
+    """
+    token_hash = hash_token(token)
+    familia = revocaciones_refresh.familia_revocada(token_hash)
+    if familia is not None:
+        await _revocar_familia(db, familia)
+        raise RefreshTokenInvalido()
+    
+    result = await db.execute(
+        select(RefreshToken, User)
+        .join(User, User.id == RefreshToken.user_id)
+        .where(RefreshToken.token_hash == token_hash)
+    )
+    fila = result.first()
+    if fila is None:
+        raise RefreshTokenInvalido()
+    registro, user = fila
+    
+    if registro.revocado:
+        revocaciones_refresh.agregar(token_hash, registro.familia)
+        await _revocar_familia(db, registro.familia)
+        raise RefreshTokenInvalido()
+    # Un cambio de versión de token del usuario también invalida sus refresh tokens
+    if (
+        registro.expires_at <= datetime.utcnow()
+        or not user.is_active
+        or registro.token_version != user.token_version
+    ):
+        raise RefreshTokenInvalido()
+    
+    # Solo una de dos peticiones simultáneas con el mismo token puede canjearlo
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == registro.id, RefreshToken.revocado.is_(False))
+        .values(revocado=True)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        await db.rollback()
+        await _revocar_familia(db, registro.familia)
+        raise RefreshTokenInvalido()
+    
+    nuevo, siguiente = _nuevo(user, registro.familia)
+    db.add(siguiente)
+    await db.commit()
+    revocaciones_refresh.agregar(token_hash, registro.familia)
+    return user, nuevo
+
+
+async def revocar(db: AsyncSession, token: str) -> None:
+    """Cerrar sesión: revocar la familia del refresh token"""
+    token_hash = hash_token(token)
+    result = await db.execute(select(RefreshToken.familia).where(RefreshToken.token_hash == token_hash))
+    familia = result.scalar_one_or_none()
+    if familia is None:
+        return
+    revocaciones_refresh.agregar(token_hash, familia)
+    await _revocar_familia(db, familia)
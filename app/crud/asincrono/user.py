@@ -0,0 +1,149 @@
+from typing import List, Optional
+from sqlalchemy import insert, or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.crud.paginacion import Pagina, paginar_async
+from app.crud.user import CAMPOS_AUTORIZACION, UsuarioDuplicado, campo_duplicado
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.core.cache_principales import actualizar_usuario, olvidar_usuario
+from app.core.security import get_password_hash_async, get_password_hashes
+
+async def get_user_by_email(db: AsyncSession, email: str):
+    """Obtener usuario por email"""
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+async def get_user_by_username(db: AsyncSession, username: str):
+    """Obtener usuario por username"""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
+
+async def get_user_by_id(db: AsyncSession, user_id: int):
+    """Obtener usuario por ID"""
+    return await db.get(User, user_id)
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Pagina:
+    """Obtener una página de usuarios ordenada por ID (paginación por cursor)"""
+    return await paginar_async(db, select(User), [(User.id, False)], limit=limit, cursor=cursor, skip=skip)
+
+async def create_user(db: AsyncSession, user: UserCreate):
+    """
+    Crear un nuevo usuario con un solo INSERT: los índices únicos detectan el
+    email o username repetido (UsuarioDuplicado) sin consultarlos antes.
+    """
+    hashed_password = await get_password_hash_async(user.password)
+    db_user = User(
+        email=user.email,
+        username=user.username,
+        hashed_password=hashed_password,
+        full_name=user.full_name,
+        permiso=user.permiso
+    )
+    db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        campo = campo_duplicado(e)
+        if campo is None:
+            raise
+        raise UsuarioDuplicado(campo)
+    # created_at lo asigna la base de datos
+    await db.refresh(db_user)
+    return db_user
+
+async def create_users_bulk(db: AsyncSession, usuarios: List[UserCreate]) -> dict:
+    """
+    Crear varios usuarios con un INSERT por lotes.
+    
+    Los que repiten un email o username (existente o de otra fila) se omiten
+    y se retornan en `duplicados`. Las contraseñas de los demás se hashean en
+    paralelo en el pool de procesos. Lanza UsuarioDuplicado si otra petición
+    registró alguno mientras tanto y ColaHashLlena si hay otra alta masiva en curso.
+    """
+    if not usuarios:
+        return {"creados": 0, "duplicados": []}
+    
+    result = await db.execute(
+        select(User.email, User.username).where(or_(
+            User.email.in_([u.email for u in usuarios]),
+            User.username.in_([u.username for u in usuarios])
+        ))
+    )
+    vistos = set()
+    for email, username in result:
+        vistos.add(("email", email.lower()))
+        vistos.add(("username", username.lower()))
+    
+    nuevos, duplicados = [], []
+    for usuario in usuarios:
+        claves = {("email", usuario.email.lower()), ("username", usuario.username.lower())}
+        if claves & vistos:
+            duplicados.append(usuario.username)
+            continue
+        vistos |= claves
+        nuevos.append(usuario)
+    if not nuevos:
+        return {"creados": 0, "duplicados": duplicados}
+    
+    hashes = await get_password_hashes([u.password for u in nuevos])
+    await db.execute(insert(User.__table__), [
+        {
+            "email": u.email,
+            "username": u.username,
+            "hashed_password": hashed_password,
+            "full_name": u.full_name,
+            "permiso": u.permiso
+        }
+        for u, hashed_password in zip(nuevos, hashes)
+    ])
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        campo = campo_duplicado(e)
+        if campo is None:
+            raise
+        raise UsuarioDuplicado(campo)
+    return {"creados": len(nuevos), "duplicados": duplicados}
+
+async def update_password_hash(db: AsyncSession, user: User, hashed_password: str):
+    """Guardar el hash recalculado de la contraseña (por ejemplo, con otro costo de bcrypt)"""
+    user.hashed_password = hashed_password
+    await db.commit()
+
+async def update_user(db: AsyncSession, user_id: int, user_data: dict):
+    """Actualizar datos de usuario"""
+    user = await get_user_by_id(db, user_id)
+    if user:
+        revocar = False
+        for key, value in user_data.items():
+            if hasattr(user, key) and value is not None:
+                revocar = revocar or (key in CAMPOS_AUTORIZACION and getattr(user, key) != value)
+                setattr(user, key, value)
+        if revocar:
+            user.token_version = User.token_version + 1
+        await db.commit()
+        await db.refresh(user)
+        actualizar_usuario(user.id, user.token_version, bool(user.is_active))
+    return user
+
+async def revocar_tokens(db: AsyncSession, user_id: int):
+    """Invalidar todos los tokens emitidos al usuario"""
+    user = await get_user_by_id(db, user_id)
+    if user:
+        user.token_version = User.token_version + 1
+        await db.commit()
+        await db.refresh(user)
+        actualizar_usuario(user.id, user.token_version, bool(user.is_active))
+    return user
+
+async def delete_user(db: AsyncSession, user_id: int):
+    """Eliminar usuario"""
+    user = await get_user_by_id(db, user_id)
+    if user:
+        await db.delete(user)
+        await db.commit()
+        olvidar_usuario(user.id)
+    return user
@@ -0,0 +1,118 @@
+"""
+Mantenimiento de los catálogos de estados, municipios y especies.
+
+Los catálogos se llenan con las claves que traen las propias observaciones
+(`entid`, `munid`, `id_nombre_cat_valido`); el primer nombre visto para una
+clave es el que se guarda. `registrar_filas` no hace commit: se llama desde
+el CRUD de observaciones antes de confirmar la inserción, como el resumen
+de estadísticas.
+"""
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, exists, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.catalogos import catalogos, normalizar
+from app.models.catalogo_naturalista import EspecieCatalogo, EstadoCatalogo, MunicipioCatalogo
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+
+def _insertar_nuevos(db: Session, modelo, clave, registros: Dict) -> int:
+    """Insertar los registros cuya clave aún no está en el catálogo"""
+    if not registros:
+        return 0
+    existentes = set(db.execute(select(clave).where(clave.in_(list(registros)))).scalars())
+    nuevos = [registro for valor, registro in registros.items() if valor not in existentes]
+    if not nuevos:
+        return 0
+    # IGNORE: otra importación concurrente pudo registrar la misma clave
+    db.execute(
+        insert(modelo.__table__)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite"),
+        nuevos
+    )
+    return len(nuevos)
+
+
+def registrar_filas(db: Session, filas: Iterable[dict]) -> None:
+    """Agregar a los catálogos los estados, municipios y especies nuevos de `filas`"""
+    estados: Dict[int, dict] = {}
+    municipios: Dict[int, dict] = {}
+    especies: Dict[str, dict] = {}
+
+    for fila in filas:
+        entid, estado = fila.get("entid"), fila.get("estado")
+        if entid is not None and estado and entid not in estados:
+            estados[entid] = {"entid": entid, "nombre": estado, "nombre_normalizado": normalizar(estado)}
+
+        munid, municipio = fila.get("munid"), fila.get("municipio")
+        if munid is not None and municipio and munid not in municipios:
+            municipios[munid] = {
+                "munid": munid,
+                "entid": entid,
+                "nombre": municipio,
+                "nombre_normalizado": normalizar(municipio)
+            }
+
+        id_especie, especie = fila.get("id_nombre_cat_valido"), fila.get("especie_valida_busqueda")
+        if id_especie and especie and id_especie not in especies:
+            especies[id_especie] = {
+                "id_nombre_cat_valido": id_especie,
+                "nombre": especie,
+                "nombre_normalizado": normalizar(especie)
+            }
+
+    nuevos = (
+        _insertar_nuevos(db, EstadoCatalogo, EstadoCatalogo.entid, estados)
+        + _insertar_nuevos(db, MunicipioCatalogo, MunicipioCatalogo.munid, municipios)
+        + _insertar_nuevos(db, EspecieCatalogo, EspecieCatalogo.id_nombre_cat_valido, especies)
+    )
+    if nuevos:
+        catalogos.invalidar()
+
+
+def reconstruir(db: Session, tamano_lote: int = 10000) -> dict:
+    """Reconstruir los catálogos desde observaciones_naturalista y confirmar"""
+    db.execute(delete(EstadoCatalogo))
+    db.execute(delete(MunicipioCatalogo))
+    db.execute(delete(EspecieCatalogo))
+
+    filas = db.execute(
+        select(
+            ObservacionNaturalista.entid,
+            ObservacionNaturalista.estado,
+            ObservacionNaturalista.munid,
+            ObservacionNaturalista.municipio,
+            ObservacionNaturalista.id_nombre_cat_valido,
+            ObservacionNaturalista.especie_valida_busqueda
+        ).distinct()
+    ).mappings().all()
+    for inicio in range(0, len(filas), tamano_lote):
+        registrar_filas(db, filas[inicio:inicio + tamano_lote])
+
+    db.commit()
+    catalogos.invalidar()
+    return {
+        "estados": db.query(EstadoCatalogo).count(),
+        "municipios": db.query(MunicipioCatalogo).count(),
+        "especies": db.query(EspecieCatalogo).count()
+    }
+
+
+def asegurar_catalogos(db: Session) -> Optional[dict]:
+    """
+    Reconstruir los catálogos si alguno está vacío y hay observaciones con
+    su clave (por ejemplo, después de cargar sql_completo_naturalista.sql).
+    Retorna los totales si se reconstruyeron.
+    """
+    pendientes = (
+        (EstadoCatalogo, ObservacionNaturalista.entid),
+        (MunicipioCatalogo, ObservacionNaturalista.munid),
+        (EspecieCatalogo, ObservacionNaturalista.id_nombre_cat_valido),
+    )
+    for modelo, clave in pendientes:
+        vacio = not db.execute(select(exists().select_from(modelo))).scalar()
+        if vacio and db.execute(select(exists().where(clave.isnot(None)))).scalar():
+            return reconstruir(db)
+    return None
@@ -0,0 +1,152 @@
+"""
+Resumen incremental de estadísticas de observaciones de Naturalista.
+
+La tabla estadisticas_naturalista guarda un conteo por dimensión (total,
+estado, municipio y año). Las funciones de este módulo no hacen commit:
+se llaman desde el CRUD de observaciones antes de confirmar la inserción o
+eliminación, para que el resumen quede en la misma transacción.
+"""
+from collections import Counter
+from datetime import date
+from typing import Iterable, Optional
+
+from sqlalchemy import extract, func, select, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+
+from app.models.estadistica_naturalista import EstadisticaNaturalista
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+DIMENSION_TOTAL = "total"
+DIMENSION_ESTADO = "estado"
+DIMENSION_MUNICIPIO = "municipio"
+DIMENSION_ANIO = "anio"
+
+
+def _claves(estado: Optional[str], municipio: Optional[str], fecha_colecta: Optional[date]):
+    """Claves (dimensión, valor) a las que contribuye una observación"""
+    yield DIMENSION_TOTAL, ""
+    if estado:
+        yield DIMENSION_ESTADO, estado
+    if municipio:
+        yield DIMENSION_MUNICIPIO, municipio
+    if fecha_colecta:
+        yield DIMENSION_ANIO, str(fecha_colecta.year)
+
+
+def aplicar_filas(db: Session, filas: Iterable[dict], signo: int = 1) -> None:
+    """Sumar (signo=1) o restar (signo=-1) filas de columnas al resumen"""
+    deltas = Counter()
+    for fila in filas:
+        for clave in _claves(fila.get("estado"), fila.get("municipio"), fila.get("fecha_colecta")):
+            deltas[clave] += signo
+    _aplicar_deltas(db, deltas)
+
+
+def aplicar_observacion(db: Session, observacion: ObservacionNaturalista, signo: int = 1) -> None:
+    """Sumar o restar una observación del modelo al resumen"""
+    deltas = Counter(
+        {clave: signo for clave in _claves(observacion.estado, observacion.municipio, observacion.fecha_colecta)}
+    )
+    _aplicar_deltas(db, deltas)
+
+
+def _aplicar_deltas(db: Session, deltas: Counter) -> None:
+    deltas = {clave: delta for clave, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    tabla = EstadisticaNaturalista.__table__
+    valores = [
+        {"dimension": dimension, "valor": valor, "total": delta}
+        for (dimension, valor), delta in deltas.items()
+    ]
+
+    if db.get_bind().dialect.name == "mysql":
+        # Un solo INSERT ... ON DUPLICATE KEY UPDATE: el incremento es atómico
+        stmt = mysql_insert(tabla).values(valores)
+        db.execute(stmt.on_duplicate_key_update(total=tabla.c.total + stmt.inserted.total))
+        return
+
+    for fila in valores:
+        result = db.execute(
+            update(tabla)
+            .where(tabla.c.dimension == fila["dimension"], tabla.c.valor == fila["valor"])
+            .values(total=tabla.c.total + fila["total"])
+        )
+        if result.rowcount == 0:
+            db.execute(tabla.insert().values(**fila))
+
+
+def vaciar(db: Session) -> None:
+    """Dejar el resumen en cero (la tabla de observaciones quedó vacía)"""
+    db.query(EstadisticaNaturalista).delete()
+    db.add(EstadisticaNaturalista(dimension=DIMENSION_TOTAL, valor="", total=0))
+
+
+def reconstruir(db: Session) -> int:
+    """
+    Recalcular el resumen completo a partir de observaciones_naturalista.
+
+    Sirve para reconciliar el resumen si la tabla se modificó por fuera de la
+    API (por ejemplo, cargando sql_completo_naturalista.sql). Confirma la
+    transacción y retorna el total de observaciones.
+    """
+    obs = ObservacionNaturalista
+    conteos = Counter()
+    conteos[(DIMENSION_TOTAL, "")] = db.query(func.count(obs.id)).scalar() or 0
+
+    for estado, total in db.query(obs.estado, func.count(obs.id)).filter(
+        obs.estado.isnot(None), obs.estado != ""
+    ).group_by(obs.estado):
+        conteos[(DIMENSION_ESTADO, estado)] = total
+
+    for municipio, total in db.query(obs.municipio, func.count(obs.id)).filter(
+        obs.municipio.isnot(None), obs.municipio != ""
+    ).group_by(obs.municipio):
+        conteos[(DIMENSION_MUNICIPIO, municipio)] = total
+
+    anio = extract("year", obs.fecha_colecta).label("anio")
+    for valor, total in db.query(anio, func.count(obs.id)).filter(
+        obs.fecha_colecta.isnot(None)
+    ).group_by(anio):
+        conteos[(DIMENSION_ANIO, str(int(valor)))] = total
+
+    db.query(EstadisticaNaturalista).delete()
+    db.execute(
+        EstadisticaNaturalista.__table__.insert(),
+        [{"dimension": d, "valor": v, "total": t} for (d, v), t in conteos.items()]
+    )
+    db.commit()
+    return conteos[(DIMENSION_TOTAL, "")]
+
+
+def asegurar_resumen(db: Session) -> Optional[int]:
+    """
+    Reconstruir el resumen si nunca se ha calculado (no existe la fila de
+    total). Se llama al iniciar la API. Retorna el total si se reconstruyó.
+    """
+    existe = db.execute(
+        select(EstadisticaNaturalista.id).where(EstadisticaNaturalista.dimension == DIMENSION_TOTAL).limit(1)
+    ).first()
+    if existe is not None:
+        return None
+    return reconstruir(db)
+
+
+def obtener_resumen(db: Session) -> dict:
+    """
+    Leer el resumen como `{dimension: {valor: total}}`.
+
+    Solo lee: si el resumen no se ha calculado todavía, los totales salen en
+    cero (ver asegurar_resumen).
+    """
+    filas = db.execute(
+        select(EstadisticaNaturalista.dimension, EstadisticaNaturalista.valor, EstadisticaNaturalista.total)
+    ).all()
+
+    resumen = {DIMENSION_TOTAL: {"": 0}, DIMENSION_ESTADO: {}, DIMENSION_MUNICIPIO: {}, DIMENSION_ANIO: {}}
+    for dimension, valor, total in filas:
+        if total > 0 or dimension == DIMENSION_TOTAL:
+            resumen.setdefault(dimension, {})[valor] = total
+    return resumen
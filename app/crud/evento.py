@@ -1,10 +1,18 @@
 from sqlalchemy.orm import Session
+from app.crud.paginacion import Pagina, paginar
 from app.models.evento import Evento
 from app.models.user import User
 from app.schemas.evento import EventoCreate, EventoUpdate
 from typing import List, Optional
 from datetime import date
 
+# Más recientes primero, desempate por ID (índice idx_eventos_fecha_hora_id)
+ORDEN_EVENTOS = [
+    (Evento.fecha, True),
+    (Evento.hora, True),
+    (Evento.id, True),
+]
+
 def get_evento_by_id(db: Session, evento_id: int):
     """Obtener evento por ID"""
     return db.query(Evento).filter(Evento.id == evento_id).first()
@@ -14,9 +22,10 @@ def get_eventos(
     skip: int = 0, 
     limit: int = 100,
     tipo: Optional[str] = None,
-    fecha_desde: Optional[date] = None
-):
-    """Obtener lista de eventos con filtros opcionales"""
+    fecha_desde: Optional[date] = None,
+    cursor: Optional[str] = None
+) -> Pagina:
+    """Obtener una página de eventos con filtros opcionales (paginación por cursor)"""
     query = db.query(Evento)
     
     if tipo:
@@ -25,7 +34,7 @@ def get_eventos(
     if fecha_desde:
         query = query.filter(Evento.fecha >= fecha_desde)
     
-    return query.order_by(Evento.fecha.desc(), Evento.hora.desc()).offset(skip).limit(limit).all()
+    return paginar(query, ORDEN_EVENTOS, limit=limit, cursor=cursor, skip=skip)
 
 def create_evento(db: Session, evento: EventoCreate, creado_por_id: int):
     """Crear un nuevo evento (solo admins)"""
@@ -1,9 +1,17 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session, joinedload
+from app.crud.paginacion import Pagina, paginar
 from app.models.observacion import Observacion
 from app.schemas.observacion import ObservacionCreate, ObservacionUpdate
-from typing import List, Optional
+from typing import Iterator, List, Optional
 from datetime import date
 
+# Más recientes primero, desempate por ID (índices idx_obs_fecha_id e idx_obs_user_fecha_id)
+ORDEN_OBSERVACIONES = [
+    (Observacion.fecha_observacion, True),
+    (Observacion.id, True),
+]
+
 def crear_observacion(db: Session, observacion: ObservacionCreate, user_id: int) -> Observacion:
     """Crear una nueva observación"""
     # Convertir los enums a sus valores de string para guardar en JSON
@@ -47,11 +55,24 @@ def obtener_observaciones(
     user_id: Optional[int] = None,
     fecha_inicio: Optional[date] = None,
     fecha_fin: Optional[date] = None,
+    comunidad: Optional[str] = None,
+    cursor: Optional[str] = None
+) -> Pagina:
+    """Obtener una página de observaciones con filtros opcionales (paginación por cursor)"""
+    query = _filtrar(
+        db.query(Observacion).options(joinedload(Observacion.usuario)),
+        user_id, fecha_inicio, fecha_fin, comunidad
+    )
+    return paginar(query, ORDEN_OBSERVACIONES, limit=limit, cursor=cursor, skip=skip)
+
+def _filtrar(
+    query,
+    user_id: Optional[int] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
     comunidad: Optional[str] = None
-) -> List[Observacion]:
-    """Obtener lista de observaciones con filtros opcionales"""
-    query = db.query(Observacion).options(joinedload(Observacion.usuario))
-    
+):
+    """Filtros del listado; `query` puede ser un Query del ORM o un select()"""
     if user_id:
         query = query.filter(Observacion.user_id == user_id)
     if fecha_inicio:
@@ -60,16 +81,44 @@ def obtener_observaciones(
         query = query.filter(Observacion.fecha_observacion <= fecha_fin)
     if comunidad:
         query = query.filter(Observacion.comunidad.ilike(f"%{comunidad}%"))
+    return query
+
+# Columnas de la exportación y las que se codifican como diccionario (los
+# enums ya se codifican así por su tipo)
+COLUMNAS_EXPORTACION = list(Observacion.__table__.columns)
+COLUMNAS_DICCIONARIO = ["comunidad"]
+
+def iterar_exportacion(
+    db: Session,
+    user_id: Optional[int] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    comunidad: Optional[str] = None,
+    tamano_lote: int = 1000
+) -> Iterator[dict]:
+    """Recorrer las observaciones filtradas, ordenadas por ID, con un cursor del lado del servidor"""
+    stmt = _filtrar(
+        select(*COLUMNAS_EXPORTACION),
+        user_id, fecha_inicio, fecha_fin, comunidad
+    ).order_by(Observacion.id).execution_options(yield_per=tamano_lote)
     
-    return query.offset(skip).limit(limit).all()
+    for fila in db.execute(stmt).mappings():
+        yield fila
 
 def obtener_observacion_por_id(db: Session, observacion_id: int) -> Optional[Observacion]:
     """Obtener una observación específica por ID"""
     return db.query(Observacion).options(joinedload(Observacion.usuario)).filter(Observacion.id == observacion_id).first()
 
-def obtener_observaciones_usuario(db: Session, user_id: int, skip: int = 0, limit: int = 100) -> List[Observacion]:
-    """Obtener todas las observaciones de un usuario específico"""
-    return db.query(Observacion).filter(Observacion.user_id == user_id).offset(skip).limit(limit).all()
+def obtener_observaciones_usuario(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None
+) -> Pagina:
+    """Obtener una página de las observaciones de un usuario específico (paginación por cursor)"""
+    query = db.query(Observacion).filter(Observacion.user_id == user_id)
+    return paginar(query, ORDEN_OBSERVACIONES, limit=limit, cursor=cursor, skip=skip)
 
 def actualizar_observacion(
     db: Session,
@@ -1,9 +1,54 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func, extract
+from sqlalchemy import Integer, and_, cast, func, insert, or_, select
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError
+from app.core.cache_respuestas import version_datos
+from app.core.catalogos import CATALOGO_ESPECIES, CATALOGO_ESTADOS, CATALOGO_MUNICIPIOS, catalogos
+from app.core.config import settings
+from app.core.indice_espacial import indice_observaciones
+from app.core.formato_mapa import ESCALA_COORDENADAS
+from app.core.geo import NIVEL_MAXIMO, celda_mapa, nivel_para_zoom, rangos_celdas
+from app.crud import catalogo_naturalista as crud_catalogos
+from app.crud import estadistica_naturalista as crud_estadisticas
+from app.crud.paginacion import Pagina, paginar
 from app.models.observacion_naturalista import ObservacionNaturalista
 from app.schemas.observacion_naturalista import ObservacionNaturalistaCreate
-from typing import List, Optional
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import date
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Mensajes de error que se conservan por importación; `errores` lleva el total
+MAX_MENSAJES_ERROR = 100
+
+# Ordenamiento del listado público: más recientes primero, desempate por ID
+ORDEN_LISTADO = [
+    (ObservacionNaturalista.fecha_colecta, True),
+    (ObservacionNaturalista.id, True),
+]
+
+# (min_lon, min_lat, max_lon, max_lat)
+BBox = Tuple[float, float, float, float]
+
+
+def _filtrar_bbox(query, bbox: BBox):
+    """
+    Filtrar las observaciones dentro de un rectángulo.
+    
+    El rectángulo se cubre con unos cuantos rangos de `celda_mapa` (orden Z),
+    que MySQL resuelve como rangos sobre idx_obs_nat_celda, y después se
+    filtra por las coordenadas exactas. Las observaciones sin celda calculada
+    no se incluyen (ver scripts/asignar_celdas_mapa.py).
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox
+    return query.filter(
+        or_(*[
+            ObservacionNaturalista.celda_mapa.between(inicio, fin)
+            for inicio, fin in rangos_celdas(min_lon, min_lat, max_lon, max_lat)
+        ]),
+        ObservacionNaturalista.latitud.between(min_lat, max_lat),
+        ObservacionNaturalista.longitud.between(min_lon, max_lon)
+    )
 
 
 def crear_observacion(db: Session, observacion: ObservacionNaturalistaCreate) -> ObservacionNaturalista:
@@ -20,6 +65,7 @@ def crear_observacion(db: Session, observacion: ObservacionNaturalistaCreate) ->
         ecorid=observacion.ecorid,
         latitud=observacion.latitud,
         longitud=observacion.longitud,
+        celda_mapa=celda_mapa(observacion.latitud, observacion.longitud),
         localidad=observacion.localidad,
         municipio=observacion.municipio,
         estado=observacion.estado,
@@ -41,75 +87,152 @@ def crear_observacion(db: Session, observacion: ObservacionNaturalistaCreate) ->
     )
     
     db.add(db_observacion)
+    crud_catalogos.registrar_filas(db, [observacion.model_dump()])
+    crud_estadisticas.aplicar_observacion(db, db_observacion)
     db.commit()
+    version_datos.incrementar()
     db.refresh(db_observacion)
+    if indice_observaciones.cargado:
+        indice_observaciones.agregar([(db_observacion.id, db_observacion.latitud, db_observacion.longitud)])
     return db_observacion
 
 
-def crear_observaciones_bulk(db: Session, observaciones: List[ObservacionNaturalistaCreate]) -> dict:
-    """Crear múltiples observaciones de forma eficiente"""
-    insertados = 0
-    duplicados = 0
-    errores = 0
-    mensajes_error = []
+def crear_observaciones_bulk(
+    db: Session,
+    observaciones: Iterable[Union[ObservacionNaturalistaCreate, dict]],
+    chunk_size: Optional[int] = None,
+    progreso: Optional[Callable[[dict], None]] = None
+) -> dict:
+    """
+    Crear múltiples observaciones de forma eficiente.
     
+    Los registros se procesan en lotes de `chunk_size` (por defecto
+    NATURALISTA_IMPORT_CHUNK_SIZE). Por cada lote se hace una sola consulta
+    `id_ejemplar IN (...)` para descartar duplicados y un único INSERT
+    multi-fila para el resto; el resumen de estadísticas se actualiza en la
+    misma transacción del lote. Si se indica `progreso`, se llama con los
+    contadores acumulados después de cada lote.
+    
+    Acepta schemas o diccionarios de columnas ya validados (ver
+    `validar_lote_conabio`).
+    """
+    chunk_size = chunk_size or settings.NATURALISTA_IMPORT_CHUNK_SIZE
+    resultado = {
+        "insertados": 0,
+        "duplicados": 0,
+        "errores": 0,
+        "mensajes_error": []
+    }
+    
+    def procesar(lote: List[dict]):
+        insertados = resultado["insertados"]
+        _procesar_lote(db, lote, resultado)
+        # Cada lote confirmado invalida la caché de respuestas públicas
+        if resultado["insertados"] > insertados:
+            version_datos.incrementar()
+        if progreso:
+            progreso(resultado)
+    
+    lote = []
     for obs in observaciones:
-        try:
-            # Verificar si ya existe
-            existe = db.query(ObservacionNaturalista).filter(
-                ObservacionNaturalista.id_ejemplar == obs.id_ejemplar
-            ).first()
-            
-            if existe:
-                duplicados += 1
-                continue
-            
-            db_observacion = ObservacionNaturalista(
-                id_ejemplar=obs.id_ejemplar,
-                id_nombre_cat_valido=obs.id_nombre_cat_valido,
-                especie_valida_busqueda=obs.especie_valida_busqueda,
-                comentarios_cat_valido=obs.comentarios_cat_valido,
-                categoria_taxonomica=obs.categoria_taxonomica,
-                entid=obs.entid,
-                munid=obs.munid,
-                anpid=obs.anpid,
-                ecorid=obs.ecorid,
-                latitud=obs.latitud,
-                longitud=obs.longitud,
-                localidad=obs.localidad,
-                municipio=obs.municipio,
-                estado=obs.estado,
-                pais=obs.pais,
-                fecha_colecta=obs.fecha_colecta,
-                colector=obs.colector,
-                coleccion=obs.coleccion,
-                probable_loc_no_de_campo=obs.probable_loc_no_de_campo,
-                ejemplar_fosil=obs.ejemplar_fosil,
-                institucion=obs.institucion,
-                pais_coleccion=obs.pais_coleccion,
-                proyecto=obs.proyecto,
-                url_proyecto=obs.url_proyecto,
-                url_ejemplar=obs.url_ejemplar,
-                url_origen=obs.url_origen,
-                id_original=obs.id_original,
-                tipo_coleccion=obs.tipo_coleccion,
-                id_nombre_cat_valido_orig=obs.id_nombre_cat_valido_orig
-            )
-            db.add(db_observacion)
-            insertados += 1
-            
-        except Exception as e:
-            errores += 1
-            mensajes_error.append(f"Error en {obs.id_ejemplar}: {str(e)}")
+        lote.append(obs if isinstance(obs, dict) else obs.model_dump())
+        if len(lote) >= chunk_size:
+            procesar(lote)
+            lote = []
     
-    db.commit()
+    if lote:
+        procesar(lote)
     
-    return {
-        "insertados": insertados,
-        "duplicados": duplicados,
-        "errores": errores,
-        "mensajes_error": mensajes_error
-    }
+    return resultado
+
+
+def _insertar_filas(db: Session, filas: List[dict]) -> int:
+    """Insertar filas con un INSERT multi-fila que ignora claves duplicadas"""
+    stmt = (
+        insert(ObservacionNaturalista.__table__)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    result = db.execute(stmt, filas)
+    # Algunos drivers no reportan rowcount en executemany
+    return result.rowcount if result.rowcount >= 0 else len(filas)
+
+
+def _procesar_lote(db: Session, filas: List[dict], resultado: dict) -> None:
+    """Deduplicar e insertar un lote, acumulando los contadores en `resultado`"""
+    # Duplicados dentro del mismo lote
+    unicas = {}
+    for fila in filas:
+        if fila["id_ejemplar"] in unicas:
+            resultado["duplicados"] += 1
+        else:
+            unicas[fila["id_ejemplar"]] = fila
+    
+    # Duplicados ya existentes en la base de datos (una sola consulta por lote)
+    existentes = set(db.execute(
+        select(ObservacionNaturalista.id_ejemplar).where(
+            ObservacionNaturalista.id_ejemplar.in_(list(unicas))
+        )
+    ).scalars())
+    resultado["duplicados"] += len(existentes)
+    
+    nuevas = [fila for id_ejemplar, fila in unicas.items() if id_ejemplar not in existentes]
+    if not nuevas:
+        return
+    
+    for fila in nuevas:
+        fila["celda_mapa"] = celda_mapa(fila["latitud"], fila["longitud"])
+    
+    try:
+        insertadas = _insertar_filas(db, nuevas)
+        if insertadas == len(nuevas):
+            crud_catalogos.registrar_filas(db, nuevas)
+            crud_estadisticas.aplicar_filas(db, nuevas)
+            db.commit()
+            resultado["insertados"] += insertadas
+            _indexar(db, nuevas)
+            return
+        # Otra importación concurrente insertó parte del lote entre el SELECT
+        # y el INSERT: no se sabe cuáles filas son nuevas, así que se reintenta
+        # fila por fila para que el resumen de estadísticas sea exacto
+        db.rollback()
+    except (IntegrityError, DataError):
+        # Alguna fila viola una restricción o no cabe en su columna; otros
+        # errores (conexión, bloqueos, esquema) se propagan y fallan el trabajo
+        logger.warning("Falló el INSERT del lote de %d filas; se reintenta fila por fila", len(nuevas), exc_info=True)
+        db.rollback()
+    except Exception:
+        db.rollback()
+        raise
+    
+    # Reintentar fila por fila para aislar los registros con error o duplicados
+    for fila in nuevas:
+        try:
+            insertadas = _insertar_filas(db, [fila])
+            if insertadas:
+                crud_catalogos.registrar_filas(db, [fila])
+                crud_estadisticas.aplicar_filas(db, [fila])
+            db.commit()
+            resultado["insertados"] += insertadas
+            resultado["duplicados"] += 1 - insertadas
+        except DBAPIError as e:
+            db.rollback()
+            resultado["errores"] += 1
+            if len(resultado["mensajes_error"]) < MAX_MENSAJES_ERROR:
+                resultado["mensajes_error"].append(f"Error en {fila['id_ejemplar']}: {str(e)}")
+    
+    _indexar(db, nuevas)
+
+
+def _indexar(db: Session, filas: List[dict]) -> None:
+    """Agregar al índice espacial las filas ya confirmadas (el INSERT multi-fila no retorna IDs)"""
+    if not indice_observaciones.cargado:
+        return
+    indice_observaciones.agregar(db.query(
+        ObservacionNaturalista.id,
+        ObservacionNaturalista.latitud,
+        ObservacionNaturalista.longitud
+    ).filter(ObservacionNaturalista.id_ejemplar.in_([fila["id_ejemplar"] for fila in filas])).all())
 
 
 def obtener_observaciones(
@@ -120,23 +243,114 @@ def obtener_observaciones(
     municipio: Optional[str] = None,
     fecha_inicio: Optional[date] = None,
     fecha_fin: Optional[date] = None,
+    especie: Optional[str] = None,
+    cursor: Optional[str] = None,
+    bbox: Optional[BBox] = None
+) -> Pagina:
+    """
+    Obtener una página de observaciones con filtros opcionales.
+    
+    Ordena por (fecha_colecta DESC, id DESC), respaldado por el índice
+    idx_obs_nat_fecha_id. Con `cursor` la página continúa después de la
+    anterior sin OFFSET; `skip` se mantiene por compatibilidad. `bbox`
+    limita el resultado a un rectángulo (ver `_filtrar_bbox`).
+    """
+    query = _filtrar_listado(
+        db,
+        db.query(ObservacionNaturalista),
+        estado, municipio, fecha_inicio, fecha_fin, especie, bbox
+    )
+    return paginar(query, ORDEN_LISTADO, limit=limit, cursor=cursor, skip=skip)
+
+
+def _filtrar_catalogos(
+    db: Session,
+    query,
+    estado: Optional[str] = None,
+    municipio: Optional[str] = None,
     especie: Optional[str] = None
-) -> List[ObservacionNaturalista]:
-    """Obtener lista de observaciones con filtros opcionales"""
-    query = db.query(ObservacionNaturalista)
-    
-    if estado:
-        query = query.filter(ObservacionNaturalista.estado.ilike(f"%{estado}%"))
-    if municipio:
-        query = query.filter(ObservacionNaturalista.municipio.ilike(f"%{municipio}%"))
+):
+    """
+    Filtrar por estado, municipio y especie.
+    
+    El texto se resuelve a claves con los catálogos en memoria (coincidencia
+    parcial sin acentos ni mayúsculas) y la consulta compara por igualdad
+    `entid`, `munid` e `id_nombre_cat_valido`, que están indexadas. Las
+    observaciones sin esa clave se siguen filtrando por texto (`ILIKE`).
+    """
+    filtros = (
+        (estado, CATALOGO_ESTADOS, ObservacionNaturalista.entid, ObservacionNaturalista.estado),
+        (municipio, CATALOGO_MUNICIPIOS, ObservacionNaturalista.munid, ObservacionNaturalista.municipio),
+        (especie, CATALOGO_ESPECIES, ObservacionNaturalista.id_nombre_cat_valido,
+         ObservacionNaturalista.especie_valida_busqueda),
+    )
+    for texto, catalogo, clave, nombre in filtros:
+        if texto:
+            query = query.filter(or_(
+                clave.in_(catalogos.resolver(db, catalogo, texto)),
+                and_(clave.is_(None), nombre.ilike(f"%{texto}%"))
+            ))
+    return query
+
+
+def _filtrar_listado(
+    db: Session,
+    query,
+    estado: Optional[str] = None,
+    municipio: Optional[str] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    especie: Optional[str] = None,
+    bbox: Optional[BBox] = None
+):
+    """Filtros del listado público; `query` puede ser un Query del ORM o un select()"""
+    query = _filtrar_catalogos(db, query, estado, municipio, especie)
     if fecha_inicio:
         query = query.filter(ObservacionNaturalista.fecha_colecta >= fecha_inicio)
     if fecha_fin:
         query = query.filter(ObservacionNaturalista.fecha_colecta <= fecha_fin)
-    if especie:
-        query = query.filter(ObservacionNaturalista.especie_valida_busqueda.ilike(f"%{especie}%"))
+    if bbox:
+        query = _filtrar_bbox(query, bbox)
+    return query
+
+
+# Columnas de la exportación: las mismas de ObservacionNaturalistaResponse
+COLUMNAS_EXPORTACION = [
+    columna for columna in ObservacionNaturalista.__table__.columns
+    if columna.key != "celda_mapa"
+]
+
+# Columnas de baja cardinalidad para la codificación de diccionario (Arrow/Parquet)
+COLUMNAS_DICCIONARIO = [
+    "especie_valida_busqueda", "id_nombre_cat_valido", "categoria_taxonomica", "municipio",
+    "estado", "pais", "coleccion", "institucion", "pais_coleccion", "proyecto"
+]
+
+
+def iterar_exportacion(
+    db: Session,
+    estado: Optional[str] = None,
+    municipio: Optional[str] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    especie: Optional[str] = None,
+    bbox: Optional[BBox] = None,
+    tamano_lote: int = 1000
+) -> Iterator[dict]:
+    """
+    Recorrer las observaciones filtradas, ordenadas por ID, como diccionarios.
+    
+    Usa un cursor del lado del servidor (`yield_per`): las filas llegan por
+    lotes de `tamano_lote` y la memoria no crece con el tamaño de la tabla.
+    """
+    stmt = _filtrar_listado(
+        db,
+        select(*COLUMNAS_EXPORTACION),
+        estado, municipio, fecha_inicio, fecha_fin, especie, bbox
+    ).order_by(ObservacionNaturalista.id).execution_options(yield_per=tamano_lote)
     
-    return query.order_by(ObservacionNaturalista.fecha_colecta.desc()).offset(skip).limit(limit).all()
+    for fila in db.execute(stmt).mappings():
+        yield fila
 
 
 def obtener_observacion_por_id(db: Session, observacion_id: int) -> Optional[ObservacionNaturalista]:
@@ -155,60 +369,27 @@ def contar_observaciones(
     municipio: Optional[str] = None
 ) -> int:
     """Contar el total de observaciones con filtros opcionales"""
-    query = db.query(ObservacionNaturalista)
-    
-    if estado:
-        query = query.filter(ObservacionNaturalista.estado.ilike(f"%{estado}%"))
-    if municipio:
-        query = query.filter(ObservacionNaturalista.municipio.ilike(f"%{municipio}%"))
-    
+    query = _filtrar_catalogos(db, db.query(ObservacionNaturalista), estado, municipio)
     return query.count()
 
 
 def obtener_estadisticas(db: Session) -> dict:
-    """Obtener estadísticas agregadas de las observaciones"""
-    
-    # Total de observaciones
-    total = db.query(ObservacionNaturalista).count()
+    """Obtener estadísticas agregadas de las observaciones desde el resumen incremental"""
+    resumen = crud_estadisticas.obtener_resumen(db)
     
-    # Por estado
-    por_estado = {}
-    estados_query = db.query(
-        ObservacionNaturalista.estado,
-        func.count(ObservacionNaturalista.id)
-    ).group_by(ObservacionNaturalista.estado).all()
+    # Los 20 municipios con más observaciones
+    por_municipio = dict(sorted(
+        resumen[crud_estadisticas.DIMENSION_MUNICIPIO].items(),
+        key=lambda item: item[1],
+        reverse=True
+    )[:20])
     
-    for estado, count in estados_query:
-        if estado:
-            por_estado[estado] = count
+    por_anio = {
+        int(anio): total
+        for anio, total in sorted(resumen[crud_estadisticas.DIMENSION_ANIO].items(), key=lambda item: int(item[0]))
+    }
     
-    # Por municipio
-    por_municipio = {}
-    municipios_query = db.query(
-        ObservacionNaturalista.municipio,
-        func.count(ObservacionNaturalista.id)
-    ).group_by(ObservacionNaturalista.municipio).order_by(
-        func.count(ObservacionNaturalista.id).desc()
-    ).limit(20).all()
-    
-    for municipio, count in municipios_query:
-        if municipio:
-            por_municipio[municipio] = count
-    
-    # Por año
-    por_anio = {}
-    anios_query = db.query(
-        extract('year', ObservacionNaturalista.fecha_colecta).label('anio'),
-        func.count(ObservacionNaturalista.id)
-    ).filter(
-        ObservacionNaturalista.fecha_colecta.isnot(None)
-    ).group_by('anio').order_by('anio').all()
-    
-    for anio, count in anios_query:
-        if anio:
-            por_anio[int(anio)] = count
-    
-    # Rango de fechas
+    # Rango de fechas: MIN/MAX se resuelven con el índice (fecha_colecta, id)
     fechas = db.query(
         func.min(ObservacionNaturalista.fecha_colecta),
         func.max(ObservacionNaturalista.fecha_colecta)
@@ -220,21 +401,29 @@ def obtener_estadisticas(db: Session) -> dict:
     }
     
     return {
-        "total_observaciones": total,
-        "por_estado": por_estado,
+        "total_observaciones": resumen[crud_estadisticas.DIMENSION_TOTAL].get("", 0),
+        "por_estado": resumen[crud_estadisticas.DIMENSION_ESTADO],
         "por_municipio": por_municipio,
         "por_anio": por_anio,
         "rango_fechas": rango_fechas
     }
 
 
+def _filtrar_mapa(db: Session, query, estado: Optional[str], municipio: Optional[str], bbox: Optional[BBox]):
+    query = _filtrar_catalogos(db, query, estado, municipio)
+    if bbox:
+        query = _filtrar_bbox(query, bbox)
+    return query
+
+
 def obtener_coordenadas_mapa(
     db: Session,
     estado: Optional[str] = None,
     municipio: Optional[str] = None,
-    limit: int = 1000
+    limit: int = 1000,
+    bbox: Optional[BBox] = None
 ) -> List[dict]:
-    """Obtener coordenadas para visualización en mapa"""
+    """Obtener coordenadas para visualización en mapa (las más recientes primero)"""
     query = db.query(
         ObservacionNaturalista.id,
         ObservacionNaturalista.latitud,
@@ -245,12 +434,10 @@ def obtener_coordenadas_mapa(
         ObservacionNaturalista.url_origen
     )
     
-    if estado:
-        query = query.filter(ObservacionNaturalista.estado.ilike(f"%{estado}%"))
-    if municipio:
-        query = query.filter(ObservacionNaturalista.municipio.ilike(f"%{municipio}%"))
-    
-    resultados = query.limit(limit).all()
+    query = _filtrar_mapa(db, query, estado, municipio, bbox)
+    resultados = query.order_by(
+        *[columna.desc() if descendente else columna.asc() for columna, descendente in ORDEN_LISTADO]
+    ).limit(limit).all()
     
     return [
         {
@@ -266,6 +453,159 @@ def obtener_coordenadas_mapa(
     ]
 
 
+def obtener_puntos_compactos(
+    db: Session,
+    estado: Optional[str] = None,
+    municipio: Optional[str] = None,
+    limit: int = 1000,
+    bbox: Optional[BBox] = None
+) -> List[Tuple[int, int, int, Optional[date]]]:
+    """
+    Obtener `(id, latitud * 1e7, longitud * 1e7, fecha)` de los puntos del mapa.
+    
+    Las coordenadas se escalan a enteros en la consulta, sin crear un Decimal
+    por valor; se usan para los formatos compactos de /mapa.
+    """
+    query = db.query(
+        ObservacionNaturalista.id,
+        cast(func.round(ObservacionNaturalista.latitud * ESCALA_COORDENADAS), Integer),
+        cast(func.round(ObservacionNaturalista.longitud * ESCALA_COORDENADAS), Integer),
+        ObservacionNaturalista.fecha_colecta
+    )
+    
+    query = _filtrar_mapa(db, query, estado, municipio, bbox)
+    return [tuple(fila) for fila in query.order_by(
+        *[columna.desc() if descendente else columna.asc() for columna, descendente in ORDEN_LISTADO]
+    ).limit(limit)]
+
+
+def obtener_clusters_mapa(
+    db: Session,
+    zoom: int,
+    bbox: Optional[BBox] = None,
+    estado: Optional[str] = None,
+    municipio: Optional[str] = None,
+    limit: int = 1000
+) -> dict:
+    """
+    Agrupar las observaciones en celdas de la cuadrícula para el `zoom` del mapa.
+    
+    La celda de cada observación se guarda precalculada en `celda_mapa` al nivel
+    más fino; la celda del nivel del zoom se obtiene con un corrimiento de bits
+    y se agrupa sobre el índice idx_obs_nat_celda. A partir de
+    MAPA_ZOOM_PUNTOS se retornan puntos individuales en lugar de clusters.
+    """
+    if zoom >= settings.MAPA_ZOOM_PUNTOS:
+        return {
+            "zoom": zoom,
+            "clusters": [],
+            "puntos": obtener_coordenadas_mapa(db, estado, municipio, limit, bbox)
+        }
+    
+    nivel = nivel_para_zoom(zoom)
+    celda = ObservacionNaturalista.celda_mapa.op(">>")(2 * (NIVEL_MAXIMO - nivel)).label("celda")
+    total = func.count(ObservacionNaturalista.id).label("total")
+    query = db.query(
+        celda,
+        total,
+        func.avg(ObservacionNaturalista.latitud).label("latitud"),
+        func.avg(ObservacionNaturalista.longitud).label("longitud")
+    ).filter(ObservacionNaturalista.celda_mapa.isnot(None))
+    
+    query = _filtrar_mapa(db, query, estado, municipio, bbox)
+    resultados = query.group_by(celda).order_by(total.desc(), celda).limit(limit).all()
+    
+    return {
+        "zoom": zoom,
+        "clusters": [
+            {
+                "celda": r.celda,
+                "total": r.total,
+                "latitud": round(float(r.latitud), 7),
+                "longitud": round(float(r.longitud), 7)
+            }
+            for r in resultados
+        ],
+        "puntos": []
+    }
+
+
+def asignar_celdas_pendientes(db: Session, tamano_lote: int = 5000) -> int:
+    """
+    Calcular `celda_mapa` de las observaciones que no la tienen (por ejemplo,
+    las cargadas con sql_completo_naturalista.sql). Confirma cada lote y
+    retorna el número de observaciones actualizadas.
+    """
+    actualizadas = 0
+    while True:
+        filas = db.query(
+            ObservacionNaturalista.id,
+            ObservacionNaturalista.latitud,
+            ObservacionNaturalista.longitud
+        ).filter(ObservacionNaturalista.celda_mapa.is_(None)).limit(tamano_lote).all()
+        if not filas:
+            return actualizadas
+        
+        db.bulk_update_mappings(ObservacionNaturalista, [
+            {"id": f.id, "celda_mapa": celda_mapa(f.latitud, f.longitud)}
+            for f in filas
+        ])
+        db.commit()
+        actualizadas += len(filas)
+
+
+def obtener_cercanas(
+    db: Session,
+    latitud: float,
+    longitud: float,
+    k: int = 10,
+    radio_km: Optional[float] = None
+) -> List[dict]:
+    """
+    Obtener las `k` observaciones más cercanas a un punto, opcionalmente
+    dentro de `radio_km`, ordenadas por distancia.
+    
+    La búsqueda se hace en el índice espacial en memoria; la base de datos
+    solo se consulta por llave primaria para los datos de los resultados.
+    """
+    if not indice_observaciones.cargado:
+        indice_observaciones.cargar(db)
+    
+    vecinos = indice_observaciones.buscar(latitud, longitud, k=k, radio_km=radio_km)
+    if not vecinos:
+        return []
+    
+    filas = {
+        r.id: r for r in db.query(
+            ObservacionNaturalista.id,
+            ObservacionNaturalista.latitud,
+            ObservacionNaturalista.longitud,
+            ObservacionNaturalista.localidad,
+            ObservacionNaturalista.municipio,
+            ObservacionNaturalista.fecha_colecta,
+            ObservacionNaturalista.url_origen
+        ).filter(ObservacionNaturalista.id.in_([id_ for _, id_ in vecinos]))
+    }
+    
+    resultados = []
+    for distancia, id_ in vecinos:
+        r = filas.get(id_)
+        if r is None:
+            # Eliminada por fuera del proceso después de cargar el índice
+            continue
+        resultados.append({
+            "id": r.id,
+            "latitud": float(r.latitud),
+            "longitud": float(r.longitud),
+            "distancia_km": round(distancia, 3),
+            "localidad": r.localidad,
+            "municipio": r.municipio,
+            "fecha": str(r.fecha_colecta) if r.fecha_colecta else None,
+            "url_origen": r.url_origen
+        })
+    return resultados
+
+
 def eliminar_observacion(db: Session, observacion_id: int) -> bool:
     """Eliminar una observación por ID"""
     db_observacion = db.query(ObservacionNaturalista).filter(
@@ -275,13 +615,19 @@ def eliminar_observacion(db: Session, observacion_id: int) -> bool:
     if not db_observacion:
         return False
     
+    crud_estadisticas.aplicar_observacion(db, db_observacion, signo=-1)
     db.delete(db_observacion)
     db.commit()
+    version_datos.incrementar()
+    indice_observaciones.quitar([(observacion_id, db_observacion.latitud, db_observacion.longitud)])
     return True
 
 
 def eliminar_todas(db: Session) -> int:
     """Eliminar todas las observaciones (usar con precaución)"""
     count = db.query(ObservacionNaturalista).delete()
+    crud_estadisticas.vaciar(db)
     db.commit()
+    version_datos.incrementar()
+    indice_observaciones.vaciar()
     return count
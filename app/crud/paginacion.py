@@ -0,0 +1,142 @@
+"""
+Paginación por cursor (keyset) compartida por los módulos CRUD.
+
+En lugar de `OFFSET`, que obliga a la base de datos a recorrer y descartar
+todas las filas anteriores, cada página continúa a partir de los valores de
+ordenamiento de la última fila entregada. El cursor es opaco para el cliente:
+codifica esos valores en base64.
+"""
+import base64
+import json
+from datetime import date, datetime, time
+from typing import Any, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, and_, false, or_, true
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Query
+
+# (columna, descendente)
+Orden = Sequence[Tuple[Any, bool]]
+
+
+class CursorInvalido(ValueError):
+    """El cursor no se pudo decodificar o no corresponde al ordenamiento"""
+
+
+class Pagina(NamedTuple):
+    items: list
+    next_cursor: Optional[str]
+    has_more: bool
+
+
+def codificar_cursor(valores: Sequence[Any]) -> str:
+    """Codificar los valores de ordenamiento de una fila como cursor opaco"""
+    serializados = [v.isoformat() if isinstance(v, (date, datetime, time)) else v for v in valores]
+    datos = json.dumps(serializados, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(datos).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor: str, orden: Orden) -> List[Any]:
+    """Decodificar un cursor y convertir sus valores al tipo de cada columna"""
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor inválido")
+
+    if not isinstance(valores, list) or len(valores) != len(orden):
+        raise CursorInvalido("Cursor inválido")
+
+    try:
+        return [_convertir(columna, valor) for (columna, _), valor in zip(orden, valores)]
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor inválido")
+
+
+def _convertir(columna: Any, valor: Any) -> Any:
+    if valor is None:
+        return None
+    try:
+        tipo = columna.type.python_type
+    except NotImplementedError:
+        return valor
+    if tipo in (date, datetime, time):
+        return tipo.fromisoformat(valor)
+    return tipo(valor)
+
+
+def _despues_de(orden: Orden, valores: List[Any]):
+    """
+    Condición "la fila va después del cursor" para un ordenamiento lexicográfico.
+
+    Se expande como `a < x OR (a = x AND b < y) ...`, forma que MySQL resuelve
+    con un rango sobre el índice compuesto. Los NULL se consideran menores que
+    cualquier valor, igual que en el ORDER BY de MySQL.
+    """
+    condiciones = []
+    iguales = []
+    for (columna, descendente), valor in zip(orden, valores):
+        if valor is None:
+            siguiente = false() if descendente else columna.isnot(None)
+            igual = columna.is_(None)
+        elif descendente:
+            siguiente = or_(columna < valor, columna.is_(None))
+            igual = columna == valor
+        else:
+            siguiente = columna > valor
+            igual = columna == valor
+        condiciones.append(and_(true(), *iguales, siguiente))
+        iguales.append(igual)
+    return or_(*condiciones)
+
+
+def _preparar(query, orden: Orden, cursor: Optional[str], skip: int, limit: int):
+    """Aplicar cursor, ORDER BY, OFFSET y LIMIT (a un Query del ORM o a un select())"""
+    if cursor:
+        query = query.filter(_despues_de(orden, decodificar_cursor(cursor, orden)))
+
+    query = query.order_by(*[columna.desc() if descendente else columna.asc() for columna, descendente in orden])
+
+    if skip and not cursor:
+        query = query.offset(skip)
+
+    # Pedir una fila extra para saber si hay más páginas sin otro COUNT
+    return query.limit(limit + 1)
+
+
+def _armar_pagina(filas: list, orden: Orden, limit: int) -> Pagina:
+    has_more = len(filas) > limit
+    filas = filas[:limit]
+
+    next_cursor = None
+    if has_more:
+        ultima = filas[-1]
+        next_cursor = codificar_cursor([getattr(ultima, columna.key) for columna, _ in orden])
+
+    return Pagina(items=filas, next_cursor=next_cursor, has_more=has_more)
+
+
+def paginar(query: Query, orden: Orden, limit: int, cursor: Optional[str] = None, skip: int = 0) -> Pagina:
+    """
+    Obtener una página de `query` ordenada por `orden`.
+
+    `orden` debe terminar en una columna única (normalmente el ID) para que el
+    ordenamiento sea estable. Si se indica `cursor`, la página empieza después
+    de la fila que lo generó y `skip` se ignora. Lanza CursorInvalido si el
+    cursor no es válido.
+    """
+    filas = _preparar(query, orden, cursor, skip, limit).all()
+    return _armar_pagina(filas, orden, limit)
+
+
+async def paginar_async(
+    db: AsyncSession,
+    stmt: Select,
+    orden: Orden,
+    limit: int,
+    cursor: Optional[str] = None,
+    skip: int = 0
+) -> Pagina:
+    """Igual que `paginar`, para un select() de entidades con una sesión asíncrona"""
+    result = await db.execute(_preparar(stmt, orden, cursor, skip, limit))
+    return _armar_pagina(list(result.scalars().all()), orden, limit)
@@ -1,7 +1,30 @@
+from typing import Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from app.crud.paginacion import Pagina, paginar
 from app.models.user import User
-from app.schemas.user import UserCreate
-from app.core.security import get_password_hash
+from app.core.cache_principales import actualizar_usuario, olvidar_usuario
+
+# Cambiar alguno de estos campos invalida los tokens emitidos al usuario
+CAMPOS_AUTORIZACION = {"username", "permiso", "is_active", "hashed_password"}
+
+class UsuarioDuplicado(Exception):
+    """El email o el username ya existen (índices únicos de users)"""
+    
+    def __init__(self, campo: str):
+        super().__init__(campo)
+        self.campo = campo
+
+def campo_duplicado(error: IntegrityError) -> Optional[str]:
+    """Campo único que causó el IntegrityError, o None si fue otra restricción"""
+    mensaje = str(error.orig)
+    # MySQL: "Duplicate entry '...' for key 'users.ix_users_email'"
+    # SQLite: "UNIQUE constraint failed: users.email"
+    clave = mensaje.rsplit("for key", 1)[-1] if "for key" in mensaje else mensaje.rsplit(":", 1)[-1]
+    for campo in ("email", "username"):
+        if campo in clave:
+            return campo
+    return None
 
 def get_user_by_email(db: Session, email: str):
     """Obtener usuario por email"""
@@ -15,34 +38,34 @@ def get_user_by_id(db: Session, user_id: int):
     """Obtener usuario por ID"""
     return db.query(User).filter(User.id == user_id).first()
 
-def get_users(db: Session, skip: int = 0, limit: int = 100):
-    """Obtener lista de usuarios"""
-    return db.query(User).offset(skip).limit(limit).all()
-
-def create_user(db: Session, user: UserCreate):
-    """Crear un nuevo usuario"""
-    hashed_password = get_password_hash(user.password)
-    db_user = User(
-        email=user.email,
-        username=user.username,
-        hashed_password=hashed_password,
-        full_name=user.full_name,
-        permiso=user.permiso
-    )
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+def get_users(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Pagina:
+    """Obtener una página de usuarios ordenada por ID (paginación por cursor)"""
+    return paginar(db.query(User), [(User.id, False)], limit=limit, cursor=cursor, skip=skip)
 
 def update_user(db: Session, user_id: int, user_data: dict):
     """Actualizar datos de usuario"""
     user = get_user_by_id(db, user_id)
     if user:
+        revocar = False
         for key, value in user_data.items():
             if hasattr(user, key) and value is not None:
+                revocar = revocar or (key in CAMPOS_AUTORIZACION and getattr(user, key) != value)
                 setattr(user, key, value)
+        if revocar:
+            user.token_version = User.token_version + 1
+        db.commit()
+        db.refresh(user)
+        actualizar_usuario(user.id, user.token_version, bool(user.is_active))
+    return user
+
+def revocar_tokens(db: Session, user_id: int):
+    """Invalidar todos los tokens emitidos al usuario"""
+    user = get_user_by_id(db, user_id)
+    if user:
+        user.token_version = User.token_version + 1
         db.commit()
         db.refresh(user)
+        actualizar_usuario(user.id, user.token_version, bool(user.is_active))
     return user
 
 def delete_user(db: Session, user_id: int):
@@ -51,4 +74,5 @@ def delete_user(db: Session, user_id: int):
     if user:
         db.delete(user)
         db.commit()
+        olvidar_usuario(user.id)
     return user
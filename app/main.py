@@ -2,8 +2,16 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from app.core.config import settings
-from app.core.database import engine, Base
+from app.core.database import async_engine, engine, Base, SessionLocal
 from app.api.v1.api import api_router
+from app.api.deps import ENCABEZADOS_PAGINACION
+from app.core.import_jobs import gestor_importaciones
+from app.core.indice_espacial import indice_observaciones
+from app.core.limitador import limitador_ip, limitador_usuario
+from app.core.monitor_loop import MiddlewareMonitorLoop, monitor_loop
+from app.core.pool_hash import pool_hash
+from app.crud import catalogo_naturalista as crud_catalogos
+from app.crud import estadistica_naturalista as crud_estadisticas
 from pathlib import Path
 
 # Importar todos los modelos para que SQLAlchemy los registre
@@ -29,8 +37,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=ENCABEZADOS_PAGINACION + ["ETag"],
 )
 
+# Identifica la petición en curso cuando el monitor detecta un bloqueo del loop
+if settings.LOOP_MONITOR_ENABLED:
+    app.add_middleware(MiddlewareMonitorLoop)
+
 # Incluir routers de la API v1
 app.include_router(api_router, prefix="/api/v1")
 
@@ -39,6 +52,40 @@ uploads_dir = Path("uploads")
 uploads_dir.mkdir(exist_ok=True)
 app.mount("/uploads", StaticFiles(directory="uploads"), name="uploads")
 
+@app.on_event("startup")
+def llenar_catalogos():
+    # Una base cargada con el SQL de ejemplo trae las observaciones sin catálogos
+    # ni resumen de estadísticas; GET /estadisticas solo lee el resumen
+    db = SessionLocal()
+    try:
+        crud_catalogos.asegurar_catalogos(db)
+        crud_estadisticas.asegurar_resumen(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+def cargar_indice_espacial():
+    db = SessionLocal()
+    try:
+        indice_observaciones.cargar(db)
+    finally:
+        db.close()
+
+@app.on_event("startup")
+async def iniciar_monitor_loop():
+    if settings.LOOP_MONITOR_ENABLED:
+        monitor_loop.iniciar()
+
+@app.on_event("shutdown")
+def detener_importaciones():
+    gestor_importaciones.cerrar()
+
+@app.on_event("shutdown")
+async def cerrar_motor_async():
+    monitor_loop.detener()
+    pool_hash.cerrar()
+    await async_engine.dispose()
+
 @app.get("/")
 async def root():
     return {
@@ -50,3 +97,17 @@ async def root():
 @app.get("/health")
 async def health_check():
     return {"status": "ok", "version": settings.VERSION}
+
+@app.get("/health/loop")
+async def health_loop():
+    """Retraso del event loop (p50/p99 en ms) y bloqueos detectados"""
+    return monitor_loop.resumen()
+
+@app.get("/health/auth")
+async def health_auth():
+    """Estado de los limitadores de /auth y del pool de bcrypt"""
+    return {
+        "limitador_ip": limitador_ip.resumen(),
+        "limitador_usuario": limitador_usuario.resumen(),
+        "pool_hash": pool_hash.resumen()
+    }
@@ -2,5 +2,9 @@ from app.models.user import User
 from app.models.evento import Evento
 from app.models.observacion import Observacion
 from app.models.observacion_naturalista import ObservacionNaturalista
+from app.models.estadistica_naturalista import EstadisticaNaturalista
+from app.models.catalogo_naturalista import EstadoCatalogo, MunicipioCatalogo, EspecieCatalogo
+from app.models.refresh_token import RefreshToken
 
-__all__ = ["User", "Evento", "Observacion", "ObservacionNaturalista"]
+__all__ = ["User", "Evento", "Observacion", "ObservacionNaturalista", "EstadisticaNaturalista",
+           "EstadoCatalogo", "MunicipioCatalogo", "EspecieCatalogo", "RefreshToken"]
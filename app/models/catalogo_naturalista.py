@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+
+class EstadoCatalogo(Base):
+    """Catálogo de estados del SNIB, por clave `entid`"""
+    __tablename__ = "cat_estados"
+    
+    entid = Column(Integer, primary_key=True, autoincrement=False)
+    nombre = Column(String(100), nullable=False)
+    # Nombre en minúsculas y sin acentos, para resolver los filtros de texto
+    nombre_normalizado = Column(String(100), nullable=False, index=True)
+
+
+class MunicipioCatalogo(Base):
+    """Catálogo de municipios del SNIB, por clave `munid` (única a nivel nacional)"""
+    __tablename__ = "cat_municipios"
+    
+    munid = Column(Integer, primary_key=True, autoincrement=False)
+    entid = Column(Integer, index=True)
+    nombre = Column(String(100), nullable=False)
+    nombre_normalizado = Column(String(100), nullable=False, index=True)
+
+
+class EspecieCatalogo(Base):
+    """Catálogo de especies, por clave del catálogo de autoridad `id_nombre_cat_valido`"""
+    __tablename__ = "cat_especies"
+    
+    id_nombre_cat_valido = Column(String(50), primary_key=True)
+    nombre = Column(String(100), nullable=False)
+    nombre_normalizado = Column(String(100), nullable=False, index=True)
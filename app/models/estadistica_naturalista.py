@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from app.core.database import Base
+
+
+class EstadisticaNaturalista(Base):
+    """
+    Resumen de conteos de observaciones_naturalista por dimensión.
+    
+    Se mantiene en la misma transacción que las inserciones y eliminaciones,
+    para que /estadisticas lea unos cientos de filas en lugar de agregar
+    toda la tabla de observaciones.
+    """
+    __tablename__ = "estadisticas_naturalista"
+    __table_args__ = (
+        UniqueConstraint("dimension", "valor", name="uq_estadistica_dimension_valor"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String(20), nullable=False, comment="total, estado, municipio o anio")
+    valor = Column(String(100), nullable=False, default="")
+    total = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Time, Date, Enum, ForeignKey, Table
+from sqlalchemy import Column, Integer, String, DateTime, Text, Time, Date, Enum, ForeignKey, Table, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -19,6 +19,10 @@ evento_usuarios = Table(
 
 class Evento(Base):
     __tablename__ = "eventos"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY fecha DESC, hora DESC, id DESC
+        Index("idx_eventos_fecha_hora_id", "fecha", "hora", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     titulo = Column(String(255), nullable=False)
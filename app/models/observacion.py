@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Date, Time, ForeignKey, JSON, Enum as SQLEnum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Date, Time, ForeignKey, JSON, Index, Enum as SQLEnum
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -45,6 +45,11 @@ class CambiosPoblacionEnum(str, enum.Enum):
 
 class Observacion(Base):
     __tablename__ = "observaciones"
+    __table_args__ = (
+        # Paginación por cursor: ORDER BY fecha_observacion DESC, id DESC
+        Index("idx_obs_fecha_id", "fecha_observacion", "id"),
+        Index("idx_obs_user_fecha_id", "user_id", "fecha_observacion", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Date, Numeric
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, Date, Numeric, Index
 from sqlalchemy.sql import func
 from app.core.database import Base
 
@@ -6,6 +6,18 @@ from app.core.database import Base
 class ObservacionNaturalista(Base):
     """Modelo para observaciones de iNaturalist/CONABIO"""
     __tablename__ = "observaciones_naturalista"
+    __table_args__ = (
+        # Paginación por cursor del listado: ORDER BY fecha_colecta DESC, id DESC
+        Index("idx_obs_nat_fecha_id", "fecha_colecta", "id"),
+        # Agrupación del mapa por celda; incluye las coordenadas para calcular
+        # el centroide sin leer la fila completa
+        Index("idx_obs_nat_celda", "celda_mapa", "latitud", "longitud"),
+        # Filtros por estado, municipio y especie resueltos con los catálogos
+        # (ver app.core.catalogos)
+        Index("idx_obs_nat_entid", "entid"),
+        Index("idx_obs_nat_munid", "munid"),
+        Index("idx_obs_nat_especie", "id_nombre_cat_valido"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     id_ejemplar = Column(String(100), unique=True, nullable=False)
@@ -19,6 +31,7 @@ class ObservacionNaturalista(Base):
     ecorid = Column(Integer)
     latitud = Column(Numeric(10, 7), nullable=False)
     longitud = Column(Numeric(10, 7), nullable=False)
+    celda_mapa = Column(BigInteger, comment="Código Morton de la celda (ver app.core.geo)")
     localidad = Column(String(500))
     municipio = Column(String(100))
     estado = Column(String(100))
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Index
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class RefreshToken(Base):
+    """
+    Refresh token emitido a un usuario. Solo se guarda el SHA-256 del token;
+    cada uso lo revoca y emite uno nuevo de la misma familia (rotación).
+    """
+    __tablename__ = "refresh_tokens"
+    __table_args__ = (
+        Index("idx_refresh_tokens_familia", "familia"),
+        Index("idx_refresh_tokens_user_expira", "user_id", "expires_at"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    token_hash = Column(String(64), unique=True, nullable=False)
+    # Todos los tokens obtenidos por rotación desde un mismo inicio de sesión
+    familia = Column(String(32), nullable=False)
+    # Versión de token del usuario al emitirlo; si cambia, el refresh token deja de valer
+    token_version = Column(Integer, nullable=False)
+    revocado = Column(Boolean, default=False, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
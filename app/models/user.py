@@ -18,6 +18,8 @@ class User(Base):
     full_name = Column(String(255))
     permiso = Column(Enum(PermisoEnum), default=PermisoEnum.user, nullable=False)
     is_active = Column(Boolean, default=True)
+    # Se incrementa para invalidar los tokens emitidos (claim ver)
+    token_version = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -1,5 +1,5 @@
-from app.schemas.user import UserBase, UserCreate, UserResponse, UserLogin
-from app.schemas.token import Token, TokenData
+from app.schemas.user import UserBase, UserCreate, UserResponse, UserLogin, AltaMasivaResponse
+from app.schemas.token import Token, TokenData, RefreshTokenRequest
 from app.schemas.evento import EventoCreate, EventoResponse, EventoUpdate, EventoListResponse
 from app.schemas.observacion import (
     ObservacionCreate, 
@@ -13,8 +13,10 @@ __all__ = [
     "UserCreate", 
     "UserResponse",
     "UserLogin",
+    "AltaMasivaResponse",
     "Token",
     "TokenData",
+    "RefreshTokenRequest",
     "EventoCreate",
     "EventoResponse",
     "EventoUpdate",
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Tuple
+from typing_extensions import Annotated, NotRequired, TypedDict
 from decimal import Decimal
 
 
@@ -94,44 +95,137 @@ class ObservacionNaturalistaImport(BaseModel):
 
     def to_create_schema(self) -> ObservacionNaturalistaCreate:
         """Convierte del formato JSON de CONABIO al formato del modelo"""
-        fecha = None
-        if self.fechacolecta:
-            try:
-                fecha = datetime.strptime(self.fechacolecta, "%Y-%m-%d").date()
-            except ValueError:
-                fecha = None
-        
-        return ObservacionNaturalistaCreate(
-            id_ejemplar=self.idejemplar,
-            id_nombre_cat_valido=self.idnombrecatvalido,
-            especie_valida_busqueda=self.especievalidabusqueda,
-            comentarios_cat_valido=self.comentarioscatvalido,
-            categoria_taxonomica=self.categoriataxonomica,
-            entid=self.entid,
-            munid=self.munid,
-            anpid=self.anpid,
-            ecorid=self.ecorid,
-            latitud=self.latitud,
-            longitud=self.longitud,
-            localidad=self.localidad,
-            municipio=self.municipiomapa,
-            estado=self.estadomapa,
-            pais=self.paismapa,
-            fecha_colecta=fecha,
-            colector=self.colector if self.colector else None,
-            coleccion=self.coleccion,
-            probable_loc_no_de_campo=self.probablelocnodecampo if self.probablelocnodecampo else None,
-            ejemplar_fosil=self.ejemplarfosil if self.ejemplarfosil else None,
-            institucion=self.institucion,
-            pais_coleccion=self.paiscoleccion,
-            proyecto=self.proyecto,
-            url_proyecto=self.urlproyecto if self.urlproyecto else None,
-            url_ejemplar=self.urlejemplar,
-            url_origen=self.urlorigen,
-            id_original=self.id,
-            tipo_coleccion=self.tipocoleccion,
-            id_nombre_cat_valido_orig=self.idnombrecatvalidoorig
+        return ObservacionNaturalistaCreate(**conabio_a_columnas(self.__dict__))
+
+
+class RegistroConabio(TypedDict):
+    """
+    Registro crudo del JSON de CONABIO con las mismas restricciones que
+    ObservacionNaturalistaCreate. Se valida por lotes con un solo TypeAdapter
+    y produce diccionarios, sin construir modelos intermedios.
+    """
+    idejemplar: Annotated[str, Field(max_length=100)]
+    idnombrecatvalido: NotRequired[Annotated[Optional[str], Field(max_length=50)]]
+    especievalidabusqueda: Annotated[str, Field(max_length=100)]
+    comentarioscatvalido: NotRequired[Optional[str]]
+    categoriataxonomica: NotRequired[Annotated[Optional[str], Field(max_length=50)]]
+    entid: NotRequired[Optional[int]]
+    munid: NotRequired[Optional[int]]
+    anpid: NotRequired[Optional[int]]
+    ecorid: NotRequired[Optional[int]]
+    latitud: float
+    longitud: float
+    localidad: NotRequired[Annotated[Optional[str], Field(max_length=500)]]
+    municipiomapa: NotRequired[Annotated[Optional[str], Field(max_length=100)]]
+    estadomapa: NotRequired[Annotated[Optional[str], Field(max_length=100)]]
+    paismapa: NotRequired[Annotated[Optional[str], Field(max_length=100)]]
+    fechacolecta: NotRequired[Optional[str]]
+    colector: NotRequired[Annotated[Optional[str], Field(max_length=255)]]
+    coleccion: NotRequired[Annotated[Optional[str], Field(max_length=255)]]
+    probablelocnodecampo: NotRequired[Annotated[Optional[str], Field(max_length=255)]]
+    ejemplarfosil: NotRequired[Annotated[Optional[str], Field(max_length=50)]]
+    institucion: NotRequired[Annotated[Optional[str], Field(max_length=255)]]
+    paiscoleccion: NotRequired[Annotated[Optional[str], Field(max_length=100)]]
+    proyecto: NotRequired[Annotated[Optional[str], Field(max_length=100)]]
+    urlproyecto: NotRequired[Annotated[Optional[str], Field(max_length=500)]]
+    urlejemplar: NotRequired[Annotated[Optional[str], Field(max_length=500)]]
+    urlorigen: NotRequired[Annotated[Optional[str], Field(max_length=500)]]
+    id: NotRequired[Optional[int]]
+    tipocoleccion: NotRequired[Optional[int]]
+    idnombrecatvalidoorig: NotRequired[Annotated[Optional[str], Field(max_length=50)]]
+
+
+# Nombre del campo en el JSON de CONABIO -> columna de observaciones_naturalista
+COLUMNAS_CONABIO = {
+    "idejemplar": "id_ejemplar",
+    "idnombrecatvalido": "id_nombre_cat_valido",
+    "especievalidabusqueda": "especie_valida_busqueda",
+    "comentarioscatvalido": "comentarios_cat_valido",
+    "categoriataxonomica": "categoria_taxonomica",
+    "entid": "entid",
+    "munid": "munid",
+    "anpid": "anpid",
+    "ecorid": "ecorid",
+    "latitud": "latitud",
+    "longitud": "longitud",
+    "localidad": "localidad",
+    "municipiomapa": "municipio",
+    "estadomapa": "estado",
+    "paismapa": "pais",
+    "fechacolecta": "fecha_colecta",
+    "colector": "colector",
+    "coleccion": "coleccion",
+    "probablelocnodecampo": "probable_loc_no_de_campo",
+    "ejemplarfosil": "ejemplar_fosil",
+    "institucion": "institucion",
+    "paiscoleccion": "pais_coleccion",
+    "proyecto": "proyecto",
+    "urlproyecto": "url_proyecto",
+    "urlejemplar": "url_ejemplar",
+    "urlorigen": "url_origen",
+    "id": "id_original",
+    "tipocoleccion": "tipo_coleccion",
+    "idnombrecatvalidoorig": "id_nombre_cat_valido_orig",
+}
+
+# Campos donde CONABIO usa cadena vacía para "sin dato"
+_CAMPOS_VACIO_A_NULO = ("colector", "probablelocnodecampo", "ejemplarfosil", "urlproyecto")
+
+_registros_conabio = TypeAdapter(List[RegistroConabio])
+
+
+def _parsear_fecha_colecta(valor: Optional[str]) -> Optional[date]:
+    """Parsear la fecha de colecta; las fechas inválidas se guardan como nulas"""
+    if not valor:
+        return None
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        pass
+    try:
+        # Formatos sin ceros a la izquierda ("2019-5-2") que fromisoformat no acepta
+        return datetime.strptime(valor, "%Y-%m-%d").date()
+    except ValueError:
+        return None
+
+
+def conabio_a_columnas(registro: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertir un registro de CONABIO ya validado a un diccionario de columnas del modelo"""
+    fila = {columna: registro.get(campo) for campo, columna in COLUMNAS_CONABIO.items()}
+    for campo in _CAMPOS_VACIO_A_NULO:
+        if not fila[COLUMNAS_CONABIO[campo]]:
+            fila[COLUMNAS_CONABIO[campo]] = None
+    fila["fecha_colecta"] = _parsear_fecha_colecta(fila["fecha_colecta"])
+    return fila
+
+
+def validar_lote_conabio(registros: List[Any], inicio: int = 0) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Validar un lote de registros crudos de CONABIO con una sola llamada a pydantic-core.
+    
+    Retorna las filas válidas ya mapeadas a columnas y los mensajes de error de
+    los registros inválidos, numerados a partir de `inicio`. Es una función de
+    módulo para poder ejecutarse en un pool de procesos.
+    """
+    errores_por_registro: Dict[int, List[str]] = {}
+    try:
+        validados = _registros_conabio.validate_python(registros)
+    except ValidationError as e:
+        for error in e.errors():
+            indice, campo = error["loc"][0], ".".join(str(p) for p in error["loc"][1:])
+            mensaje = f"{campo}: {error['msg']}" if campo else error["msg"]
+            errores_por_registro.setdefault(indice, []).append(mensaje)
+        # Revalidar sin los registros inválidos (sigue siendo una sola llamada)
+        validados = _registros_conabio.validate_python(
+            [r for i, r in enumerate(registros) if i not in errores_por_registro]
         )
+    
+    filas = [conabio_a_columnas(registro) for registro in validados]
+    errores = [
+        f"Registro {inicio + indice}: {'; '.join(mensajes)}"
+        for indice, mensajes in sorted(errores_por_registro.items())
+    ]
+    return filas, errores
 
 
 class ObservacionNaturalistaInDB(ObservacionNaturalistaBase):
@@ -158,6 +252,19 @@ class ImportResult(BaseModel):
     mensajes_error: List[str] = []
 
 
+class TrabajoImportacionResponse(ImportResult):
+    """Schema para el estado de un trabajo de importación en segundo plano"""
+    id: str
+    estado: str
+    registros_por_segundo: float
+    creado: datetime
+    iniciado: Optional[datetime] = None
+    finalizado: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class EstadisticasNaturalista(BaseModel):
     """Schema para estadísticas de observaciones de Naturalista"""
     total_observaciones: int
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from enum import Enum
 
 class PermisoEnum(str, Enum):
@@ -34,3 +34,9 @@ class UserResponse(UserBase):
 class UserLogin(BaseModel):
     username: str
     password: str
+
+class AltaMasivaResponse(BaseModel):
+    creados: int
+    # Usernames omitidos porque el email o el username ya existen
+    duplicados: List[str]
+    errores: List[str]
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Script para agregar la columna token_version a la tabla users.
+
+Uso:
+    python scripts/agregar_version_token.py
+
+Los tokens de acceso llevan la versión de token del usuario (claim `ver`);
+incrementarla invalida los tokens emitidos. Ejecutar este script al
+actualizar una base de datos creada antes de que existiera la columna.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from app.core.database import engine
+from app.models.user import User
+
+
+def main():
+    tabla = User.__tablename__
+    columnas = {c["name"] for c in inspect(engine).get_columns(tabla)}
+    if "token_version" in columnas:
+        print("✅ La columna token_version ya existe")
+        return
+
+    print("🔧 Agregando columna token_version...")
+    with engine.begin() as conexion:
+        conexion.execute(text(f"ALTER TABLE {tabla} ADD COLUMN token_version INTEGER NOT NULL DEFAULT 0"))
+    print("✅ Columna agregada")
+
+
+if __name__ == "__main__":
+    main()
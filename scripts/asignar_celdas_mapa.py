@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script para calcular la celda del mapa de las observaciones de Naturalista que no la tienen.
+
+Uso:
+    python scripts/asignar_celdas_mapa.py
+
+La API calcula `celda_mapa` al insertar o importar observaciones. Ejecutar este
+script después de cargar observaciones por fuera de la API (por ejemplo, con
+sql_completo_naturalista.sql) o al actualizar una base de datos existente; si la
+columna no existe, se agrega junto con su índice.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from app.core.database import SessionLocal, engine, Base
+from app.crud import observacion_naturalista as crud_obs_nat
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+
+def agregar_columna():
+    """Agregar la columna celda_mapa y su índice a una tabla creada antes de que existieran"""
+    tabla = ObservacionNaturalista.__tablename__
+    columnas = {c["name"] for c in inspect(engine).get_columns(tabla)}
+    if "celda_mapa" in columnas:
+        return
+
+    print("🔧 Agregando columna celda_mapa...")
+    with engine.begin() as conexion:
+        conexion.execute(text(f"ALTER TABLE {tabla} ADD COLUMN celda_mapa BIGINT"))
+        for indice in ObservacionNaturalista.__table__.indexes:
+            if indice.name == "idx_obs_nat_celda":
+                indice.create(conexion)
+
+
+def main():
+    print("🔧 Verificando/creando tablas...")
+    Base.metadata.create_all(bind=engine)
+    agregar_columna()
+
+    db = SessionLocal()
+    try:
+        print("🗺️  Calculando celdas del mapa...")
+        actualizadas = crud_obs_nat.asignar_celdas_pendientes(db)
+        print(f"✅ {actualizadas} observaciones actualizadas")
+    except Exception as e:
+        print(f"❌ Error al calcular las celdas: {str(e)}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark de la validación de registros de CONABIO para la importación de Naturalista.
+
+Compara, sobre un archivo sintético, la validación registro por registro
+(ObservacionNaturalistaImport + to_create_schema) contra la validación por lotes
+con un solo TypeAdapter (validar_lote_conabio), en uno y en varios procesos.
+
+Uso:
+    python scripts/benchmark_validacion_naturalista.py [--registros 100000] [--lote 1000] [--procesos 4]
+
+No requiere base de datos.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas.observacion_naturalista import ObservacionNaturalistaImport, validar_lote_conabio
+
+
+def generar_registros(total: int) -> list:
+    """Generar registros sintéticos con el formato del SNIB de CONABIO"""
+    aleatorio = random.Random(42)
+    municipios = ["ALVARADO", "BOCA DEL RIO", "TUXPAN", "TECOLUTLA", "VERACRUZ"]
+    return [
+        {
+            "idejemplar": f"{i:032x}",
+            "idnombrecatvalido": "2737CRUST",
+            "especievalidabusqueda": "Cardisoma guanhumi",
+            "comentarioscatvalido": "Validado completamente con CAT.",
+            "categoriataxonomica": "especie",
+            "entid": 30,
+            "munid": aleatorio.randint(1, 212),
+            "anpid": None,
+            "ecorid": 757,
+            "latitud": 19.0 + aleatorio.random(),
+            "longitud": -96.0 - aleatorio.random(),
+            "localidad": f"Localidad sintética {i}",
+            "municipiomapa": aleatorio.choice(municipios),
+            "estadomapa": "VERACRUZ DE IGNACIO DE LA LLAVE",
+            "paismapa": "MEXICO",
+            "fechacolecta": f"{aleatorio.randint(2000, 2024)}-{aleatorio.randint(1, 12):02d}-{aleatorio.randint(1, 28):02d}",
+            "colector": "",
+            "coleccion": "Naturalista Naturalista",
+            "probablelocnodecampo": "",
+            "ejemplarfosil": "",
+            "institucion": "CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad",
+            "paiscoleccion": "MEXICO",
+            "proyecto": "Naturalista",
+            "urlproyecto": "",
+            "urlejemplar": f"http://www.snib.mx/snibgeoportal/Ejemplar.php?id={i:032x}",
+            "urlorigen": f"https://www.inaturalist.org/observations/{i}",
+            "id": i,
+            "tipocoleccion": 5,
+            "idnombrecatvalidoorig": "2737CRUST",
+        }
+        for i in range(total)
+    ]
+
+
+def por_registro(registros: list) -> int:
+    """Validación anterior: dos modelos pydantic por registro"""
+    validos = 0
+    for item in registros:
+        ObservacionNaturalistaImport(**item).to_create_schema()
+        validos += 1
+    return validos
+
+
+def por_lotes(registros: list, tamano_lote: int) -> int:
+    """Validación por lotes en el proceso actual"""
+    validos = 0
+    for inicio in range(0, len(registros), tamano_lote):
+        filas, _ = validar_lote_conabio(registros[inicio:inicio + tamano_lote], inicio)
+        validos += len(filas)
+    return validos
+
+
+def por_lotes_en_procesos(registros: list, tamano_lote: int, procesos: int) -> int:
+    """Validación por lotes repartida en un pool de procesos"""
+    lotes = [registros[i:i + tamano_lote] for i in range(0, len(registros), tamano_lote)]
+    inicios = range(0, len(registros), tamano_lote)
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        return sum(len(filas) for filas, _ in pool.map(validar_lote_conabio, lotes, inicios))
+
+
+def medir(nombre: str, funcion, total: int):
+    inicio = time.perf_counter()
+    validos = funcion()
+    segundos = time.perf_counter() - inicio
+    print(f"  {nombre:<32} {segundos:8.2f} s  {total / segundos:12,.0f} registros/s  ({validos} válidos)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de validación de registros de CONABIO")
+    parser.add_argument("--registros", type=int, default=100_000)
+    parser.add_argument("--lote", type=int, default=1000)
+    parser.add_argument("--procesos", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"Generando {args.registros} registros sintéticos...")
+    registros = generar_registros(args.registros)
+
+    print("=" * 72)
+    medir("Por registro (Import + Create)", lambda: por_registro(registros), args.registros)
+    medir(f"Por lotes de {args.lote}", lambda: por_lotes(registros, args.lote), args.registros)
+    if args.procesos > 1:
+        medir(
+            f"Por lotes, {args.procesos} procesos",
+            lambda: por_lotes_en_procesos(registros, args.lote, args.procesos),
+            args.registros
+        )
+    print("=" * 72)
+
+
+if __name__ == "__main__":
+    main()
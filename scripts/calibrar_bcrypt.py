@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Script para elegir el costo de bcrypt (BCRYPT_ROUNDS) según una latencia objetivo.
+
+Uso:
+    python scripts/calibrar_bcrypt.py [--objetivo-ms 250] [--repeticiones 5]
+
+Mide en esta máquina cuánto tarda un hash con cada costo y recomienda el
+mayor cuya mediana no excede el objetivo. Cada incremento duplica el tiempo.
+Ejecutarlo en el servidor de producción y poner el resultado en .env; los
+hashes existentes con otro costo se recalculan al iniciar sesión.
+"""
+
+import argparse
+import statistics
+import time
+
+import bcrypt
+
+COSTO_MINIMO = 10
+COSTO_MAXIMO = 16
+
+
+def medir(rounds: int, repeticiones: int) -> float:
+    """Mediana en milisegundos de un hash con `rounds`"""
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        bcrypt.hashpw(b"calibracion-cangrejo-azul", bcrypt.gensalt(rounds))
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibrar el costo de bcrypt")
+    parser.add_argument("--objetivo-ms", type=float, default=250,
+                        help="Latencia máxima por hash en milisegundos (por defecto: 250)")
+    parser.add_argument("--repeticiones", type=int, default=5,
+                        help="Mediciones por costo (por defecto: 5)")
+    args = parser.parse_args()
+
+    print(f"⏱️  Midiendo bcrypt (objetivo: {args.objetivo_ms:.0f} ms por hash)...")
+    elegido = COSTO_MINIMO
+    for rounds in range(COSTO_MINIMO, COSTO_MAXIMO + 1):
+        mediana = medir(rounds, args.repeticiones)
+        print(f"   rounds={rounds:2d}  {mediana:8.1f} ms")
+        if mediana > args.objetivo_ms:
+            break
+        elegido = rounds
+
+    print(f"✅ Costo recomendado: BCRYPT_ROUNDS={elegido}")
+
+
+if __name__ == "__main__":
+    main()
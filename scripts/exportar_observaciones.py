@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Script para exportar observaciones a Parquet o Arrow IPC para análisis.
+
+Uso:
+    python scripts/exportar_observaciones.py ruta/de/salida.parquet
+        [--tabla naturalista|observaciones] [--formato parquet|arrow]
+
+Las filas se leen con un cursor del lado del servidor y se escriben por
+lotes, sin cargar la tabla completa en memoria. Las columnas de baja
+cardinalidad (estado, municipio, comunidad...) usan codificación de
+diccionario. Requiere el paquete pyarrow.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import exportacion_arrow
+from app.core.database import SessionLocal
+from app.crud import observacion as crud_observacion
+from app.crud import observacion_naturalista as crud_obs_nat
+
+TABLAS = {
+    "naturalista": crud_obs_nat,
+    "observaciones": crud_observacion,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportar observaciones a Parquet o Arrow IPC")
+    parser.add_argument("salida", help="Ruta del archivo a escribir")
+    parser.add_argument("--tabla", choices=sorted(TABLAS), default="naturalista",
+                        help="Tabla a exportar (por defecto: naturalista)")
+    parser.add_argument("--formato", choices=[exportacion_arrow.FORMATO_PARQUET, exportacion_arrow.FORMATO_ARROW],
+                        default=None, help="Formato de salida (por defecto, según la extensión)")
+    args = parser.parse_args()
+
+    if not exportacion_arrow.disponible():
+        print("❌ La exportación Arrow/Parquet requiere el paquete pyarrow (pip install pyarrow)")
+        sys.exit(1)
+
+    formato = args.formato
+    if formato is None:
+        es_arrow = args.salida.endswith((".arrow", ".arrows"))
+        formato = exportacion_arrow.FORMATO_ARROW if es_arrow else exportacion_arrow.FORMATO_PARQUET
+
+    crud = TABLAS[args.tabla]
+    db = SessionLocal()
+    try:
+        print(f"📦 Exportando {args.tabla} a {args.salida} ({formato})...")
+        inicio = time.time()
+        total = exportacion_arrow.escribir_archivo(
+            formato,
+            args.salida,
+            crud.iterar_exportacion(db=db),
+            crud.COLUMNAS_EXPORTACION,
+            crud.COLUMNAS_DICCIONARIO
+        )
+        duracion = time.time() - inicio
+        tamano = os.path.getsize(args.salida) / (1024 * 1024)
+        print(f"✅ {total} observaciones exportadas en {duracion:.1f} s ({tamano:.1f} MB)")
+    except Exception as e:
+        print(f"❌ Error al exportar: {str(e)}")
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
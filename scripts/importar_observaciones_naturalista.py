@@ -4,125 +4,151 @@ Script para importar observaciones de iNaturalist/CONABIO desde JSON a la base d
 
 Uso:
     python scripts/importar_observaciones_naturalista.py ruta/al/archivo.json
+        [--batch-size 5000] [--workers 4] [--checkpoint ruta] [--reiniciar]
 
 El archivo JSON debe contener las observaciones filtradas de Veracruz.
+
+El archivo se lee de forma incremental y se inserta por lotes. Después de
+confirmar cada lote se escribe un archivo de checkpoint; si la importación se
+interrumpe, al volver a ejecutar el script se continúa desde el último lote
+confirmado. Con --workers N la validación de los lotes se reparte en N procesos.
 """
 
+import argparse
+import itertools
 import json
-import sys
 import os
-from datetime import datetime
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional, Tuple
 
 # Agregar el directorio raíz al path para importar los módulos de la app
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy.orm import Session
 from app.core.database import SessionLocal, engine, Base
-from app.models.observacion_naturalista import ObservacionNaturalista
-
-
-def parsear_fecha(fecha_str: str) -> datetime.date:
-    """Convertir string de fecha a objeto date"""
-    if not fecha_str:
-        return None
-    try:
-        return datetime.strptime(fecha_str, "%Y-%m-%d").date()
-    except ValueError:
-        return None
+from app.core.import_jobs import validar_lotes
+from app.core.json_stream import iterar_array_json
+from app.crud import observacion_naturalista as crud_obs_nat
 
 
-def transformar_registro(registro: dict) -> dict:
-    """Transformar un registro del JSON al formato del modelo"""
+def huella_archivo(archivo_json: str) -> dict:
+    """Identificar el archivo para no reanudar un checkpoint de otro archivo"""
+    info = os.stat(archivo_json)
     return {
-        "idejemplar": registro.get("idejemplar"),
-        "id_naturalista": registro.get("id"),
-        "idnombrecatvalido": registro.get("idnombrecatvalido"),
-        "especievalidabusqueda": registro.get("especievalidabusqueda"),
-        "categoriataxonomica": registro.get("categoriataxonomica"),
-        "comentarioscatvalido": registro.get("comentarioscatvalido"),
-        "idnombrecatvalidoorig": registro.get("idnombrecatvalidoorig"),
-        "entid": registro.get("entid"),
-        "munid": registro.get("munid"),
-        "anpid": registro.get("anpid"),
-        "ecorid": registro.get("ecorid"),
-        "latitud": registro.get("latitud"),
-        "longitud": registro.get("longitud"),
-        "localidad": registro.get("localidad"),
-        "municipiomapa": registro.get("municipiomapa"),
-        "estadomapa": registro.get("estadomapa"),
-        "paismapa": registro.get("paismapa"),
-        "fechacolecta": parsear_fecha(registro.get("fechacolecta")),
-        "colector": registro.get("colector") or None,
-        "coleccion": registro.get("coleccion"),
-        "institucion": registro.get("institucion"),
-        "paiscoleccion": registro.get("paiscoleccion"),
-        "proyecto": registro.get("proyecto"),
-        "tipocoleccion": registro.get("tipocoleccion"),
-        "urlproyecto": registro.get("urlproyecto") or None,
-        "urlejemplar": registro.get("urlejemplar"),
-        "urlorigen": registro.get("urlorigen"),
-        "probablelocnodecampo": registro.get("probablelocnodecampo") or None,
-        "ejemplarfosil": registro.get("ejemplarfosil") or None,
+        "archivo": os.path.abspath(archivo_json),
+        "tamano": info.st_size,
+        "modificado": info.st_mtime
     }
 
 
-def importar_json(archivo_json: str, db: Session) -> dict:
+def leer_checkpoint(ruta: str, huella: dict) -> Optional[dict]:
+    """Leer el checkpoint si existe y corresponde al mismo archivo"""
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, 'r', encoding='utf-8') as f:
+        checkpoint = json.load(f)
+    if checkpoint.get("huella") != huella:
+        print(f"⚠️  El checkpoint {ruta} es de otro archivo o el archivo cambió; se ignora")
+        return None
+    return checkpoint
+
+
+def escribir_checkpoint(ruta: str, checkpoint: dict):
+    """Escribir el checkpoint de forma atómica"""
+    temporal = f"{ruta}.tmp"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump(checkpoint, f)
+    os.replace(temporal, ruta)
+
+
+def leer_lotes(archivo_json: str, desde: int, batch_size: int) -> Iterator[Tuple[int, list]]:
+    """Leer el archivo de forma incremental en lotes `(inicio, registros)`, saltando los ya importados"""
+    with open(archivo_json, 'rb') as f:
+        registros = itertools.islice(iterar_array_json(f), desde, None)
+        inicio = desde
+        while True:
+            lote = list(itertools.islice(registros, batch_size))
+            if not lote:
+                return
+            yield inicio, lote
+            inicio += len(lote)
+
+
+def importar_json(
+    archivo_json: str,
+    db: Session,
+    batch_size: int = 5000,
+    workers: int = 1,
+    ruta_checkpoint: Optional[str] = None,
+    reiniciar: bool = False
+) -> dict:
     """
     Importar observaciones desde archivo JSON a la base de datos.
-    
+
     Returns:
         dict con estadísticas de la importación
     """
-    # Leer archivo JSON
+    ruta_checkpoint = ruta_checkpoint or f"{archivo_json}.checkpoint"
+    huella = huella_archivo(archivo_json)
+
+    checkpoint = None if reiniciar else leer_checkpoint(ruta_checkpoint, huella)
+    if checkpoint:
+        print(f"↩️  Reanudando desde el registro {checkpoint['registros']} ({ruta_checkpoint})")
+    else:
+        checkpoint = {
+            "huella": huella,
+            "registros": 0,
+            "insertados": 0,
+            "duplicados": 0,
+            "errores": 0
+        }
+
     print(f"📖 Leyendo archivo: {archivo_json}")
-    with open(archivo_json, 'r', encoding='utf-8') as f:
-        datos = json.load(f)
-    
-    print(f"📊 Total de registros en JSON: {len(datos)}")
-    
-    # Estadísticas
-    insertados = 0
-    duplicados = 0
-    errores = 0
-    
-    # Procesar cada registro
-    for i, registro in enumerate(datos):
-        try:
-            idejemplar = registro.get("idejemplar")
-            
-            # Verificar si ya existe
-            existente = db.query(ObservacionNaturalista).filter(
-                ObservacionNaturalista.idejemplar == idejemplar
-            ).first()
-            
-            if existente:
-                duplicados += 1
-                continue
-            
-            # Transformar y crear registro
-            datos_transformados = transformar_registro(registro)
-            nueva_obs = ObservacionNaturalista(**datos_transformados)
-            db.add(nueva_obs)
-            insertados += 1
-            
-            # Commit cada 50 registros
-            if insertados % 50 == 0:
-                db.commit()
-                print(f"  ✓ Procesados {i + 1}/{len(datos)} registros...")
-                
-        except Exception as e:
-            errores += 1
-            print(f"  ✗ Error en registro {i + 1}: {str(e)}")
-            db.rollback()
-    
-    # Commit final
-    db.commit()
-    
+
+    inicio_tiempo = time.perf_counter()
+    procesados_sesion = 0
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        lotes = leer_lotes(archivo_json, checkpoint["registros"], batch_size)
+        for procesados, (filas, errores) in validar_lotes(lotes, pool, max_pendientes=2 * workers):
+            for mensaje in errores:
+                print(f"  ✗ {mensaje}")
+
+            # crear_observaciones_bulk confirma el lote antes de retornar
+            resultado = crud_obs_nat.crear_observaciones_bulk(db, filas, chunk_size=batch_size)
+            for mensaje in resultado["mensajes_error"]:
+                print(f"  ✗ {mensaje}")
+
+            checkpoint["registros"] += procesados
+            checkpoint["insertados"] += resultado["insertados"]
+            checkpoint["duplicados"] += resultado["duplicados"]
+            checkpoint["errores"] += resultado["errores"] + len(errores)
+            escribir_checkpoint(ruta_checkpoint, checkpoint)
+
+            procesados_sesion += procesados
+            segundos = time.perf_counter() - inicio_tiempo
+            print(
+                f"  ✓ Procesados {checkpoint['registros']} registros "
+                f"({procesados_sesion / segundos:,.0f} registros/s)"
+            )
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+
+    # Importación completa: el checkpoint ya no es necesario
+    if os.path.exists(ruta_checkpoint):
+        os.remove(ruta_checkpoint)
+
+    segundos = time.perf_counter() - inicio_tiempo
     return {
-        "total_json": len(datos),
-        "insertados": insertados,
-        "duplicados": duplicados,
-        "errores": errores
+        "total_json": checkpoint["registros"],
+        "insertados": checkpoint["insertados"],
+        "duplicados": checkpoint["duplicados"],
+        "errores": checkpoint["errores"],
+        "registros_por_segundo": procesados_sesion / segundos if segundos > 0 else 0.0
     }
 
 
@@ -134,31 +160,43 @@ def crear_tablas():
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("❌ Error: Debe especificar la ruta al archivo JSON")
-        print("Uso: python scripts/importar_observaciones_naturalista.py ruta/al/archivo.json")
-        sys.exit(1)
-    
-    archivo_json = sys.argv[1]
-    
+    parser = argparse.ArgumentParser(
+        description="Importar observaciones de iNaturalist/CONABIO desde JSON a la base de datos"
+    )
+    parser.add_argument("archivo_json", help="Ruta al archivo JSON del SNIB de CONABIO")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Registros por lote (default: 5000)")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos para validar lotes (default: 1)")
+    parser.add_argument("--checkpoint", default=None, help="Archivo de checkpoint (default: <archivo>.checkpoint)")
+    parser.add_argument("--reiniciar", action="store_true", help="Ignorar el checkpoint existente y empezar desde el inicio")
+    args = parser.parse_args()
+
+    archivo_json = args.archivo_json
+
     if not os.path.exists(archivo_json):
         print(f"❌ Error: El archivo no existe: {archivo_json}")
         sys.exit(1)
-    
+
     print("=" * 60)
     print("🦀 IMPORTADOR DE OBSERVACIONES iNATURALIST/CONABIO")
     print("=" * 60)
-    
+
     # Crear tablas
     crear_tablas()
-    
+
     # Crear sesión de BD
     db = SessionLocal()
-    
+
     try:
         # Importar datos
-        resultados = importar_json(archivo_json, db)
-        
+        resultados = importar_json(
+            archivo_json,
+            db,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            ruta_checkpoint=args.checkpoint,
+            reiniciar=args.reiniciar
+        )
+
         print("\n" + "=" * 60)
         print("📊 RESUMEN DE IMPORTACIÓN")
         print("=" * 60)
@@ -166,13 +204,23 @@ def main():
         print(f"  Insertados:       {resultados['insertados']}")
         print(f"  Duplicados:       {resultados['duplicados']}")
         print(f"  Errores:          {resultados['errores']}")
+        print(f"  Registros/s:      {resultados['registros_por_segundo']:,.0f}")
         print("=" * 60)
-        
+
         if resultados['insertados'] > 0:
             print("✅ Importación completada exitosamente")
         else:
             print("⚠️  No se insertaron nuevos registros")
-            
+
+    except ValueError as e:
+        print(f"❌ Error al leer el JSON: {str(e)}")
+        print("   Los lotes anteriores al error ya quedaron insertados.")
+        db.rollback()
+        sys.exit(1)
+    except KeyboardInterrupt:
+        print("\n⏸️  Importación interrumpida; vuelva a ejecutar el script para continuar desde el último lote")
+        db.rollback()
+        sys.exit(130)
     except Exception as e:
         print(f"❌ Error durante la importación: {str(e)}")
         db.rollback()
@@ -183,4 +231,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir los catálogos de estados, municipios y especies de Naturalista.
+
+Uso:
+    python scripts/reconstruir_catalogos_naturalista.py
+
+Los filtros `estado`, `municipio` y `especie` de la API se resuelven con estos
+catálogos, que la API mantiene al insertar e importar observaciones. Ejecutar
+este script después de cargar observaciones por fuera de la API (por ejemplo,
+con sql_completo_naturalista.sql) o al actualizar una base de datos existente;
+también crea los índices de observaciones_naturalista que falten.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect
+from app.core.database import SessionLocal, engine, Base
+from app.crud import catalogo_naturalista as crud_catalogos
+from app.models.observacion_naturalista import ObservacionNaturalista
+
+
+def agregar_indices():
+    """Crear los índices del modelo que no existan en una tabla creada antes que ellos"""
+    existentes = {i["name"] for i in inspect(engine).get_indexes(ObservacionNaturalista.__tablename__)}
+    with engine.begin() as conexion:
+        for indice in ObservacionNaturalista.__table__.indexes:
+            if indice.name not in existentes:
+                print(f"🔧 Creando índice {indice.name}...")
+                indice.create(conexion)
+
+
+def main():
+    print("🔧 Verificando/creando tablas...")
+    Base.metadata.create_all(bind=engine)
+    agregar_indices()
+
+    db = SessionLocal()
+    try:
+        print("📚 Reconstruyendo catálogos de estados, municipios y especies...")
+        totales = crud_catalogos.reconstruir(db)
+        print(
+            f"✅ Catálogos reconstruidos: {totales['estados']} estados, "
+            f"{totales['municipios']} municipios, {totales['especies']} especies"
+        )
+    except Exception as e:
+        print(f"❌ Error al reconstruir los catálogos: {str(e)}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
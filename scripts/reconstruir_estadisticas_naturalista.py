@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Script para reconstruir el resumen de estadísticas de observaciones de Naturalista.
+
+Uso:
+    python scripts/reconstruir_estadisticas_naturalista.py
+
+La API mantiene la tabla estadisticas_naturalista al insertar, importar y
+eliminar observaciones. Ejecutar este script después de modificar
+observaciones_naturalista por fuera de la API (por ejemplo, al cargar
+sql_completo_naturalista.sql) o para reconciliar el resumen.
+"""
+
+import os
+import sys
+
+# Agregar el directorio raíz al path para importar los módulos de la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import SessionLocal, engine, Base
+from app.crud import estadistica_naturalista as crud_estadisticas
+
+
+def main():
+    print("🔧 Verificando/creando tablas...")
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        print("📊 Reconstruyendo estadísticas de observaciones de Naturalista...")
+        total = crud_estadisticas.reconstruir(db)
+        print(f"✅ Resumen reconstruido ({total} observaciones)")
+    except Exception as e:
+        print(f"❌ Error al reconstruir las estadísticas: {str(e)}")
+        db.rollback()
+        sys.exit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ CREATE TABLE observaciones_naturalista (
     ecorid INTEGER,
     latitud DECIMAL(10, 7) NOT NULL,
     longitud DECIMAL(10, 7) NOT NULL,
+    celda_mapa BIGINT,
     localidad VARCHAR(500),
     municipio VARCHAR(100),
     estado VARCHAR(100),
@@ -37,7 +38,44 @@ CREATE TABLE observaciones_naturalista (
 -- Índices
 CREATE INDEX idx_obs_nat_estado ON observaciones_naturalista(estado);
 CREATE INDEX idx_obs_nat_municipio ON observaciones_naturalista(municipio);
-CREATE INDEX idx_obs_nat_fecha ON observaciones_naturalista(fecha_colecta);
+CREATE INDEX idx_obs_nat_fecha_id ON observaciones_naturalista(fecha_colecta, id);
+CREATE INDEX idx_obs_nat_celda ON observaciones_naturalista(celda_mapa, latitud, longitud);
+CREATE INDEX idx_obs_nat_entid ON observaciones_naturalista(entid);
+CREATE INDEX idx_obs_nat_munid ON observaciones_naturalista(munid);
+CREATE INDEX idx_obs_nat_especie ON observaciones_naturalista(id_nombre_cat_valido);
+
+-- Resumen de estadísticas por dimensión (total, estado, municipio, anio)
+CREATE TABLE estadisticas_naturalista (
+    id SERIAL PRIMARY KEY,
+    dimension VARCHAR(20) NOT NULL,
+    valor VARCHAR(100) NOT NULL DEFAULT '',
+    total INTEGER NOT NULL DEFAULT 0,
+    CONSTRAINT uq_estadistica_dimension_valor UNIQUE (dimension, valor)
+);
+
+-- Catálogos para resolver los filtros de texto a claves (entid, munid, id_nombre_cat_valido)
+CREATE TABLE cat_estados (
+    entid INTEGER PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    nombre_normalizado VARCHAR(100) NOT NULL
+);
+CREATE INDEX ix_cat_estados_nombre_normalizado ON cat_estados(nombre_normalizado);
+
+CREATE TABLE cat_municipios (
+    munid INTEGER PRIMARY KEY,
+    entid INTEGER,
+    nombre VARCHAR(100) NOT NULL,
+    nombre_normalizado VARCHAR(100) NOT NULL
+);
+CREATE INDEX ix_cat_municipios_entid ON cat_municipios(entid);
+CREATE INDEX ix_cat_municipios_nombre_normalizado ON cat_municipios(nombre_normalizado);
+
+CREATE TABLE cat_especies (
+    id_nombre_cat_valido VARCHAR(50) PRIMARY KEY,
+    nombre VARCHAR(100) NOT NULL,
+    nombre_normalizado VARCHAR(100) NOT NULL
+);
+CREATE INDEX ix_cat_especies_nombre_normalizado ON cat_especies(nombre_normalizado);
 -- Inserts observaciones naturalista Veracruz (261 registros)
 INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('1ba5b25d16b49ad91ddb5b788bfcdb06', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', 30, 2160, NULL, 757, 19.0613366, -95.9882436, 'Avenida 5 de Mayo 7, Antón Lizardo, VER, MX', 'ALVARADO', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2019-05-20', NULL, 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=1ba5b25d16b49ad91ddb5b788bfcdb06', 'https://www.inaturalist.org/observations/27304413', 20547576, 5, '2737CRUST');
 INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('4ecdcda7bfba0ad320901e6b990f2e49', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', 30, 2203, NULL, 757, 19.1379909, -96.1315078, 'Av. Río Papaloapan 169, Boticaria, 94297 Boca del Río, Ver., México', 'BOCA DEL RIO', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2019-08-18', NULL, 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=4ecdcda7bfba0ad320901e6b990f2e49', 'https://www.inaturalist.org/observations/31125584', 18088607, 5, '2737CRUST');
@@ -299,4 +337,22 @@ INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especi
 INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('8a62fc793a9f7f87c5b95e2765055c28', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', 30, 2295, NULL, 609, 20.9803352, -97.312622, 'Túxpam de Rodríguez Cano, Ver., México', 'TUXPAN', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2019-06-28', NULL, 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=8a62fc793a9f7f87c5b95e2765055c28', 'https://www.inaturalist.org/observations/31147168', 20520233, 5, '2737CRUST');
 INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('8c82a5831178d8b7cc4fea21beaab825', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', 30, 2297, NULL, 757, 19.4177707, -96.3271696, 'Ursulo Galván, MX-VE, MX', 'URSULO GALVAN', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2021-07-26', 'Idlegrraphics', 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=8c82a5831178d8b7cc4fea21beaab825', 'https://www.inaturalist.org/observations/109934030', 20843836, 5, '2737CRUST');
 INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('2cb51982eeb5e43a075b2e02aa7ebebb', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', 30, 2286, NULL, 686, 20.2590616, -96.80313, 'Calle Primero de Mayo, Casitas, VER, MX', 'TECOLUTLA', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2020-08-18', 'Damián Ordoñez', 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=2cb51982eeb5e43a075b2e02aa7ebebb', 'https://www.inaturalist.org/observations/57805203', 20989235, 5, '2737CRUST');
-INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('a278b29457cc58077fbbf7f932d1cb26', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', NULL, 2295, NULL, NULL, 20.9814453, -97.3464508, 'Túxpam de Rodríguez Cano, Ver., México', 'TUXPAN', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2019-08-31', 'Giovanni Leon', 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=a278b29457cc58077fbbf7f932d1cb26', 'https://www.inaturalist.org/observations/31899524', 21565900, 5, '2737CRUST');
\ No newline at end of file
+INSERT INTO observaciones_naturalista (id_ejemplar, id_nombre_cat_valido, especie_valida_busqueda, comentarios_cat_valido, categoria_taxonomica, entid, munid, anpid, ecorid, latitud, longitud, localidad, municipio, estado, pais, fecha_colecta, colector, coleccion, probable_loc_no_de_campo, ejemplar_fosil, institucion, pais_coleccion, proyecto, url_proyecto, url_ejemplar, url_origen, id_original, tipo_coleccion, id_nombre_cat_valido_orig) VALUES ('a278b29457cc58077fbbf7f932d1cb26', '2737CRUST', 'Cardisoma guanhumi', 'Validado completamente con CAT.', 'especie', NULL, 2295, NULL, NULL, 20.9814453, -97.3464508, 'Túxpam de Rodríguez Cano, Ver., México', 'TUXPAN', 'VERACRUZ DE IGNACIO DE LA LLAVE', 'MEXICO', '2019-08-31', 'Giovanni Leon', 'Naturalista Naturalista', NULL, NULL, 'CONABIO Comisión Nacional para el Conocimiento y Uso de la Biodiversidad', 'MEXICO', 'Naturalista', NULL, 'http://www.snib.mx/snibgeoportal/Ejemplar.php?id=a278b29457cc58077fbbf7f932d1cb26', 'https://www.inaturalist.org/observations/31899524', 21565900, 5, '2737CRUST');
+
+-- celda_mapa queda en NULL: ejecutar scripts/asignar_celdas_mapa.py después de cargar este archivo
+-- Los catálogos se llenan al iniciar la API si están vacíos (los nombres
+-- normalizados se calculan en Python); también con scripts/reconstruir_catalogos_naturalista.py
+
+-- Calcular el resumen de estadísticas para los registros insertados arriba
+-- (equivalente a scripts/reconstruir_estadisticas_naturalista.py)
+INSERT INTO estadisticas_naturalista (dimension, valor, total)
+SELECT 'total', '', COUNT(*) FROM observaciones_naturalista;
+INSERT INTO estadisticas_naturalista (dimension, valor, total)
+SELECT 'estado', estado, COUNT(*) FROM observaciones_naturalista
+WHERE estado IS NOT NULL AND estado <> '' GROUP BY estado;
+INSERT INTO estadisticas_naturalista (dimension, valor, total)
+SELECT 'municipio', municipio, COUNT(*) FROM observaciones_naturalista
+WHERE municipio IS NOT NULL AND municipio <> '' GROUP BY municipio;
+INSERT INTO estadisticas_naturalista (dimension, valor, total)
+SELECT 'anio', CAST(EXTRACT(YEAR FROM fecha_colecta) AS CHAR), COUNT(*) FROM observaciones_naturalista
+WHERE fecha_colecta IS NOT NULL GROUP BY EXTRACT(YEAR FROM fecha_colecta);